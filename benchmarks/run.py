@@ -0,0 +1,355 @@
+# benchmarks/run.py
+"""
+Benchmark de carga da API: semeia um banco temporário, executa cargas de
+trabalho mistas contra a aplicação ASGI (em processo, via httpx) e reporta
+throughput e latências p50/p95/p99 por endpoint. Os resultados são gravados
+em JSON para comparação entre execuções (--compare).
+
+Cargas de trabalho:
+    login     rajada de logins (bcrypt no pool de senhas)
+    catalog   polling do catálogo de players (metade com If-None-Match)
+    progress  ticks de progresso (delta e progresso completo)
+    roster    listagens do jogador (personagens, campanhas, bootstrap, perfil)
+    mixed     combinação ponderada de todas as anteriores
+
+Uso (banco temporário, removido ao final):
+    MONGO_URI=mongodb://localhost:27017 python -m benchmarks.run --workload all
+    python -m benchmarks.run --engine memory --duration 5   # sem MongoDB
+    python -m benchmarks.run --workload mixed --compare benchmarks/results/anterior.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.seed import BENCH_PASSWORD, VirtualUser, seed
+from urbansoccer_server.core import database
+from urbansoccer_server.core.config import settings
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# Operação: recebe o client, o usuário virtual e o estado do worker; retorna (endpoint, resposta)
+Operation = Callable[[httpx.AsyncClient, VirtualUser, dict], Awaitable[Tuple[str, httpx.Response]]]
+
+
+def _auth(user: VirtualUser) -> dict:
+    return {"Authorization": f"Bearer {user.token}"}
+
+
+async def op_login(client, user, state):
+    response = await client.post("/users/login", json={"email": user.email, "password": BENCH_PASSWORD})
+    return "POST /users/login", response
+
+
+async def op_catalog_available(client, user, state):
+    headers = {}
+    etag = state.get("catalog_etag")
+    if etag and state["rng"].random() < 0.5:
+        headers["If-None-Match"] = etag
+    response = await client.get("/players/available", headers=headers)
+    if response.status_code == 200:
+        state["catalog_etag"] = response.headers.get("etag")
+    return "GET /players/available", response
+
+
+async def op_catalog_all(client, user, state):
+    response = await client.get("/players/")
+    return "GET /players/", response
+
+
+async def op_progress_delta(client, user, state):
+    campaign_id = state["rng"].choice(user.active_campaign_ids)
+    response = await client.patch(
+        f"/campaigns/{campaign_id}/progress/delta",
+        json={"scoreIncrement": state["rng"].randint(1, 50)},
+        headers=_auth(user),
+    )
+    return "PATCH /campaigns/{id}/progress/delta", response
+
+
+async def op_progress_full(client, user, state):
+    campaign_id = state["rng"].choice(user.active_campaign_ids)
+    progress = {
+        "level": state["rng"].randint(1, 20),
+        "score": state["rng"].randint(0, 10000),
+        "currentMission": "Missão de Benchmark",
+        "inventory": ["bola", "chuteira"],
+    }
+    response = await client.patch(f"/campaigns/{campaign_id}/progress", json=progress, headers=_auth(user))
+    return "PATCH /campaigns/{id}/progress", response
+
+
+async def op_characters(client, user, state):
+    response = await client.get("/characters/", headers=_auth(user))
+    return "GET /characters/", response
+
+
+async def op_active_campaigns(client, user, state):
+    response = await client.get("/campaigns/active", headers=_auth(user))
+    return "GET /campaigns/active", response
+
+
+async def op_bootstrap(client, user, state):
+    response = await client.get("/bootstrap/", headers=_auth(user))
+    return "GET /bootstrap/", response
+
+
+async def op_profile(client, user, state):
+    response = await client.get("/users/me", headers=_auth(user))
+    return "GET /users/me", response
+
+
+WORKLOADS: Dict[str, List[Tuple[int, Operation]]] = {
+    "login": [(1, op_login)],
+    "catalog": [(3, op_catalog_available), (1, op_catalog_all)],
+    "progress": [(3, op_progress_delta), (1, op_progress_full)],
+    "roster": [(2, op_characters), (2, op_active_campaigns), (1, op_bootstrap), (1, op_profile)],
+    "mixed": [
+        (1, op_login),
+        (4, op_catalog_available),
+        (8, op_progress_delta),
+        (2, op_progress_full),
+        (2, op_characters),
+        (2, op_active_campaigns),
+        (1, op_bootstrap),
+        (1, op_profile),
+    ],
+}
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Percentil pelo método nearest-rank"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: Dict[str, List[float]], statuses: Dict[str, Dict[int, int]], elapsed: float) -> dict:
+    """Throughput e percentis (em ms) por endpoint e no total"""
+    endpoints = {}
+    all_latencies = []
+    for endpoint, values in sorted(latencies.items()):
+        values = sorted(values)
+        all_latencies.extend(values)
+        endpoints[endpoint] = {
+            "requests": len(values),
+            "throughput": len(values) / elapsed if elapsed else 0.0,
+            "p50Ms": percentile(values, 0.50) * 1000,
+            "p95Ms": percentile(values, 0.95) * 1000,
+            "p99Ms": percentile(values, 0.99) * 1000,
+            "maxMs": values[-1] * 1000 if values else 0.0,
+            "statuses": {str(code): count for code, count in sorted(statuses[endpoint].items())},
+        }
+    all_latencies.sort()
+    return {
+        "elapsedSeconds": elapsed,
+        "requests": len(all_latencies),
+        "throughput": len(all_latencies) / elapsed if elapsed else 0.0,
+        "p50Ms": percentile(all_latencies, 0.50) * 1000,
+        "p95Ms": percentile(all_latencies, 0.95) * 1000,
+        "p99Ms": percentile(all_latencies, 0.99) * 1000,
+        "endpoints": endpoints,
+    }
+
+
+async def collect_workload(
+    client: httpx.AsyncClient,
+    users: List[VirtualUser],
+    name: str,
+    concurrency: int,
+    duration: float,
+    max_requests: Optional[int],
+    seed_value: int,
+) -> dict:
+    """Executa uma carga de trabalho com `concurrency` workers e retorna as latências brutas"""
+    operations = WORKLOADS[name]
+    weights = [weight for weight, _operation in operations]
+    functions = [operation for _weight, operation in operations]
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+    errors: Dict[str, int] = defaultdict(int)
+    issued = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id: int):
+        nonlocal issued
+        state = {"rng": random.Random(seed_value * 1000 + worker_id)}
+        rng = state["rng"]
+        while time.perf_counter() < deadline and (max_requests is None or issued < max_requests):
+            issued += 1
+            user = rng.choice(users)
+            operation = rng.choices(functions, weights)[0]
+            if not user.active_campaign_ids and operation in (op_progress_delta, op_progress_full):
+                operation = op_characters
+            start = time.perf_counter()
+            try:
+                endpoint, response = await operation(client, user, state)
+            except Exception as e:
+                errors[type(e).__name__] += 1
+                continue
+            latencies[endpoint].append(time.perf_counter() - start)
+            statuses[endpoint][response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(worker_id) for worker_id in range(concurrency)))
+    return {
+        "latencies": dict(latencies),
+        "statuses": {endpoint: dict(codes) for endpoint, codes in statuses.items()},
+        "errors": dict(errors),
+        "elapsed": time.perf_counter() - started,
+    }
+
+
+async def run_workload(
+    client: httpx.AsyncClient,
+    users: List[VirtualUser],
+    name: str,
+    concurrency: int,
+    duration: float,
+    max_requests: Optional[int],
+    seed_value: int,
+) -> dict:
+    """Executa uma carga de trabalho com `concurrency` workers até o tempo/limite"""
+    raw = await collect_workload(client, users, name, concurrency, duration, max_requests, seed_value)
+    result = summarize(raw["latencies"], raw["statuses"], raw["elapsed"])
+    result["errors"] = raw["errors"]
+    return result
+
+
+async def login_all(client: httpx.AsyncClient, users: List[VirtualUser], concurrency: int) -> None:
+    """Obtém o token de cada usuário virtual antes das medições"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login(user: VirtualUser):
+        async with semaphore:
+            response = await client.post("/users/login", json={"email": user.email, "password": BENCH_PASSWORD})
+            response.raise_for_status()
+            user.token = response.json()["access_token"]
+
+    await asyncio.gather(*(login(user) for user in users))
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def print_report(name: str, result: dict, baseline: Optional[dict] = None) -> None:
+    print(f"\n== {name}: {result['requests']} requisições em {result['elapsedSeconds']:.1f}s "
+          f"({result['throughput']:.1f} req/s) p50 {result['p50Ms']:.1f} ms p95 {result['p95Ms']:.1f} ms "
+          f"p99 {result['p99Ms']:.1f} ms")
+    print(f"{'endpoint':<40} {'req/s':>9} {'p50':>8} {'p95':>8} {'p99':>8}  status")
+    for endpoint, stats in result["endpoints"].items():
+        line = (f"{endpoint:<40} {stats['throughput']:>9.1f} {stats['p50Ms']:>8.1f} "
+                f"{stats['p95Ms']:>8.1f} {stats['p99Ms']:>8.1f}  {stats['statuses']}")
+        previous = (baseline or {}).get("endpoints", {}).get(endpoint)
+        if previous and previous["p95Ms"]:
+            line += (f"  Δp95 {100 * (stats['p95Ms'] / previous['p95Ms'] - 1):+.0f}%"
+                     f" Δreq/s {100 * (stats['throughput'] / previous['throughput'] - 1):+.0f}%")
+        print(line)
+    if result["errors"]:
+        print(f"erros: {result['errors']}")
+
+
+async def run_benchmark(args) -> dict:
+    from urbansoccer_server.main import app
+
+    rng = random.Random(args.seed)
+    report = {
+        "startedAt": datetime.utcnow().isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "parameters": {
+            "users": args.users,
+            "charactersPerUser": args.characters,
+            "campaignsPerUser": args.campaigns,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "requests": args.requests,
+            "seed": args.seed,
+            "engine": settings.DATABASE_ENGINE,
+            "progressWriteBehind": settings.PROGRESS_WRITE_BEHIND,
+            "mongoMaxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        },
+        "workloads": {},
+    }
+    # O lifespan da aplicação conecta, cria índices, semeia os players e inicia o catálogo
+    async with app.router.lifespan_context(app):
+        try:
+            started = time.perf_counter()
+            users = await seed(args.users, args.characters, args.campaigns, rng)
+            print(f"🌱 {len(users)} usuários semeados em {time.perf_counter() - started:.1f}s")
+
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+                await login_all(client, users, args.concurrency)
+                names = list(WORKLOADS) if args.workload == "all" else [args.workload]
+                for name in names:
+                    if args.warmup:
+                        await run_workload(client, users, name, args.concurrency, args.warmup, None, args.seed)
+                    report["workloads"][name] = await run_workload(
+                        client, users, name, args.concurrency, args.duration, args.requests, args.seed
+                    )
+        finally:
+            if not args.keep:
+                await database.get_client().drop_database(settings.MONGO_DB)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workload", default="mixed", choices=[*WORKLOADS, "all"])
+    parser.add_argument("--users", type=int, default=200, help="Usuários semeados")
+    parser.add_argument("--characters", type=int, default=3, help="Personagens por usuário")
+    parser.add_argument("--campaigns", type=int, default=4, help="Campanhas por usuário")
+    parser.add_argument("--concurrency", type=int, default=50, help="Clientes simultâneos")
+    parser.add_argument("--duration", type=float, default=20.0, help="Segundos por carga de trabalho")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Segundos de aquecimento (não medidos)")
+    parser.add_argument("--requests", type=int, default=None, help="Limite de requisições por carga")
+    parser.add_argument("--seed", type=int, default=42, help="Semente dos dados e da sequência de operações")
+    parser.add_argument("--engine", choices=["mongo", "memory"], default=settings.DATABASE_ENGINE,
+                        help="Armazenamento: MongoDB ou engine em memória")
+    parser.add_argument("--db", default="urbansoccer_benchmark", help="Banco temporário usado no benchmark")
+    parser.add_argument("--keep", action="store_true", help="Não remove o banco ao final")
+    parser.add_argument("--output", help="Arquivo JSON de resultados (padrão: benchmarks/results/)")
+    parser.add_argument("--compare", help="Resultado anterior (JSON) para comparar")
+    args = parser.parse_args()
+
+    settings.MONGO_DB = args.db
+    settings.DATABASE_ENGINE = args.engine
+    report = asyncio.run(run_benchmark(args))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+    for name, result in report["workloads"].items():
+        print_report(name, result, (baseline or {}).get("workloads", {}).get(name))
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{args.workload}-{stamp}.json")
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+    print(f"\n📄 Resultados gravados em {output}")
+
+
+if __name__ == "__main__":
+    main()
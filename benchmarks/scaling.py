@@ -0,0 +1,256 @@
+# benchmarks/scaling.py
+"""
+Benchmark de escalabilidade por número de workers: semeia um banco temporário,
+sobe o servidor de produção (python -m urbansoccer_server.serve) com cada
+quantidade de workers informada e mede throughput e latências das cargas
+catalog e progress via HTTP real. O gerador de carga roda em vários processos
+para não virar o gargalo; em uma máquina só, reserve CPUs para ele.
+
+Requer MongoDB: os workers precisam compartilhar o banco (no engine em memória
+cada processo tem seus próprios dados).
+
+Uso (banco temporário, removido ao final):
+    MONGO_URI=mongodb://localhost:27017 python -m benchmarks.scaling --workers 1 2 4
+    python -m benchmarks.scaling --workers 1 2 4 8 --clients 4 --concurrency 64 --duration 15
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import List
+
+import httpx
+
+from benchmarks.run import RESULTS_DIR, _git_commit, collect_workload, summarize
+from benchmarks.seed import VirtualUser, seed
+from urbansoccer_server.core import database
+from urbansoccer_server.core.auth import create_access_token
+from urbansoccer_server.core.config import settings
+from urbansoccer_server.core.database_init import initialize_database
+
+SCALING_WORKLOADS = ["catalog", "progress"]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def prepare(args) -> List[VirtualUser]:
+    """Inicializa e semeia o banco; os tokens são emitidos direto (sem bcrypt)"""
+    database.connect()
+    try:
+        if not await initialize_database():
+            raise RuntimeError("Não foi possível inicializar o banco do benchmark")
+        users = await seed(args.users, args.characters, args.campaigns, random.Random(args.seed))
+    finally:
+        database.close()
+    for user in users:
+        user.token = create_access_token({"sub": user.email})
+    return users
+
+
+async def drop_database() -> None:
+    database.connect()
+    try:
+        await database.get_client().drop_database(settings.MONGO_DB)
+    finally:
+        database.close()
+
+
+def start_server(workers: int, port: int, log_file) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "MONGO_DB": settings.MONGO_DB,
+        "DATABASE_ENGINE": "mongo",
+        "SERVER_ACCESS_LOG": "false",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "urbansoccer_server.serve", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers)],
+        env=env, stdout=log_file, stderr=subprocess.STDOUT,
+    )
+
+
+def wait_ready(process: subprocess.Popen, base_url: str, timeout: float) -> None:
+    """Aguarda o servidor responder; com vários workers, dá tempo a todos subirem"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Servidor encerrou durante o startup (código {process.returncode})")
+        try:
+            if httpx.get(f"{base_url}/players/available", timeout=1.0).status_code == 200:
+                time.sleep(1.0)
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("Servidor não ficou pronto a tempo")
+
+
+def stop_server(process: subprocess.Popen, timeout: float) -> float:
+    """Envia SIGTERM e retorna o tempo de drenagem (segundos)"""
+    started = time.perf_counter()
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+    return time.perf_counter() - started
+
+
+def _load_process(base_url: str, users: List[VirtualUser], name: str, concurrency: int,
+                  duration: float, warmup: float, seed_value: int) -> dict:
+    """Gerador de carga de um processo: aquecimento seguido da medição"""
+
+    async def run() -> dict:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+            if warmup:
+                await collect_workload(client, users, name, concurrency, warmup, None, seed_value)
+            return await collect_workload(client, users, name, concurrency, duration, None, seed_value)
+
+    return asyncio.run(run())
+
+
+def run_load(executor: ProcessPoolExecutor, base_url: str, users: List[VirtualUser], name: str, args) -> dict:
+    """Distribui a carga entre os processos geradores e consolida as latências"""
+    futures = [
+        executor.submit(_load_process, base_url, users, name, args.concurrency,
+                        args.duration, args.warmup, args.seed + index)
+        for index in range(args.clients)
+    ]
+    latencies, statuses, errors, elapsed = {}, {}, {}, 0.0
+    for future in futures:
+        raw = future.result()
+        elapsed = max(elapsed, raw["elapsed"])
+        for endpoint, values in raw["latencies"].items():
+            latencies.setdefault(endpoint, []).extend(values)
+        for endpoint, codes in raw["statuses"].items():
+            merged = statuses.setdefault(endpoint, {})
+            for code, count in codes.items():
+                merged[code] = merged.get(code, 0) + count
+        for error, count in raw["errors"].items():
+            errors[error] = errors.get(error, 0) + count
+    result = summarize(latencies, statuses, elapsed)
+    result["errors"] = errors
+    return result
+
+
+def print_scaling(report: dict) -> None:
+    for name, runs in report["workloads"].items():
+        print(f"\n== {name}")
+        print(f"{'workers':>7} {'req/s':>10} {'p50':>8} {'p95':>8} {'p99':>8} {'speedup':>8} {'eficiência':>10}  status")
+        base = runs[0]["throughput"] / runs[0]["workers"] if runs and runs[0]["throughput"] else 0.0
+        for run in runs:
+            speedup = run["throughput"] / (base * runs[0]["workers"]) if base else 0.0
+            efficiency = run["throughput"] / (base * run["workers"]) if base else 0.0
+            statuses = {}
+            for stats in run["endpoints"].values():
+                for code, count in stats["statuses"].items():
+                    statuses[code] = statuses.get(code, 0) + count
+            print(f"{run['workers']:>7} {run['throughput']:>10.1f} {run['p50Ms']:>8.1f} {run['p95Ms']:>8.1f} "
+                  f"{run['p99Ms']:>8.1f} {speedup:>7.2f}x {efficiency:>9.0%}  {statuses}")
+            if run["errors"]:
+                print(f"{'':>7} erros: {run['errors']}")
+    for run in report["drain"]:
+        print(f"drenagem com {run['workers']} worker(s): {run['seconds']:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Quantidades de workers a medir")
+    parser.add_argument("--workload", default="all", choices=[*SCALING_WORKLOADS, "all"])
+    parser.add_argument("--users", type=int, default=200, help="Usuários semeados")
+    parser.add_argument("--characters", type=int, default=3, help="Personagens por usuário")
+    parser.add_argument("--campaigns", type=int, default=4, help="Campanhas por usuário")
+    parser.add_argument("--clients", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Processos geradores de carga")
+    parser.add_argument("--concurrency", type=int, default=32, help="Clientes simultâneos por processo gerador")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos por medição")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Segundos de aquecimento (não medidos)")
+    parser.add_argument("--startup-timeout", type=float, default=60.0, help="Espera máxima pelo servidor")
+    parser.add_argument("--seed", type=int, default=42, help="Semente dos dados e da sequência de operações")
+    parser.add_argument("--db", default="urbansoccer_benchmark", help="Banco temporário usado no benchmark")
+    parser.add_argument("--keep", action="store_true", help="Não remove o banco ao final")
+    parser.add_argument("--output", help="Arquivo JSON de resultados (padrão: benchmarks/results/)")
+    args = parser.parse_args()
+
+    if settings.DATABASE_ENGINE == "memory":
+        parser.error("o benchmark de escalabilidade requer MongoDB (DATABASE_ENGINE=mongo)")
+    settings.MONGO_DB = args.db
+    names = SCALING_WORKLOADS if args.workload == "all" else [args.workload]
+
+    report = {
+        "startedAt": datetime.utcnow().isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "parameters": {
+            "workers": args.workers,
+            "users": args.users,
+            "clients": args.clients,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "seed": args.seed,
+            "progressWriteBehind": settings.PROGRESS_WRITE_BEHIND,
+            "mongoMaxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        },
+        "workloads": {name: [] for name in names},
+        "drain": [],
+    }
+
+    users = asyncio.run(prepare(args))
+    print(f"🌱 {len(users)} usuários semeados")
+    try:
+        with ProcessPoolExecutor(max_workers=args.clients) as executor:
+            for workers in args.workers:
+                port = _free_port()
+                base_url = f"http://127.0.0.1:{port}"
+                with tempfile.TemporaryFile() as log_file:
+                    process = start_server(workers, port, log_file)
+                    try:
+                        wait_ready(process, base_url, args.startup_timeout)
+                        for name in names:
+                            result = run_load(executor, base_url, users, name, args)
+                            result["workers"] = workers
+                            report["workloads"][name].append(result)
+                            print(f"✔ {name} com {workers} worker(s): {result['throughput']:.1f} req/s")
+                    except Exception:
+                        process.kill()
+                        log_file.seek(0)
+                        print(log_file.read().decode(errors="replace")[-4000:])
+                        raise
+                    finally:
+                        if process.poll() is None:
+                            report["drain"].append({"workers": workers, "seconds": stop_server(process, 60.0)})
+    finally:
+        if not args.keep:
+            asyncio.run(drop_database())
+
+    print_scaling(report)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"scaling-{stamp}.json")
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+    print(f"\n📄 Resultados gravados em {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# benchmarks/seed.py
+"""
+Massa de dados dos benchmarks: usuários, personagens e campanhas em volume
+configurável, inseridos em lote (insert_many) sobre o banco já inicializado.
+"""
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import List
+
+from urbansoccer_server.core import database
+from urbansoccer_server.core.passwords import hash_password
+from urbansoccer_server.models import player_model
+
+BENCH_PASSWORD = "benchmark-password"
+BENCH_EMAIL_DOMAIN = "bench.urbansoccer.com"
+
+
+@dataclass
+class VirtualUser:
+    """Usuário semeado, com os IDs usados pelas cargas de trabalho"""
+    email: str
+    user_id: str
+    active_campaign_ids: List[str] = field(default_factory=list)
+    token: str = ""
+
+
+async def seed(users: int, characters_per_user: int, campaigns_per_user: int, rng: random.Random) -> List[VirtualUser]:
+    """Insere a massa de dados e retorna os usuários virtuais"""
+    db = database.get_database()
+    players = await player_model.get_available_players()
+    player_ids = [player["_id"] for player in players]
+    if not player_ids:
+        raise RuntimeError("Nenhum player disponível: o banco precisa ser inicializado antes")
+
+    # O bcrypt é caro: todos os usuários compartilham o mesmo hash
+    password_hash = hash_password(BENCH_PASSWORD)
+    now = datetime.utcnow()
+    user_documents = [
+        {
+            "name": f"Bench {index}",
+            "email": f"user{index}@{BENCH_EMAIL_DOMAIN}",
+            "password": password_hash,
+            "createdAt": now,
+        }
+        for index in range(users)
+    ]
+    result = await db.users.insert_many(user_documents, ordered=False)
+    virtual_users = [
+        VirtualUser(email=document["email"], user_id=str(inserted_id))
+        for document, inserted_id in zip(user_documents, result.inserted_ids)
+    ]
+
+    character_documents = []
+    campaign_documents = []
+    for virtual_user in virtual_users:
+        for index in range(characters_per_user):
+            character_documents.append({
+                "characterName": f"Personagem {index}",
+                "playerId": rng.choice(player_ids),
+                "userId": virtual_user.user_id,
+                "createdAt": now,
+                "updatedAt": now,
+            })
+        # No máximo uma campanha ativa por (usuário, player); as demais ficam concluídas
+        active_players = set()
+        for index in range(campaigns_per_user):
+            player_id = rng.choice(player_ids)
+            status = "completed" if player_id in active_players else "active"
+            active_players.add(player_id)
+            campaign_documents.append({
+                "userId": virtual_user.user_id,
+                "playerId": player_id,
+                "campaignName": f"Campanha {index}",
+                "status": status,
+                "progress": {"level": 1, "score": 0, "currentMission": "Primeira Missão", "inventory": []},
+                "startDate": now,
+                "lastPlayedDate": now - timedelta(minutes=index),
+                "version": 0,
+            })
+
+    if character_documents:
+        await db.user_characters.insert_many(character_documents, ordered=False)
+    if campaign_documents:
+        result = await db.campaigns.insert_many(campaign_documents, ordered=False)
+        by_user = {virtual_user.user_id: virtual_user for virtual_user in virtual_users}
+        for document, inserted_id in zip(campaign_documents, result.inserted_ids):
+            if document["status"] == "active":
+                by_user[document["userId"]].active_campaign_ids.append(str(inserted_id))
+
+    return virtual_users
@@ -0,0 +1,184 @@
+# scripts/index_audit.py
+"""
+Auditoria de índices: executa as consultas dos models contra um mongod local,
+captura os comandos enviados e roda explain() em cada um. Falha (exit 1) se
+alguma consulta com filtro fizer COLLSCAN ou precisar de SORT em memória.
+
+Uso (banco temporário, removido ao final):
+    MONGO_URI=mongodb://localhost:27017 python -m scripts.index_audit
+"""
+import argparse
+import asyncio
+import sys
+
+from bson import ObjectId
+from pymongo import monitoring
+
+from urbansoccer_server.core import database
+from urbansoccer_server.core.config import settings
+from urbansoccer_server.core.database_init import initialize_database
+
+# Comandos que aceitam explain
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+
+# Campos adicionados pelo driver que não fazem parte da consulta
+DRIVER_FIELDS = {"lsid", "txnNumber", "$db", "$clusterTime", "$readPreference", "readConcern", "writeConcern"}
+
+
+class CommandRecorder(monitoring.CommandListener):
+    """Guarda os comandos de leitura/escrita enviados ao servidor"""
+
+    def __init__(self):
+        self.commands = []
+
+    def started(self, event):
+        if event.command_name in EXPLAINABLE_COMMANDS:
+            command = {k: v for k, v in event.command.items() if k not in DRIVER_FIELDS}
+            self.commands.append((event.command_name, command))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def _query_filter(command_name: str, command: dict) -> dict:
+    if command_name == "find":
+        return command.get("filter") or {}
+    if command_name in ("count", "distinct"):
+        return command.get("query") or {}
+    if command_name == "findAndModify":
+        return command.get("query") or {}
+    if command_name in ("update", "delete"):
+        statements = command.get("updates") or command.get("deletes") or [{}]
+        return statements[0].get("q") or {}
+    if command_name == "aggregate":
+        pipeline = command.get("pipeline") or [{}]
+        return pipeline[0].get("$match") or {}
+    return {}
+
+
+def _winning_plan_stages(explain: dict):
+    """Percorre todos os estágios dos winningPlans do resultado do explain"""
+    stack = [explain]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == "winningPlan":
+                    yield from _plan_stages(value)
+                elif key != "rejectedPlans":
+                    stack.append(value)
+        elif isinstance(node, list):
+            stack.extend(node)
+
+
+def _plan_stages(plan):
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if "stage" in node:
+                yield node
+            stack.extend(v for v in node.values() if isinstance(v, (dict, list)))
+        elif isinstance(node, list):
+            stack.extend(node)
+
+
+async def _exercise_models():
+    """Chama as funções de leitura e escrita dos models com os dados de seed"""
+    from urbansoccer_server.models import campaign_model, player_model, user_character_model, user_model
+
+    admin = await user_model.get_user_by_email("admin@urbansoccer.com")
+    user_id = admin["_id"]
+    await user_model.get_user_by_id(user_id)
+    await user_model.get_all_users()
+    _users, next_cursor = await user_model.get_users_page(limit=1)
+    await user_model.get_users_page(limit=1, cursor=next_cursor)
+
+    players = await player_model.get_all_players()
+    player_id = players[0]["_id"]
+    # Um ID fora do catálogo força a consulta $in no banco
+    await player_model.get_players_by_ids([str(ObjectId())])
+
+    campaigns = await campaign_model.get_campaigns_by_user(user_id)
+    campaign_id = campaigns[0]["_id"]
+    await campaign_model.get_active_campaigns_by_user(user_id)
+    _campaigns, next_cursor = await campaign_model.get_campaigns_page(user_id, limit=2)
+    await campaign_model.get_campaigns_page(user_id, limit=2, cursor=next_cursor)
+    _campaigns, next_cursor = await campaign_model.get_campaigns_page(user_id, active_only=True, limit=2)
+    await campaign_model.get_campaigns_page(user_id, active_only=True, limit=2, cursor=next_cursor)
+    await campaign_model.get_campaigns_change_marker(user_id)
+    await campaign_model.get_campaigns_change_marker(user_id, active_only=True)
+    await campaign_model.get_campaign_by_user_and_id(user_id, campaign_id)
+    await campaign_model.check_user_has_active_campaign_with_player(user_id, player_id)
+    await campaign_model.get_campaigns_by_player(player_id)
+    await campaign_model.export_campaigns_by_player_cursor(user_id, player_id).to_list(length=None)
+    await campaign_model.get_campaign_with_details(campaign_id)
+    await campaign_model.apply_campaign_progress_delta(user_id, campaign_id, {"scoreIncrement": 1})
+    await campaign_model.update_campaign_progress(campaign_id, campaigns[0]["progress"])
+    await campaign_model.complete_campaign(user_id, campaign_id)
+
+    character = await user_character_model.create_user_character(
+        user_id, {"characterName": "Auditoria", "playerId": player_id}
+    )
+    await user_character_model.get_user_characters(user_id)
+    await user_character_model.get_user_characters_with_players(user_id)
+    await user_character_model.get_user_characters_with_players_page(user_id, limit=1, fields=["characterName"])
+    await user_character_model.get_characters_change_marker(user_id)
+    await user_character_model.get_user_character_by_id(character["_id"], user_id)
+    await user_character_model.update_user_character(character["_id"], user_id, {"characterName": "Auditoria 2"})
+    await user_character_model.delete_user_character(character["_id"], user_id)
+
+
+async def run_audit(keep_database: bool) -> int:
+    recorder = CommandRecorder()
+    database.connect(event_listeners=[recorder])
+    db = database.get_database()
+    problems = []
+    try:
+        if not await initialize_database():
+            print("✘ Não foi possível inicializar o banco de auditoria")
+            return 1
+        recorder.commands.clear()
+        await _exercise_models()
+
+        for command_name, command in recorder.commands:
+            query_filter = _query_filter(command_name, command)
+            collection = command.get(command_name)
+            explain = await db.command({"explain": command, "verbosity": "queryPlanner"})
+            command_problems = []
+            for stage in _winning_plan_stages(explain):
+                if stage["stage"] == "COLLSCAN" and query_filter:
+                    command_problems.append(f"COLLSCAN em {collection}: {command_name} {query_filter}")
+                elif stage["stage"] == "SORT":
+                    command_problems.append(f"SORT em memória em {collection}: {command_name} {query_filter}")
+            problems.extend(command_problems)
+            print(f"{'✘' if command_problems else '✔'} {command_name:<14} {collection:<16} {query_filter}")
+    finally:
+        if not keep_database:
+            try:
+                await database.get_client().drop_database(settings.MONGO_DB)
+            except Exception as e:
+                print(f"⚠️ Não foi possível remover o banco {settings.MONGO_DB}: {e}")
+        database.close()
+
+    for problem in problems:
+        print(f"✘ {problem}")
+    print(f"{len(recorder.commands)} comandos auditados, {len(problems)} problemas")
+    return 1 if problems else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="urbansoccer_index_audit", help="Banco temporário usado na auditoria")
+    parser.add_argument("--keep", action="store_true", help="Não remove o banco ao final")
+    args = parser.parse_args()
+
+    settings.MONGO_DB = args.db
+    sys.exit(asyncio.run(run_audit(args.keep)))
+
+
+if __name__ == "__main__":
+    main()
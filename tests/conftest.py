@@ -0,0 +1,55 @@
+# tests/conftest.py
+"""
+Fixtures da suíte: cada teste roda com o engine em memória e, quando MONGO_URI
+está definida no ambiente, também contra o MongoDB real (em um banco temporário
+removido ao final). Assim os mesmos testes verificam que o engine em memória se
+comporta como o MongoDB nas operações usadas pelos models.
+
+    pytest
+    MONGO_URI=mongodb://localhost:27017 pytest
+"""
+import os
+import uuid
+
+import pytest
+
+# O MongoDB real só entra quando configurado pelo ambiente (antes dos defaults abaixo)
+ENGINES = ["memory", "mongo"] if os.environ.get("MONGO_URI") else ["memory"]
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGO_DB", "urbansoccer_test")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+from urbansoccer_server.core import database  # noqa: E402
+from urbansoccer_server.core.config import settings  # noqa: E402
+from urbansoccer_server.core.indexes import ensure_indexes  # noqa: E402
+from urbansoccer_server.core.principal_cache import principal_cache  # noqa: E402
+from urbansoccer_server.models.player_catalog import player_catalog  # noqa: E402
+from urbansoccer_server.models.progress_buffer import progress_buffer  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(params=ENGINES)
+async def db(request, monkeypatch):
+    """Banco vazio com os índices da aplicação, no engine do parâmetro"""
+    monkeypatch.setattr(settings, "DATABASE_ENGINE", request.param)
+    monkeypatch.setattr(settings, "MONGO_DB", f"urbansoccer_test_{uuid.uuid4().hex[:12]}")
+    # Singletons dos models começam limpos (e com locks do event loop deste teste)
+    player_catalog.__init__()
+    progress_buffer.__init__()
+    principal_cache.clear()
+
+    database.connect()
+    try:
+        db = database.get_database()
+        await ensure_indexes(db)
+        yield db
+    finally:
+        await progress_buffer.stop()
+        await database.get_client().drop_database(settings.MONGO_DB)
+        database.close()
@@ -0,0 +1,177 @@
+# tests/test_memory_engine.py
+"""
+Operações de collection usadas pelos models, verificadas no engine em memória
+(e no MongoDB real quando MONGO_URI está definida): as duas execuções devem
+dar os mesmos resultados.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from pymongo import ASCENDING, IndexModel, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_insert_and_find_with_operators(db):
+    things = db["things"]
+    await things.insert_many([
+        {"name": "a", "score": 1, "tags": ["x"]},
+        {"name": "b", "score": 5, "tags": ["x", "y"]},
+        {"name": "c", "score": 10},
+    ])
+
+    names = lambda docs: sorted(doc["name"] for doc in docs)
+    assert names(await things.find({"score": {"$gte": 5}}).to_list(length=None)) == ["b", "c"]
+    assert names(await things.find({"score": {"$in": [1, 10]}}).to_list(length=None)) == ["a", "c"]
+    assert names(await things.find({"tags": "y"}).to_list(length=None)) == ["b"]
+    assert names(await things.find({"tags": {"$exists": False}}).to_list(length=None)) == ["c"]
+    assert names(await things.find({"$or": [{"name": "a"}, {"score": {"$gt": 9}}]}).to_list(length=None)) == ["a", "c"]
+    assert await things.count_documents({"score": {"$ne": 5}}) == 2
+
+
+async def test_sort_skip_limit_and_projection(db):
+    things = db["things"]
+    await things.insert_many([{"name": name, "score": score, "secret": 1} for name, score in
+                              [("a", 3), ("b", 1), ("c", 2), ("d", 2)]])
+
+    docs = await things.find({}, {"secret": 0}).sort([("score", -1), ("name", 1)]).skip(1).limit(2).to_list(length=None)
+    assert [doc["name"] for doc in docs] == ["c", "d"]
+    assert all("secret" not in doc and "_id" in doc for doc in docs)
+
+    only_name = await things.find_one({"name": "a"}, {"name": 1, "_id": 0})
+    assert only_name == {"name": "a"}
+
+
+async def test_async_iteration_over_cursor(db):
+    things = db["things"]
+    ids = (await things.insert_many([{"n": n} for n in range(5)])).inserted_ids
+
+    seen = [doc["n"] async for doc in things.find({"_id": {"$in": ids}}).sort("n", 1)]
+    assert seen == [0, 1, 2, 3, 4]
+
+
+async def test_update_operators(db):
+    things = db["things"]
+    result = await things.insert_one({"progress": {"score": 1, "inventory": ["a", "b"]}})
+    query = {"_id": result.inserted_id}
+
+    await things.update_one(query, {
+        "$inc": {"progress.score": 4, "version": 1},
+        "$set": {"progress.level": 2},
+        "$addToSet": {"progress.inventory": {"$each": ["b", "c"]}},
+    })
+    await things.update_one(query, {"$pull": {"progress.inventory": {"$in": ["a"]}}})
+    doc = await things.find_one(query)
+    assert doc["progress"] == {"score": 5, "inventory": ["b", "c"], "level": 2}
+    assert doc["version"] == 1
+
+    updated = await things.update_many({}, {"$unset": {"version": ""}})
+    assert updated.modified_count == 1
+    assert "version" not in await things.find_one(query)
+
+
+async def test_pipeline_update(db):
+    things = db["things"]
+    result = await things.insert_one({"progress": {"inventory": ["a", "b"]}})
+
+    kept = {"$filter": {"input": "$progress.inventory", "as": "item", "cond": {"$not": [{"$in": ["$$item", ["a"]]}]}}}
+    doc = await things.find_one_and_update(
+        {"_id": result.inserted_id},
+        [{"$set": {
+            "progress.inventory": {"$concatArrays": [kept, {"$literal": ["z"]}]},
+            "version": {"$add": [{"$ifNull": ["$version", 0]}, 1]},
+        }}],
+        return_document=ReturnDocument.AFTER,
+    )
+    assert doc["progress"]["inventory"] == ["b", "z"]
+    assert doc["version"] == 1
+
+
+async def test_find_one_and_update_upsert_and_return_document(db):
+    things = db["things"]
+    before = await things.find_one_and_update(
+        {"email": "a@b.c"}, {"$setOnInsert": {"name": "A"}}, upsert=True,
+    )
+    assert before is None
+
+    after = await things.find_one_and_update(
+        {"email": "a@b.c"}, {"$setOnInsert": {"name": "B"}}, upsert=True,
+        projection={"_id": 0}, return_document=ReturnDocument.AFTER,
+    )
+    assert after == {"email": "a@b.c", "name": "A"}
+
+
+async def test_unique_and_partial_unique_indexes(db):
+    things = db["things"]
+    await things.create_indexes([
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("userId", ASCENDING), ("playerId", ASCENDING)], unique=True,
+                   partialFilterExpression={"status": "active"}),
+    ])
+
+    await things.insert_one({"email": "a", "userId": "u", "playerId": "p", "status": "active"})
+    with pytest.raises(DuplicateKeyError):
+        await things.insert_one({"email": "a"})
+    # Fora do filtro parcial a combinação pode se repetir
+    await things.insert_one({"email": "b", "userId": "u", "playerId": "p", "status": "completed"})
+    with pytest.raises(DuplicateKeyError):
+        await things.insert_one({"email": "c", "userId": "u", "playerId": "p", "status": "active"})
+    with pytest.raises(DuplicateKeyError):
+        await things.update_one({"email": "b"}, {"$set": {"status": "active"}})
+
+    info = await things.index_information()
+    assert info["userId_1_playerId_1"]["partialFilterExpression"] == {"status": "active"}
+
+
+async def test_duplicate_key_error_reports_missing_fields_as_null(db):
+    await db["campaigns"].insert_one({"userId": "u", "status": "active"})
+    with pytest.raises(DuplicateKeyError) as error:
+        await db["campaigns"].insert_one({"userId": "u", "status": "active"})
+    assert error.value.details["keyValue"] == {"userId": "u", "playerId": None}
+
+
+async def test_bulk_write_unordered(db):
+    things = db["things"]
+    ids = (await things.insert_many([{"n": 1}, {"n": 2}])).inserted_ids
+
+    result = await things.bulk_write([
+        UpdateOne({"_id": ids[0]}, {"$inc": {"n": 10}}),
+        UpdateOne({"_id": ids[1]}, {"$set": {"n": 20}}),
+        UpdateOne({"_id": ObjectId()}, {"$set": {"n": 30}}),
+    ], ordered=False)
+    assert result.matched_count == 2
+    assert sorted(doc["n"] for doc in await things.find().to_list(length=None)) == [11, 20]
+
+
+async def test_aggregate_group_and_lookup(db):
+    now = datetime.utcnow().replace(microsecond=0)
+    user_id = (await db["users"].insert_one({"name": "U"})).inserted_id
+    await db["sessions"].insert_many([
+        {"userId": user_id, "status": "active", "lastPlayedDate": now - timedelta(hours=1)},
+        {"userId": user_id, "status": "active", "lastPlayedDate": now},
+        {"userId": user_id, "status": "completed", "lastPlayedDate": now - timedelta(days=1)},
+    ])
+
+    summary = await db["sessions"].aggregate([
+        {"$match": {"userId": user_id, "status": "active"}},
+        {"$group": {"_id": None, "count": {"$sum": 1}, "last": {"$max": "$lastPlayedDate"}}},
+    ]).to_list(length=1)
+    assert summary[0]["count"] == 2 and summary[0]["last"] == now
+
+    joined = await db["sessions"].aggregate([
+        {"$match": {"status": "completed"}},
+        {"$lookup": {"from": "users", "localField": "userId", "foreignField": "_id", "as": "user_details"}},
+        {"$project": {"status": 1, "user": {"$arrayElemAt": ["$user_details", 0]}}},
+    ]).to_list(length=1)
+    assert joined[0]["user"]["name"] == "U"
+
+
+async def test_delete_and_estimated_count(db):
+    things = db["things"]
+    await things.insert_many([{"n": n} for n in range(4)])
+
+    assert (await things.delete_one({"n": 0})).deleted_count == 1
+    assert (await things.delete_many({"n": {"$lt": 3}})).deleted_count == 2
+    assert await things.estimated_document_count() == 1
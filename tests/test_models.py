@@ -0,0 +1,344 @@
+# tests/test_models.py
+"""
+Caminhos de repositório usados pelas rotas (models/ e inicialização do banco),
+executados no engine em memória e, com MONGO_URI, no MongoDB real.
+"""
+import asyncio
+import base64
+from datetime import timedelta
+
+import pytest
+from bson import ObjectId, json_util
+from pydantic import ValidationError
+
+from urbansoccer_server.core.config import settings
+from urbansoccer_server.core.pagination import InvalidCursorError
+from urbansoccer_server.core.database_init import META_COLLECTION, SCHEMA_MARKER_ID, initialize_database
+from urbansoccer_server.models import campaign_model, player_model, user_character_model, user_model
+from urbansoccer_server.models import player_catalog as player_catalog_module
+from urbansoccer_server.models.loaders import player_loader_scope
+from urbansoccer_server.models import progress_buffer as progress_buffer_module
+from urbansoccer_server.models.progress_buffer import progress_buffer
+from urbansoccer_server.schemas.campaign_schema import CampaignUpdate
+
+pytestmark = pytest.mark.anyio
+
+
+async def _player(name: str = "Striker", **fields) -> dict:
+    return await player_model.create_player({"name": name, "rarity": "default", "isAvailable": True, **fields})
+
+
+async def test_user_lifecycle(db):
+    created = await user_model.create_user({"name": "Ana", "email": "ana@test.com", "password": "secret123"})
+    assert "password" not in created
+    assert await user_model.create_user({"name": "Outra", "email": "ana@test.com", "password": "x"}) is None
+
+    assert (await user_model.get_user_by_email("ana@test.com"))["password"] != "secret123"
+    assert "password" not in await user_model.get_user_by_id(created["_id"])
+    assert (await user_model.authenticate_user("ana@test.com", "secret123"))["_id"] == created["_id"]
+    assert await user_model.authenticate_user("ana@test.com", "wrong") is None
+
+    updated = await user_model.update_user(created["_id"], {"name": "Ana Maria"})
+    assert updated["name"] == "Ana Maria" and "password" not in updated
+    assert await user_model.delete_user(created["_id"])
+    assert await user_model.get_user_by_id(created["_id"]) is None
+
+
+async def test_users_page_follows_cursor(db):
+    await db["users"].insert_many([{"name": f"U{n}", "email": f"u{n}@test.com", "password": "x"} for n in range(5)])
+
+    first, cursor = await user_model.get_users_page(limit=2)
+    second, cursor = await user_model.get_users_page(limit=2, cursor=cursor)
+    third, cursor = await user_model.get_users_page(limit=2, cursor=cursor)
+    names = [user["name"] for user in first + second + third]
+    assert names == ["U0", "U1", "U2", "U3", "U4"] and cursor is None
+    assert all("password" not in user for user in first)
+
+    only_email, _ = await user_model.get_users_page(limit=1, fields=["email"])
+    assert set(only_email[0]) == {"_id", "email"}
+
+
+async def test_cursor_values_must_match_sort_field_types(db):
+    crafted = base64.urlsafe_b64encode(json_util.dumps([{"$gt": ""}, {"$oid": str(ObjectId())}]).encode()).decode()
+    with pytest.raises(InvalidCursorError):
+        await campaign_model.get_campaigns_page("user-1", cursor=crafted)
+    with pytest.raises(InvalidCursorError):
+        await user_model.get_users_page(cursor=base64.urlsafe_b64encode(b'["not-an-id"]').decode())
+
+
+async def test_player_catalog_reads_and_writes(db):
+    striker = await _player("Striker")
+    keeper = await _player("Keeper", rarity="unique")
+
+    assert {player["name"] for player in await player_model.get_available_players()} == {"Striker", "Keeper"}
+    assert [player["name"] for player in await player_model.get_players_by_rarity("unique")] == ["Keeper"]
+
+    await player_model.toggle_player_availability(keeper["_id"], False)
+    assert [player["name"] for player in await player_model.get_available_players()] == ["Striker"]
+
+    players = await player_model.get_players_by_ids([striker["_id"], keeper["_id"], "invalid"])
+    assert set(players) == {striker["_id"], keeper["_id"]}
+
+    assert await player_model.delete_player(striker["_id"])
+    assert await player_model.get_player_by_id(striker["_id"]) is None
+
+
+async def test_catalog_refresh_keeps_writes_made_while_loading(db, monkeypatch):
+    striker = await _player("Striker")
+    keeper = await _player("Keeper")
+    await player_model.get_available_players()
+
+    class SlowFind:
+        """Collection cuja leitura completa demora, deixando a recarga em andamento"""
+
+        def __getattr__(self, name):
+            return getattr(db["players"], name)
+
+        def find(self, *args, **kwargs):
+            cursor = db["players"].find(*args, **kwargs)
+
+            class Cursor:
+                async def to_list(self, length=None):
+                    docs = await cursor.to_list(length=length)
+                    await asyncio.sleep(0.05)
+                    return docs
+
+            return Cursor()
+
+    monkeypatch.setattr(player_catalog_module, "player_collection", SlowFind())
+    refresh = asyncio.ensure_future(player_catalog_module.player_catalog.refresh())
+    await asyncio.sleep(0.01)
+    await player_model.toggle_player_availability(keeper["_id"], False)
+    await player_model.delete_player(striker["_id"])
+    await refresh
+
+    assert await player_model.get_available_players() == []
+    assert await player_model.get_player_by_id(striker["_id"]) is None
+
+
+async def test_campaign_allows_one_active_campaign_per_player(db):
+    player = await _player()
+    campaign = await campaign_model.create_campaign("user-1", {"playerId": player["_id"], "campaignName": "C1"})
+
+    assert await campaign_model.create_campaign("user-1", {"playerId": player["_id"], "campaignName": "C2"}) is None
+    assert await campaign_model.check_user_has_active_campaign_with_player("user-1", player["_id"])
+
+    await campaign_model.complete_campaign("user-1", campaign["_id"])
+    assert await campaign_model.create_campaign("user-1", {"playerId": player["_id"], "campaignName": "C2"})
+
+
+async def test_campaign_progress_updates_and_version(db):
+    campaign = await campaign_model.create_campaign("user-1", {"playerId": "p1", "campaignName": "C1"})
+
+    updated = await campaign_model.update_campaign_progress(
+        campaign["_id"], {"level": 2, "score": 10, "currentMission": "M2", "inventory": ["a"]}, user_id="user-1"
+    )
+    assert updated["version"] == 1
+    assert await campaign_model.update_campaign_progress(campaign["_id"], {"level": 3}, user_id="user-2") is None
+
+    # Delta simples ($inc/$set/$addToSet) e delta que adiciona e remove itens (update em pipeline)
+    updated = await campaign_model.apply_campaign_progress_delta(
+        "user-1", campaign["_id"], {"scoreIncrement": 5, "levelIncrement": 1, "inventoryAdd": ["b"]}
+    )
+    assert updated["progress"]["score"] == 15 and updated["progress"]["level"] == 3
+    assert updated["progress"]["inventory"] == ["a", "b"]
+    updated = await campaign_model.apply_campaign_progress_delta(
+        "user-1", campaign["_id"], {"inventoryAdd": ["c", "b"], "inventoryRemove": ["a"], "currentMission": "M3"}
+    )
+    assert updated["progress"]["inventory"] == ["b", "c"]
+    assert updated["progress"]["currentMission"] == "M3"
+    assert updated["version"] == 3
+
+
+async def test_campaign_transitions(db):
+    campaign = await campaign_model.create_campaign("user-1", {"playerId": "p1", "campaignName": "C1"})
+
+    with pytest.raises(campaign_model.CampaignVersionConflict):
+        await campaign_model.abandon_campaign("user-1", campaign["_id"], expected_version=5)
+    assert await campaign_model.abandon_campaign("user-2", campaign["_id"]) is None
+
+    abandoned = await campaign_model.abandon_campaign("user-1", campaign["_id"], expected_version=0)
+    assert abandoned["status"] == "abandoned" and abandoned["version"] == 1
+    with pytest.raises(campaign_model.CampaignTransitionError):
+        await campaign_model.complete_campaign("user-1", campaign["_id"])
+
+
+async def test_transition_without_expected_version_never_conflicts(db, monkeypatch):
+    campaign = await campaign_model.create_campaign("user-1", {"playerId": "p1", "campaignName": "C1"})
+
+    # Simula a escrita condicional perdendo para uma alteração concorrente
+    async def missed_update(*_args, **_kwargs):
+        return None
+
+    monkeypatch.setattr(db["campaigns"].__class__, "find_one_and_update", missed_update)
+    assert await campaign_model.complete_campaign("user-1", campaign["_id"]) is None
+    with pytest.raises(campaign_model.CampaignVersionConflict):
+        await campaign_model.complete_campaign("user-1", campaign["_id"], expected_version=0)
+
+
+def test_campaign_update_does_not_change_status():
+    # Status só muda pelas transições (/complete, /abandon), nunca pelo PATCH genérico
+    with pytest.raises(ValidationError):
+        CampaignUpdate.model_validate({"status": "active"})
+    assert CampaignUpdate.model_validate({"campaignName": "C2"}).model_dump(exclude_unset=True) == {"campaignName": "C2"}
+
+
+async def test_campaign_listings_and_export_are_scoped_to_user(db):
+    for name in ("A", "B", "C"):
+        await campaign_model.create_campaign("user-1", {"playerId": f"p{name}", "campaignName": name})
+    other = await campaign_model.create_campaign("user-2", {"playerId": "pA", "campaignName": "X"})
+    await campaign_model.complete_campaign("user-2", other["_id"])
+
+    page, cursor = await campaign_model.get_campaigns_page("user-1", limit=2)
+    rest, cursor = await campaign_model.get_campaigns_page("user-1", limit=2, cursor=cursor)
+    assert len(page + rest) == 3 and cursor is None
+    assert await campaign_model.get_campaigns_page("user-2", active_only=True) == ([], None)
+
+    exported = [
+        campaign_model.prepare_exported_campaign(campaign)
+        async for campaign in campaign_model.export_campaigns_by_player_cursor("user-1", "pA")
+    ]
+    assert [campaign["campaignName"] for campaign in exported] == ["A"]
+
+    marker = await campaign_model.get_campaigns_change_marker("user-1")
+    assert marker.startswith("3:")
+    await campaign_model.create_campaign("user-1", {"playerId": "pD", "campaignName": "D"})
+    assert await campaign_model.get_campaigns_change_marker("user-1") != marker
+
+    # Escrita que não muda quantidade nem lastPlayedDate ainda muda o marcador (version)
+    marker = await campaign_model.get_campaigns_change_marker("user-1")
+    await db["campaigns"].update_one({"campaignName": "D"}, {"$set": {"campaignName": "E"}, "$inc": {"version": 1}})
+    assert await campaign_model.get_campaigns_change_marker("user-1") != marker
+
+
+async def test_buffered_progress_is_flushed(db, monkeypatch):
+    monkeypatch.setattr(settings, "PROGRESS_WRITE_BEHIND", True)
+    campaign = await campaign_model.create_campaign("user-1", {"playerId": "p1", "campaignName": "C1"})
+
+    merged = await campaign_model.buffer_campaign_progress("user-1", campaign["_id"], {"level": 4})
+    assert merged["progress"] == {"level": 4}
+    assert await campaign_model.buffer_campaign_progress("user-2", campaign["_id"], {"level": 9}) is None
+    # A leitura já enxerga o progresso pendente; o banco só depois do flush
+    assert (await campaign_model.get_campaign_by_id(campaign["_id"]))["progress"] == {"level": 4}
+
+    assert await progress_buffer.flush() == 1
+    stored = await db["campaigns"].find_one({"userId": "user-1"})
+    assert stored["progress"] == {"level": 4} and stored["version"] == 1
+
+
+async def test_buffered_progress_does_not_touch_closed_campaigns(db, monkeypatch):
+    monkeypatch.setattr(settings, "PROGRESS_WRITE_BEHIND", True)
+    campaign = await campaign_model.create_campaign("user-1", {"playerId": "p1", "campaignName": "C1"})
+    await campaign_model.buffer_campaign_progress("user-1", campaign["_id"], {"level": 4})
+
+    # Encerrada por fora do buffer (ex: outro worker): o flush não grava mais nada
+    await db["campaigns"].update_one({"userId": "user-1"}, {"$set": {"status": "completed"}})
+    await progress_buffer.flush()
+    stored = await db["campaigns"].find_one({"userId": "user-1"})
+    assert stored["progress"]["level"] == 1 and stored["version"] == 0
+
+
+async def test_buffered_progress_rejects_closed_campaign_and_newer_writes(db, monkeypatch):
+    monkeypatch.setattr(settings, "PROGRESS_WRITE_BEHIND", True)
+    closed = await campaign_model.create_campaign("user-1", {"playerId": "p1", "campaignName": "C1"})
+    await campaign_model.complete_campaign("user-1", closed["_id"])
+    with pytest.raises(campaign_model.CampaignNotActiveError):
+        await campaign_model.buffer_campaign_progress("user-1", closed["_id"], {"level": 4})
+
+    campaign = await campaign_model.create_campaign("user-1", {"playerId": "p2", "campaignName": "C2"})
+    pending = await campaign_model.buffer_campaign_progress("user-1", campaign["_id"], {"level": 4})
+    # Escrita mais nova feita por fora do buffer: o flush atrasado não a sobrescreve
+    newer = pending["lastPlayedDate"] + timedelta(seconds=1)
+    await db["campaigns"].update_one({"campaignName": "C2"}, {"$set": {"progress": {"level": 7}, "lastPlayedDate": newer}})
+    await progress_buffer.flush()
+    assert (await db["campaigns"].find_one({"campaignName": "C2"}))["progress"] == {"level": 7}
+
+
+async def test_flush_loop_enforces_max_staleness(db, monkeypatch):
+    monkeypatch.setattr(settings, "PROGRESS_WRITE_BEHIND", True)
+    monkeypatch.setattr(settings, "PROGRESS_FLUSH_INTERVAL_MS", 60000)
+    monkeypatch.setattr(settings, "PROGRESS_MAX_STALENESS_MS", 50)
+    campaign = await campaign_model.create_campaign("user-1", {"playerId": "p1", "campaignName": "C1"})
+
+    progress_buffer.start()
+    await campaign_model.buffer_campaign_progress("user-1", campaign["_id"], {"level": 4})
+    # Sem novos envios, o progresso é gravado pelo atraso máximo, não pelo intervalo
+    await asyncio.sleep(0.3)
+    assert (await db["campaigns"].find_one({"userId": "user-1"}))["progress"] == {"level": 4}
+
+
+async def test_status_change_waits_for_in_flight_flush(db, monkeypatch):
+    monkeypatch.setattr(settings, "PROGRESS_WRITE_BEHIND", True)
+    campaign = await campaign_model.create_campaign("user-1", {"playerId": "p1", "campaignName": "C1"})
+    await campaign_model.buffer_campaign_progress("user-1", campaign["_id"], {"level": 4})
+
+    class SlowBulkWrite:
+        """Collection cujo bulk_write demora, deixando o lote em andamento"""
+
+        def __getattr__(self, name):
+            return getattr(db["campaigns"], name)
+
+        async def bulk_write(self, *args, **kwargs):
+            await asyncio.sleep(0.05)
+            return await db["campaigns"].bulk_write(*args, **kwargs)
+
+    monkeypatch.setattr(progress_buffer_module, "campaign_collection", SlowBulkWrite())
+
+    # O lote sai do buffer e fica em andamento enquanto a campanha é completada
+    flush = asyncio.ensure_future(progress_buffer.flush())
+    await asyncio.sleep(0)
+    completed = await campaign_model.complete_campaign("user-1", campaign["_id"])
+    assert await flush == 1
+
+    stored = await db["campaigns"].find_one({"userId": "user-1"})
+    assert stored["status"] == "completed" and stored["progress"] == {"level": 4}
+    assert completed["progress"] == {"level": 4} and completed["version"] == stored["version"] == 2
+
+
+async def test_user_characters_with_players(db):
+    striker = await _player("Striker")
+    first = await user_character_model.create_user_character("user-1", {"characterName": "Ace", "playerId": striker["_id"]})
+    second = await user_character_model.create_user_character("user-1", {"characterName": "Bolt", "playerId": striker["_id"]})
+    assert await user_character_model.create_user_character("user-1", {"characterName": "Ace", "playerId": striker["_id"]}) is None
+    assert await user_character_model.create_user_character("user-2", {"characterName": "Ace", "playerId": striker["_id"]})
+
+    with player_loader_scope():
+        page, cursor = await user_character_model.get_user_characters_with_players_page("user-1", limit=10)
+    assert [character["characterName"] for character in page] == ["Ace", "Bolt"] and cursor is None
+    assert all(character["player"]["name"] == "Striker" for character in page)
+
+    assert await user_character_model.update_user_character(second["_id"], "user-1", {"characterName": "Ace"}) is None
+    renamed = await user_character_model.update_user_character(second["_id"], "user-1", {"characterName": "Comet"})
+    assert renamed["characterName"] == "Comet"
+
+    detailed = await user_character_model.get_user_character_with_player(first["_id"], "user-1")
+    assert detailed["player"]["_id"] == striker["_id"]
+    assert await user_character_model.delete_user_character(first["_id"], "user-2") is False
+    assert await user_character_model.delete_user_character(first["_id"], "user-1")
+
+
+async def test_initialize_database_seeds_once(db):
+    assert await initialize_database()
+    counts = [await db[name].count_documents({}) for name in ("players", "users", "campaigns")]
+    assert all(counts)
+
+    assert await initialize_database()
+    assert [await db[name].count_documents({}) for name in ("players", "users", "campaigns")] == counts
+
+
+async def test_initialize_database_skips_unique_index_with_duplicates(db):
+    characters = db["user_characters"]
+    await characters.drop_index("userId_1_characterName_1")
+    await characters.insert_many([{"userId": "u", "characterName": "Ace"}, {"userId": "u", "characterName": "Ace"}])
+
+    assert await initialize_database()
+    marker = await db[META_COLLECTION].find_one({"_id": SCHEMA_MARKER_ID})
+    assert marker["skippedIndexes"] == ["user_characters.userId_1_characterName_1"]
+    assert "userId_1_characterName_1" not in await characters.index_information()
+    assert await db["players"].count_documents({}) > 0
+
+    # Corrigidos os dados, a próxima inicialização cria o índice pendente
+    await characters.delete_many({})
+    assert await initialize_database()
+    assert "userId_1_characterName_1" in await characters.index_information()
+    assert (await db[META_COLLECTION].find_one({"_id": SCHEMA_MARKER_ID}))["skippedIndexes"] == []
@@ -0,0 +1,59 @@
+# tests/test_serve.py
+"""Número padrão de workers (cota de CPU do cgroup) e configurações exigidas com vários workers"""
+from urbansoccer_server import serve
+
+
+def _write(root, path: str, content: str) -> None:
+    target = root / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(content)
+
+
+def test_cgroup_v2_quota_rounds_up(tmp_path):
+    _write(tmp_path, "cpu.max", "150000 100000\n")
+    assert serve.cgroup_cpu_limit(str(tmp_path)) == 2
+
+
+def test_cgroup_v2_without_quota(tmp_path):
+    _write(tmp_path, "cpu.max", "max 100000\n")
+    assert serve.cgroup_cpu_limit(str(tmp_path)) is None
+
+
+def test_cgroup_v1_quota(tmp_path):
+    _write(tmp_path, "cpu/cpu.cfs_quota_us", "50000")
+    _write(tmp_path, "cpu/cpu.cfs_period_us", "100000")
+    assert serve.cgroup_cpu_limit(str(tmp_path)) == 1
+
+    _write(tmp_path, "cpu/cpu.cfs_quota_us", "-1")
+    assert serve.cgroup_cpu_limit(str(tmp_path)) is None
+
+
+def test_without_cgroup_files(tmp_path):
+    assert serve.cgroup_cpu_limit(str(tmp_path)) is None
+
+
+def test_default_workers_respects_quota(monkeypatch):
+    monkeypatch.setattr(serve.settings, "SERVER_WORKERS", None)
+    monkeypatch.setattr(serve.os, "sched_getaffinity", lambda _pid: set(range(8)), raising=False)
+    monkeypatch.setattr(serve, "cgroup_cpu_limit", lambda: 2)
+    assert serve.default_workers() == 2
+
+    monkeypatch.setattr(serve.settings, "SERVER_WORKERS", 3)
+    assert serve.default_workers() == 3
+
+
+def test_single_worker_accepts_process_local_settings(monkeypatch):
+    monkeypatch.setattr(serve.settings, "PLAYER_CATALOG_REFRESH_SECONDS", None)
+    monkeypatch.setattr(serve.settings, "PROGRESS_WRITE_BEHIND", True)
+    assert serve.multi_worker_errors(1) == []
+
+
+def test_multiple_workers_require_catalog_sync_and_no_write_behind(monkeypatch):
+    monkeypatch.setattr(serve.settings, "PLAYER_CATALOG_CHANGE_STREAM", False)
+    monkeypatch.setattr(serve.settings, "PLAYER_CATALOG_REFRESH_SECONDS", None)
+    monkeypatch.setattr(serve.settings, "PROGRESS_WRITE_BEHIND", True)
+    assert len(serve.multi_worker_errors(2)) == 2
+
+    monkeypatch.setattr(serve.settings, "PLAYER_CATALOG_REFRESH_SECONDS", 30.0)
+    monkeypatch.setattr(serve.settings, "PROGRESS_WRITE_BEHIND", False)
+    assert serve.multi_worker_errors(2) == []
@@ -0,0 +1,35 @@
+# tests/test_single_flight.py
+"""Coalescência de leituras: a execução compartilhada não herda o prazo de quem a iniciou"""
+import asyncio
+
+import pytest
+from pymongo.errors import ExecutionTimeout
+
+from urbansoccer_server.core import deadline
+from urbansoccer_server.core.single_flight import single_flight
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_shared_read_ignores_leader_deadline():
+    calls = []
+
+    @single_flight
+    async def read(key: str) -> dict:
+        calls.append(deadline.remaining())
+        await asyncio.sleep(0.05)
+        return {"key": key}
+
+    async def with_budget(seconds):
+        with deadline.budget(seconds):
+            return await read("a")
+
+    # O primeiro chamador tem prazo de 1 ms; os demais continuam recebendo o resultado
+    leader = asyncio.ensure_future(with_budget(0.001))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(with_budget(1))
+
+    with pytest.raises(ExecutionTimeout):
+        await leader
+    assert await follower == {"key": "a"}
+    assert calls == [None]
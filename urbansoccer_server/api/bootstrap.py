@@ -0,0 +1,33 @@
+# urbansoccer_server/api/bootstrap.py
+import asyncio
+from fastapi import APIRouter, status, Depends
+
+from urbansoccer_server.models import campaign_model, player_model, user_character_model
+from urbansoccer_server.schemas.bootstrap_schema import Bootstrap
+from urbansoccer_server.core.auth import get_current_user
+from urbansoccer_server.core.serialization import fast_response
+
+router = APIRouter(prefix="/bootstrap", tags=["Bootstrap"])
+
+@router.get("/", status_code=status.HTTP_200_OK, response_model=Bootstrap)
+async def get_bootstrap(current_user: dict = Depends(get_current_user)):
+    """
+    Retorna perfil, personagens, campanhas ativas e players disponíveis em uma
+    única chamada: autentica uma vez e executa as consultas em paralelo.
+    As listas trazem a primeira página; os cursores continuam nas rotas próprias.
+    """
+    user_id = current_user["_id"]
+    (characters, characters_cursor), (campaigns, campaigns_cursor), players = await asyncio.gather(
+        user_character_model.get_user_characters_with_players_page(user_id),
+        campaign_model.get_campaigns_page(user_id, active_only=True),
+        player_model.get_available_players()
+    )
+    
+    return fast_response(Bootstrap, {
+        "user": current_user,
+        "characters": characters,
+        "charactersNextCursor": characters_cursor,
+        "activeCampaigns": campaigns,
+        "activeCampaignsNextCursor": campaigns_cursor,
+        "availablePlayers": players
+    })
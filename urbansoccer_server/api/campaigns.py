@@ -1,15 +1,30 @@
 # urbansoccer_server/api/campaigns.py
-from fastapi import APIRouter, HTTPException, status, Depends
+import json
+import logging
+from typing import Optional
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from fastapi.responses import StreamingResponse
+from pymongo.errors import PyMongoError
 from urbansoccer_server.models import campaign_model, player_model
+from urbansoccer_server.models.progress_buffer import progress_buffer
 from urbansoccer_server.schemas.campaign_schema import (
     CampaignCreate, 
     CampaignPublic, 
     CampaignList, 
     CampaignUpdate,
     CampaignProgress,
+    CampaignProgressDelta,
     CampaignWithDetails
 )
-from urbansoccer_server.core.auth import get_current_user
+from urbansoccer_server.core import deadline
+from urbansoccer_server.core.auth import get_current_user, get_websocket_user, websocket_accept_subprotocol
+from urbansoccer_server.core.pagination import parse_fields, paginated_response
+from urbansoccer_server.core.etag import make_etag, not_modified, with_etag
+from urbansoccer_server.core.serialization import fast_response
+from urbansoccer_server.core.streaming import ndjson_response
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/campaigns", tags=["Campaigns"])
 
@@ -33,32 +48,74 @@ async def create_new_campaign(
             detail="Personagem não está disponível para seleção"
         )
     
-    # Verifica se o usuário já tem uma campanha ativa com este personagem
-    has_active_campaign = await campaign_model.check_user_has_active_campaign_with_player(
-        current_user["_id"], campaign.playerId
-    )
+    campaign_dict = campaign.model_dump()
+    created_campaign = await campaign_model.create_campaign(current_user["_id"], campaign_dict)
     
-    if has_active_campaign:
+    # O índice único parcial garante uma só campanha ativa por personagem
+    if created_campaign is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Você já possui uma campanha ativa com este personagem"
         )
-    
-    campaign_dict = campaign.model_dump()
-    created_campaign = await campaign_model.create_campaign(current_user["_id"], campaign_dict)
     return created_campaign
 
 @router.get("/", status_code=status.HTTP_200_OK, response_model=CampaignList)
-async def get_user_campaigns(current_user: dict = Depends(get_current_user)):
-    """Retorna todas as campanhas do usuário autenticado"""
-    campaigns = await campaign_model.get_campaigns_by_user(current_user["_id"])
-    return {"campaigns": campaigns}
+async def get_user_campaigns(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, description="Itens por página (máximo definido em MAX_PAGE_SIZE)"),
+    cursor: Optional[str] = Query(None, description="Token nextCursor da página anterior"),
+    fields: Optional[str] = Query(None, description="Campos a retornar, separados por vírgula"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Retorna as campanhas do usuário autenticado, paginadas por cursor"""
+    selected_fields = parse_fields(fields, campaign_model.CAMPAIGN_FIELDS)
+    marker = await campaign_model.get_campaigns_change_marker(current_user["_id"], active_only=False)
+    etag = make_etag("campaigns", False, current_user["_id"], marker, request.url.query)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    campaigns, next_cursor = await campaign_model.get_campaigns_page(
+        current_user["_id"], limit=limit, cursor=cursor, fields=selected_fields
+    )
+    return with_etag(
+        paginated_response(CampaignList, "campaigns", campaigns, next_cursor, selected_fields), etag
+    )
 
 @router.get("/active", status_code=status.HTTP_200_OK, response_model=CampaignList)
-async def get_active_campaigns(current_user: dict = Depends(get_current_user)):
-    """Retorna campanhas ativas do usuário autenticado"""
-    campaigns = await campaign_model.get_active_campaigns_by_user(current_user["_id"])
-    return {"campaigns": campaigns}
+async def get_active_campaigns(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, description="Itens por página (máximo definido em MAX_PAGE_SIZE)"),
+    cursor: Optional[str] = Query(None, description="Token nextCursor da página anterior"),
+    fields: Optional[str] = Query(None, description="Campos a retornar, separados por vírgula"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Retorna campanhas ativas do usuário autenticado, paginadas por cursor"""
+    selected_fields = parse_fields(fields, campaign_model.CAMPAIGN_FIELDS)
+    marker = await campaign_model.get_campaigns_change_marker(current_user["_id"], active_only=True)
+    etag = make_etag("campaigns", True, current_user["_id"], marker, request.url.query)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    campaigns, next_cursor = await campaign_model.get_campaigns_page(
+        current_user["_id"], active_only=True, limit=limit, cursor=cursor, fields=selected_fields
+    )
+    return with_etag(
+        paginated_response(CampaignList, "campaigns", campaigns, next_cursor, selected_fields), etag
+    )
+
+@router.get("/export", status_code=status.HTTP_200_OK, response_class=StreamingResponse)
+async def export_campaigns_by_player(
+    player_id: str = Query(..., alias="playerId", description="ID do personagem"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Exporta em NDJSON (streaming) as campanhas do usuário atual que usam um personagem"""
+    return ndjson_response(
+        campaign_model.export_campaigns_by_player_cursor(current_user["_id"], player_id),
+        transform=campaign_model.prepare_exported_campaign,
+        filename="campaigns.ndjson"
+    )
 
 @router.get("/{campaign_id}", status_code=status.HTTP_200_OK, response_model=CampaignPublic)
 async def get_campaign(
@@ -72,7 +129,7 @@ async def get_campaign(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Campanha não encontrada"
         )
-    return campaign
+    return fast_response(CampaignPublic, campaign)
 
 @router.get("/{campaign_id}/details", status_code=status.HTTP_200_OK, response_model=CampaignWithDetails)
 async def get_campaign_with_details(
@@ -130,6 +187,24 @@ async def update_campaign_progress(
     current_user: dict = Depends(get_current_user)
 ):
     """Atualiza especificamente o progresso da campanha"""
+    if progress_buffer.enabled:
+        # Write-behind: o progresso é gravado em lote pelo buffer
+        try:
+            buffered_campaign = await campaign_model.buffer_campaign_progress(
+                current_user["_id"], campaign_id, progress.model_dump()
+            )
+        except campaign_model.CampaignNotActiveError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        if not buffered_campaign:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Campanha não encontrada"
+            )
+        return buffered_campaign
+    
     # Verifica se a campanha existe e pertence ao usuário
     existing_campaign = await campaign_model.get_campaign_by_user_and_id(
         current_user["_id"], campaign_id
@@ -144,55 +219,163 @@ async def update_campaign_progress(
     updated_campaign = await campaign_model.update_campaign_progress(campaign_id, progress_dict)
     return updated_campaign
 
-@router.patch("/{campaign_id}/abandon", status_code=status.HTTP_200_OK, response_model=CampaignPublic)
-async def abandon_campaign(
+@router.patch("/{campaign_id}/progress/delta", status_code=status.HTTP_200_OK, response_model=CampaignPublic)
+async def apply_campaign_progress_delta(
     campaign_id: str, 
+    delta: CampaignProgressDelta, 
     current_user: dict = Depends(get_current_user)
 ):
-    """Marca campanha como abandonada"""
-    # Verifica se a campanha existe e pertence ao usuário
-    existing_campaign = await campaign_model.get_campaign_by_user_and_id(
-        current_user["_id"], campaign_id
+    """Aplica alterações incrementais no progresso (score, nível, missão e inventário)"""
+    delta_dict = delta.model_dump(exclude_unset=True)
+    if not delta_dict:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Nenhum dado para atualizar"
+        )
+    
+    updated_campaign = await campaign_model.apply_campaign_progress_delta(
+        current_user["_id"], campaign_id, delta_dict
     )
-    if not existing_campaign:
+    if not updated_campaign:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Campanha não encontrada"
         )
+    return updated_campaign
+
+async def _apply_progress_message(user_id: str, campaign_id: str, message: dict) -> Optional[dict]:
+    """Valida e grava uma mensagem do canal de progresso; retorna a campanha atualizada"""
+    if message.get("type") == "delta":
+        delta_dict = CampaignProgressDelta.model_validate(message.get("delta") or {}).model_dump(exclude_unset=True)
+        if not delta_dict:
+            raise ValueError("Nenhum dado para atualizar")
+        return await campaign_model.apply_campaign_progress_delta(user_id, campaign_id, delta_dict)
+    
+    if message.get("type") == "progress":
+        progress_dict = CampaignProgress.model_validate(message.get("progress") or {}).model_dump()
+        if progress_buffer.enabled:
+            return await campaign_model.buffer_campaign_progress(user_id, campaign_id, progress_dict)
+        # A posse já foi verificada na conexão; o filtro por userId mantém a garantia
+        return await campaign_model.update_campaign_progress(campaign_id, progress_dict, user_id=user_id)
     
-    if existing_campaign["status"] != "active":
+    raise ValueError("Tipo de mensagem deve ser 'progress' ou 'delta'")
+
+@router.websocket("/{campaign_id}/progress/ws")
+async def campaign_progress_channel(websocket: WebSocket, campaign_id: str):
+    """
+    Canal de progresso ao vivo. Autentica (header Authorization ou
+    subprotocolo ["bearer", <token>]) e verifica a posse da campanha uma única
+    vez por conexão; depois cada mensagem custa uma escrita no banco.
+    
+    Mensagens: {"type": "progress", "seq": 1, "progress": {...}} ou
+    {"type": "delta", "seq": 2, "delta": {...}}. Respostas:
+    {"type": "ack", "seq", "version", "progress"} ou {"type": "error", "seq", "detail"}.
+    """
+    await websocket.accept(subprotocol=websocket_accept_subprotocol(websocket))
+    
+    # Sem middleware HTTP: o prazo vale para a abertura e para cada mensagem
+    with deadline.budget(deadline.default_budget()):
+        current_user = await get_websocket_user(websocket)
+        if current_user is None:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Não foi possível validar as credenciais")
+            return
+        
+        user_id = current_user["_id"]
+        campaign = await campaign_model.get_campaign_by_user_and_id(user_id, campaign_id)
+    if not campaign:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Campanha não encontrada")
+        return
+    
+    try:
+        while True:
+            raw_message = await websocket.receive_text()
+            seq = None
+            try:
+                message = json.loads(raw_message)
+                if not isinstance(message, dict):
+                    raise ValueError("Mensagem deve ser um objeto JSON")
+                seq = message.get("seq")
+                with deadline.budget(deadline.default_budget()):
+                    updated_campaign = await _apply_progress_message(user_id, campaign_id, message)
+            except PyMongoError as e:
+                if not e.timeout:
+                    raise
+                await websocket.send_json({"type": "error", "seq": seq, "detail": "Tempo limite excedido"})
+                continue
+            except ValidationError as e:
+                await websocket.send_json({"type": "error", "seq": seq, "detail": e.errors(include_url=False, include_context=False)})
+                continue
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "seq": seq, "detail": str(e)})
+                continue
+            
+            if not updated_campaign:
+                # Campanha removida durante a conexão
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Campanha não encontrada")
+                return
+            
+            await websocket.send_json({
+                "type": "ack",
+                "seq": seq,
+                "version": updated_campaign.get("version", 0),
+                "progress": updated_campaign.get("progress")
+            })
+    except WebSocketDisconnect:
+        logger.debug(f"🔌 Canal de progresso da campanha {campaign_id} encerrado")
+
+async def _transition_campaign(
+    user_id: str,
+    campaign_id: str,
+    target_status: str,
+    expected_version: Optional[int],
+    invalid_status_detail: str
+) -> dict:
+    """Executa a transição de status e traduz os erros do model para HTTP"""
+    try:
+        campaign = await campaign_model.transition_campaign_status(
+            user_id, campaign_id, target_status, expected_version
+        )
+    except campaign_model.CampaignTransitionError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Apenas campanhas ativas podem ser abandonadas"
+            detail=invalid_status_detail
+        )
+    except campaign_model.CampaignVersionConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"A campanha foi alterada por outra requisição (versão atual: {e.current_version})"
         )
     
-    updated_campaign = await campaign_model.abandon_campaign(campaign_id)
-    return updated_campaign
+    if not campaign:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Campanha não encontrada"
+        )
+    return campaign
+
+@router.patch("/{campaign_id}/abandon", status_code=status.HTTP_200_OK, response_model=CampaignPublic)
+async def abandon_campaign(
+    campaign_id: str, 
+    expected_version: Optional[int] = Query(None, alias="expectedVersion"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Marca campanha como abandonada"""
+    return await _transition_campaign(
+        current_user["_id"], campaign_id, "abandoned", expected_version,
+        "Apenas campanhas ativas podem ser abandonadas"
+    )
 
 @router.patch("/{campaign_id}/complete", status_code=status.HTTP_200_OK, response_model=CampaignPublic)
 async def complete_campaign(
     campaign_id: str, 
+    expected_version: Optional[int] = Query(None, alias="expectedVersion"),
     current_user: dict = Depends(get_current_user)
 ):
     """Marca campanha como completada"""
-    # Verifica se a campanha existe e pertence ao usuário
-    existing_campaign = await campaign_model.get_campaign_by_user_and_id(
-        current_user["_id"], campaign_id
+    return await _transition_campaign(
+        current_user["_id"], campaign_id, "completed", expected_version,
+        "Apenas campanhas ativas podem ser completadas"
     )
-    if not existing_campaign:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Campanha não encontrada"
-        )
-    
-    if existing_campaign["status"] != "active":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Apenas campanhas ativas podem ser completadas"
-        )
-    
-    updated_campaign = await campaign_model.complete_campaign(campaign_id)
-    return updated_campaign
 
 @router.delete("/{campaign_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_campaign(
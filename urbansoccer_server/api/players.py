@@ -1,8 +1,10 @@
 # urbansoccer_server/api/players.py
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Request
 from urbansoccer_server.models import player_model
 from urbansoccer_server.schemas.player_schema import PlayerCreate, PlayerPublic, PlayerList, PlayerUpdate
 from urbansoccer_server.core.auth import get_current_user
+from urbansoccer_server.core.etag import make_etag, not_modified, with_etag
+from urbansoccer_server.core.serialization import fast_response
 
 router = APIRouter(prefix="/players", tags=["Players"])
 
@@ -17,19 +19,29 @@ async def create_new_player(
     return created_player
 
 @router.get("/", status_code=status.HTTP_200_OK, response_model=PlayerList)
-async def get_all_players():
+async def get_all_players(request: Request):
     """Retorna todos os personagens (público - não requer autenticação)"""
+    etag = make_etag("players", await player_model.get_catalog_etag())
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
     players = await player_model.get_all_players()
-    return {"players": players}
+    return with_etag(fast_response(PlayerList, {"players": players}), etag)
 
 @router.get("/available", status_code=status.HTTP_200_OK, response_model=PlayerList)
-async def get_available_players():
+async def get_available_players(request: Request):
     """Retorna apenas personagens disponíveis para escolha"""
+    etag = make_etag("players/available", await player_model.get_catalog_etag())
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
     players = await player_model.get_available_players()
-    return {"players": players}
+    return with_etag(fast_response(PlayerList, {"players": players}), etag)
 
 @router.get("/rarity/{rarity}", status_code=status.HTTP_200_OK, response_model=PlayerList)
-async def get_players_by_rarity(rarity: str):
+async def get_players_by_rarity(rarity: str, request: Request):
     """Retorna personagens por raridade (default ou unique)"""
     if rarity not in ["default", "unique"]:
         raise HTTPException(
@@ -37,19 +49,29 @@ async def get_players_by_rarity(rarity: str):
             detail="Raridade deve ser 'default' ou 'unique'"
         )
     
+    etag = make_etag("players/rarity", rarity, await player_model.get_catalog_etag())
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
     players = await player_model.get_players_by_rarity(rarity)
-    return {"players": players}
+    return with_etag(fast_response(PlayerList, {"players": players}), etag)
 
 @router.get("/{player_id}", status_code=status.HTTP_200_OK, response_model=PlayerPublic)
-async def get_player(player_id: str):
+async def get_player(player_id: str, request: Request):
     """Retorna um personagem específico"""
+    etag = make_etag("players", player_id, await player_model.get_catalog_etag())
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
     player = await player_model.get_player_by_id(player_id)
     if player is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
             detail="Personagem não encontrado"
         )
-    return player
+    return with_etag(fast_response(PlayerPublic, player), etag)
 
 @router.patch("/{player_id}", status_code=status.HTTP_200_OK, response_model=PlayerPublic)
 async def update_existing_player(
@@ -1,7 +1,8 @@
 # urbansoccer_server/api/user_character.py
-from fastapi import APIRouter, HTTPException, status, Depends
+from typing import Optional
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request
 
-from urbansoccer_server.models import user_character_model
+from urbansoccer_server.models import player_model, user_character_model
 from urbansoccer_server.schemas.user_character_schema import (
     UserCharacterCreate,
     UserCharacterPublic,
@@ -11,6 +12,9 @@ from urbansoccer_server.schemas.user_character_schema import (
     UserCharacterWithPlayerList
 )
 from urbansoccer_server.core.auth import get_current_user
+from urbansoccer_server.core.pagination import parse_fields, paginated_response
+from urbansoccer_server.core.etag import make_etag, not_modified, with_etag
+from urbansoccer_server.core.serialization import fast_response
 
 router = APIRouter(tags=["User Characters"])
 
@@ -37,14 +41,35 @@ async def create_character(
     return created_character
 
 @router.get("/", status_code=status.HTTP_200_OK, response_model=UserCharacterWithPlayerList)
-async def get_my_characters(current_user: dict = Depends(get_current_user)):
+async def get_my_characters(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, description="Itens por página (máximo definido em MAX_PAGE_SIZE)"),
+    cursor: Optional[str] = Query(None, description="Token nextCursor da página anterior"),
+    fields: Optional[str] = Query(None, description="Campos a retornar, separados por vírgula"),
+    current_user: dict = Depends(get_current_user)
+):
     """
-    Retorna todos os personagens do usuário atual com informações completas dos players
+    Retorna os personagens do usuário atual com informações completas dos players,
+    paginados por cursor
     """
     user_id = current_user["_id"]
-    characters = await user_character_model.get_user_characters_with_players(user_id)
+    selected_fields = parse_fields(fields, user_character_model.CHARACTER_FIELDS)
+    
+    # Os dados dos players embutidos também entram no ETag
+    marker = await user_character_model.get_characters_change_marker(user_id)
+    etag = make_etag("characters", user_id, marker, await player_model.get_catalog_etag(), request.url.query)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    characters, next_cursor = await user_character_model.get_user_characters_with_players_page(
+        user_id, limit, cursor, selected_fields
+    )
     
-    return {"characters": characters}
+    return with_etag(
+        paginated_response(UserCharacterWithPlayerList, "characters", characters, next_cursor, selected_fields),
+        etag
+    )
 
 @router.get("/{character_id}", status_code=status.HTTP_200_OK, response_model=UserCharacterWithPlayer)
 async def get_character(
@@ -63,7 +88,7 @@ async def get_character(
             detail="Personagem não encontrado"
         )
     
-    return character
+    return fast_response(UserCharacterWithPlayer, character)
 
 @router.patch("/{character_id}", status_code=status.HTTP_200_OK, response_model=UserCharacterPublic)
 async def update_character(
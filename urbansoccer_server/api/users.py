@@ -1,6 +1,8 @@
 # urbansoccer_server/api/users.py
 from datetime import timedelta
-from fastapi import APIRouter, HTTPException, status, Depends
+from typing import Optional
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi.responses import StreamingResponse
 from urbansoccer_server.models import user_model
 from urbansoccer_server.schemas.user_schema import (
     UserCreate, 
@@ -12,22 +14,23 @@ from urbansoccer_server.schemas.user_schema import (
 )
 from urbansoccer_server.core.auth import create_access_token, get_current_user
 from urbansoccer_server.core.config import settings
+from urbansoccer_server.core.pagination import parse_fields, paginated_response
+from urbansoccer_server.core.serialization import fast_response
+from urbansoccer_server.core.streaming import ndjson_response
 
 router = APIRouter(tags=["Users"])
 
 @router.post("/register", status_code=status.HTTP_201_CREATED, response_model=UserPublic)
 async def register_user(user: UserCreate):
     """Registra um novo usuário"""
-    # Verifica se o email já existe
-    existing_user = await user_model.get_user_by_email(user.email)
-    if existing_user:
+    user_dict = user.model_dump()
+    created_user = await user_model.create_user(user_dict)
+    # O índice único de email garante a unicidade
+    if created_user is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, 
             detail="Email já está em uso"
         )
-    
-    user_dict = user.model_dump()
-    created_user = await user_model.create_user(user_dict)
     return created_user
 
 @router.post("/login", response_model=Token)
@@ -53,13 +56,24 @@ async def login_user(user_credentials: UserLogin):
 @router.get("/me", status_code=status.HTTP_200_OK, response_model=UserPublic)
 async def get_current_user_profile(current_user: dict = Depends(get_current_user)):
     """Retorna o perfil do usuário atual"""
-    return current_user
+    return fast_response(UserPublic, current_user)
 
 @router.get("/", status_code=status.HTTP_200_OK, response_model=UserList)
-async def get_all_users(current_user: dict = Depends(get_current_user)):
-    """Retorna todos os usuários (requer autenticação)"""
-    users = await user_model.get_all_users()
-    return {"users": users}
+async def get_all_users(
+    limit: Optional[int] = Query(None, ge=1, description="Itens por página (máximo definido em MAX_PAGE_SIZE)"),
+    cursor: Optional[str] = Query(None, description="Token nextCursor da página anterior"),
+    fields: Optional[str] = Query(None, description="Campos a retornar, separados por vírgula"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Retorna os usuários paginados por cursor (requer autenticação)"""
+    selected_fields = parse_fields(fields, user_model.USER_FIELDS)
+    users, next_cursor = await user_model.get_users_page(limit, cursor, selected_fields)
+    return paginated_response(UserList, "users", users, next_cursor, selected_fields)
+
+@router.get("/export", status_code=status.HTTP_200_OK, response_class=StreamingResponse)
+async def export_users(current_user: dict = Depends(get_current_user)):
+    """Exporta todos os usuários em NDJSON (streaming, um usuário por linha)"""
+    return ndjson_response(user_model.export_users_cursor(), filename="users.ndjson")
 
 @router.get("/{user_id}", status_code=status.HTTP_200_OK, response_model=UserPublic)
 async def get_user(user_id: str, current_user: dict = Depends(get_current_user)):
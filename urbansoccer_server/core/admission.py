@@ -0,0 +1,241 @@
+# urbansoccer_server/core/admission.py
+"""
+Controle de admissão: limita quantas requisições de cada classe de rota
+executam ao mesmo tempo, para que uma sobrecarga vire rejeição rápida (503 com
+Retry-After) em vez de uma fila sem limite por conexões do MongoDB.
+
+Cada classe (ROUTE_CLASSES) tem um limite de concorrência, uma fila limitada e
+um orçamento de espera na fila. Além disso há um limite global
+(ADMISSION_MAX_CONCURRENCY, próximo do tamanho do pool): quando uma vaga
+global é liberada, ela vai para a fila de maior prioridade. Assim o
+salvamento de progresso passa na frente das listagens de admin.
+
+A classificação usa método e caminho (o middleware roda antes do roteamento).
+"""
+import asyncio
+import logging
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Pattern, Tuple
+
+import orjson
+
+from urbansoccer_server.core import deadline, metrics
+from urbansoccer_server.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RouteClass:
+    """Classe de rotas com limite próprio; prioridade menor é atendida primeiro"""
+    name: str
+    priority: int
+    limit: int
+    max_queue: int
+    queue_timeout_ms: int
+    rules: List[Tuple[Pattern, Pattern]] = field(default_factory=list)
+    in_flight: int = 0
+    waiters: Deque[asyncio.Future] = field(default_factory=deque)
+
+
+def _rules(*rules: Tuple[str, str]) -> List[Tuple[Pattern, Pattern]]:
+    """Pares (métodos, caminho) em regex"""
+    return [(re.compile(methods), re.compile(path)) for methods, path in rules]
+
+
+ROUTE_CLASSES: List[RouteClass] = [
+    # Salvamento de progresso e ciclo de vida das campanhas
+    RouteClass("progress", priority=0, limit=60, max_queue=200, queue_timeout_ms=2000, rules=_rules(
+        ("PATCH", r"^/campaigns/[^/]+/(progress(/delta)?|complete|abandon)$"),
+        ("POST", r"^/campaigns/?$"),
+    )),
+    # Login e cadastro (o bcrypt tem ainda o limite do pool de senhas)
+    RouteClass("auth", priority=1, limit=20, max_queue=100, queue_timeout_ms=1000, rules=_rules(
+        ("POST", r"^/users/(login|register)$"),
+    )),
+    # Listagens completas e exportações em streaming
+    RouteClass("admin", priority=3, limit=8, max_queue=16, queue_timeout_ms=500, rules=_rules(
+        ("GET", r"^/users/?$"),
+        ("GET", r"^/(users|campaigns)/export$"),
+        ("POST|PATCH|DELETE", r"^/players(/.*)?$"),
+    )),
+    # Catálogo de players (em memória, barato)
+    RouteClass("catalog", priority=2, limit=100, max_queue=200, queue_timeout_ms=500, rules=_rules(
+        ("GET|HEAD", r"^/players(/.*)?$"),
+    )),
+    # Demais rotas do jogador (perfil, personagens, campanhas, bootstrap)
+    RouteClass("default", priority=2, limit=60, max_queue=200, queue_timeout_ms=1000, rules=_rules(
+        (".*", r".*"),
+    )),
+]
+
+# Rotas fora do controle (monitoramento e documentação)
+EXEMPT_PATHS = {"/", "/health", "/metrics", "/docs", "/docs/oauth2-redirect", "/redoc", "/openapi.json"}
+
+admission_requests_total = metrics.registry.register(metrics.Counter(
+    "admission_requests_total",
+    "Decisões do controle de admissão por classe (admitted, queued, rejected_queue_full, rejected_timeout)",
+    ("class", "outcome"),
+))
+admission_queue_seconds = metrics.registry.register(metrics.Histogram(
+    "admission_queue_seconds", "Tempo de espera na fila de admissão por classe", ("class",),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+))
+admission_in_flight = metrics.registry.register(metrics.Gauge(
+    "admission_in_flight", "Requisições em execução por classe de rota", ("class",)
+))
+admission_queued = metrics.registry.register(metrics.Gauge(
+    "admission_queued", "Requisições aguardando na fila por classe de rota", ("class",)
+))
+
+
+class AdmissionRejected(Exception):
+    """Fila cheia ou orçamento de espera esgotado"""
+
+    def __init__(self, route_class: RouteClass, reason: str):
+        super().__init__(f"{route_class.name}: {reason}")
+        self.route_class = route_class
+        self.reason = reason
+
+
+class AdmissionController:
+    """Limites por classe e global, com filas limitadas atendidas por prioridade"""
+
+    def __init__(self, classes: List[RouteClass], max_concurrency: int):
+        self.classes = classes
+        self.by_priority = sorted(classes, key=lambda route_class: route_class.priority)
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        for route_class in classes:
+            route_class.limit = settings.ADMISSION_CLASS_LIMITS.get(route_class.name, route_class.limit)
+
+    def classify(self, method: str, path: str) -> Optional[RouteClass]:
+        """Classe da requisição (None para rotas isentas)"""
+        if path in EXEMPT_PATHS:
+            return None
+        for route_class in self.classes:
+            for methods, pattern in route_class.rules:
+                if methods.fullmatch(method) and pattern.match(path):
+                    return route_class
+        return None
+
+    def _has_capacity(self, route_class: RouteClass) -> bool:
+        return self.in_flight < self.max_concurrency and route_class.in_flight < route_class.limit
+
+    def _admit(self, route_class: RouteClass) -> None:
+        self.in_flight += 1
+        route_class.in_flight += 1
+        admission_in_flight.inc(route_class.name)
+
+    async def acquire(self, route_class: RouteClass) -> None:
+        # Quem já está na fila da classe tem a vez; filas de outras classes só existem
+        # por falta de vaga nelas mesmas, já que toda liberação redistribui as vagas
+        if self._has_capacity(route_class) and not route_class.waiters:
+            self._admit(route_class)
+            admission_requests_total.inc(route_class.name, "admitted")
+            return
+
+        if len(route_class.waiters) >= route_class.max_queue:
+            admission_requests_total.inc(route_class.name, "rejected_queue_full")
+            raise AdmissionRejected(route_class, "fila cheia")
+
+        waiter = asyncio.get_running_loop().create_future()
+        route_class.waiters.append(waiter)
+        admission_queued.inc(route_class.name)
+        started = time.perf_counter()
+        # A espera na fila não passa do prazo da requisição
+        timeout = route_class.queue_timeout_ms / 1000
+        remaining = deadline.remaining()
+        if remaining is not None:
+            timeout = min(timeout, remaining)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # A vaga chegou junto com o timeout: segue admitida
+                pass
+            else:
+                waiter.cancel()
+                admission_requests_total.inc(route_class.name, "rejected_timeout")
+                raise AdmissionRejected(route_class, "tempo de fila esgotado")
+        except asyncio.CancelledError:
+            # Cliente desconectou na fila; se a vaga já tinha sido concedida, devolve
+            if waiter.done() and not waiter.cancelled():
+                self.release(route_class)
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            if waiter in route_class.waiters:
+                route_class.waiters.remove(waiter)
+            admission_queued.dec(route_class.name)
+            admission_queue_seconds.observe(route_class.name, value=time.perf_counter() - started)
+        admission_requests_total.inc(route_class.name, "queued")
+
+    def release(self, route_class: RouteClass) -> None:
+        self.in_flight -= 1
+        route_class.in_flight -= 1
+        admission_in_flight.dec(route_class.name)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Concede as vagas livres às filas, da classe mais prioritária para a menos"""
+        for route_class in self.by_priority:
+            while route_class.waiters and self._has_capacity(route_class):
+                waiter = route_class.waiters.popleft()
+                if waiter.done():
+                    continue
+                self._admit(route_class)
+                waiter.set_result(None)
+            if self.in_flight >= self.max_concurrency:
+                return
+
+
+admission_controller = AdmissionController(ROUTE_CLASSES, settings.ADMISSION_MAX_CONCURRENCY)
+
+
+async def _reject(send, exc: AdmissionRejected) -> None:
+    body = orjson.dumps({"detail": "Servidor ocupado, tente novamente em instantes"})
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(settings.ADMISSION_RETRY_AFTER_SECONDS).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    """Middleware ASGI que aplica o controle de admissão às requisições HTTP"""
+
+    def __init__(self, app, controller: AdmissionController = admission_controller):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route_class = self.controller.classify(scope["method"], scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.controller.acquire(route_class)
+        except AdmissionRejected as exc:
+            logger.debug(f"🚦 Requisição recusada ({exc}): {scope['method']} {scope['path']}")
+            await _reject(send, exc)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(route_class)
@@ -2,10 +2,11 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, WebSocket, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from urbansoccer_server.core.config import settings
+from urbansoccer_server.core.principal_cache import principal_cache
 from urbansoccer_server.models import user_model
 from urbansoccer_server.schemas.user_schema import TokenData
 
@@ -22,28 +23,68 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """Obtém o usuário atual baseado no token JWT"""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Não foi possível validar as credenciais",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
+async def get_user_from_token(token: str) -> Optional[dict]:
+    """Valida o token JWT e retorna o usuário (sem senha), ou None se inválido"""
     try:
-        payload = jwt.decode(credentials.credentials, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
-            raise credentials_exception
+            return None
         token_data = TokenData(email=email)
     except JWTError:
-        raise credentials_exception
+        return None
+    
+    cached_user = principal_cache.get(token_data.email)
+    if cached_user is not None:
+        return cached_user
     
     user = await user_model.get_user_by_email(email=token_data.email)
     if user is None:
-        raise credentials_exception
+        return None
     
     # Remove a senha do retorno
     if "password" in user:
         del user["password"]
+    principal_cache.set(token_data.email, user)
     return user
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Obtém o usuário atual baseado no token JWT"""
+    user = await get_user_from_token(credentials.credentials)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Não foi possível validar as credenciais",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+# Subprotocolo usado por clientes WebSocket que não enviam headers (ex: navegadores):
+# new WebSocket(url, ["bearer", token]). O token não vai na URL, que aparece nos logs
+WEBSOCKET_AUTH_SUBPROTOCOL = "bearer"
+
+def _websocket_subprotocol_token(websocket: WebSocket) -> Optional[str]:
+    subprotocols = websocket.scope.get("subprotocols") or []
+    if len(subprotocols) == 2 and subprotocols[0] == WEBSOCKET_AUTH_SUBPROTOCOL:
+        return subprotocols[1]
+    return None
+
+def websocket_accept_subprotocol(websocket: WebSocket) -> Optional[str]:
+    """Subprotocolo a confirmar no accept (o cliente exige o eco do que pediu)"""
+    if _websocket_subprotocol_token(websocket) is not None:
+        return WEBSOCKET_AUTH_SUBPROTOCOL
+    return None
+
+async def get_websocket_user(websocket: WebSocket) -> Optional[dict]:
+    """
+    Autentica uma conexão WebSocket. O token vem no header Authorization
+    (Bearer) ou, para clientes que não enviam headers, no subprotocolo
+    ["bearer", <token>]
+    """
+    token = _websocket_subprotocol_token(websocket)
+    authorization = websocket.headers.get("authorization")
+    if authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:].strip()
+    if not token:
+        return None
+    return await get_user_from_token(token)
@@ -1,4 +1,5 @@
 # urbansoccer_server/core/config.py
+from typing import Dict, Literal, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -8,6 +9,91 @@ class Settings(BaseSettings):
     ALGORITHM: str 
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Armazenamento: "mongo" (padrão) ou "memory" (testes e micro-benchmarks, sem MongoDB)
+    DATABASE_ENGINE: Literal["mongo", "memory"] = "mongo"
+
+    # Servidor de produção (python -m urbansoccer_server.serve); SERVER_WORKERS=None usa um por
+    # CPU disponível (afinidade e cota de CPU do cgroup)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: Optional[int] = None
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    SERVER_KEEPALIVE_SECONDS: int = 5
+    SERVER_FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+    SERVER_ACCESS_LOG: bool = True
+
+    # Inicialização do banco: um worker líder (lock no banco), os demais aguardam
+    DATABASE_INIT_LOCK_TTL_SECONDS: float = 60.0
+    DATABASE_INIT_WAIT_SECONDS: float = 120.0
+    DATABASE_INIT_POLL_SECONDS: float = 0.5
+
+    # Pool de conexões do MongoDB (um client por processo: o total é o valor vezes o número de workers)
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_MAX_IDLE_TIME_MS: Optional[int] = None
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: Optional[int] = None
+    MONGO_COMPRESSORS: Optional[str] = None  # ex: "zstd,snappy,zlib"
+
+    # Timeouts do client MongoDB (operações fora de requisições; nas requisições vale o prazo abaixo)
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGO_CONNECT_TIMEOUT_MS: int = 5000
+    MONGO_SOCKET_TIMEOUT_MS: Optional[int] = 30000
+
+    # Prazo das requisições (core/deadline.py), aplicado como maxTimeMS e timeouts do driver;
+    # exportações em streaming têm prazo próprio (None = sem prazo)
+    REQUEST_TIMEOUT_MS: Optional[int] = 10000
+    EXPORT_TIMEOUT_MS: Optional[int] = None
+
+    # Paginação das listagens
+    DEFAULT_PAGE_SIZE: int = 50
+    MAX_PAGE_SIZE: int = 200
+
+    # Exportações NDJSON em streaming
+    EXPORT_BATCH_SIZE: int = 500
+    EXPORT_CHUNK_DOCUMENTS: int = 100
+
+    # Cache de usuários autenticados (0 desativa)
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+
+    # Pool de hash de senhas (bcrypt fora do event loop)
+    PASSWORD_HASH_EXECUTOR: Literal["thread", "process"] = "thread"
+    PASSWORD_HASH_MAX_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+
+    # Catálogo de players em memória (sincronização entre workers; com mais de um
+    # worker o serve.py exige o change stream ou a recarga periódica; 0 desativa a recarga)
+    PLAYER_CATALOG_CHANGE_STREAM: bool = False
+    PLAYER_CATALOG_REFRESH_SECONDS: Optional[float] = 30.0
+
+    # Write-behind do progresso das campanhas (opt-in; só com um worker)
+    PROGRESS_WRITE_BEHIND: bool = False
+    PROGRESS_FLUSH_INTERVAL_MS: int = 1000
+    PROGRESS_MAX_STALENESS_MS: int = 5000
+    PROGRESS_BUFFER_MAX_CAMPAIGNS: int = 10000
+
+    # Controle de admissão por classe de rota (core/admission.py); limites por classe
+    # sobrescrevíveis, ex: ADMISSION_CLASS_LIMITS='{"progress": 80, "admin": 4}'.
+    # Os limites valem por worker, assim como o pool do MongoDB que eles protegem
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_MAX_CONCURRENCY: int = 100
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+    ADMISSION_CLASS_LIMITS: Dict[str, int] = {}
+
+    # Coalescência de leituras concorrentes idênticas (single-flight)
+    SINGLE_FLIGHT_ENABLED: bool = True
+
+    # Métricas no formato Prometheus em /metrics
+    METRICS_ENABLED: bool = True
+
+    # Contabilidade de comandos MongoDB por requisição e log de lentidão (None desativa cada limite)
+    MONGO_REQUEST_STATS: bool = True
+    SLOW_REQUEST_MS: Optional[int] = 500
+    SLOW_QUERY_MS: Optional[int] = 100
+    REQUEST_MAX_MONGO_COMMANDS: Optional[int] = 25
+    # Conta os bytes das respostas (re-serializa cada resposta em BSON; use só em diagnóstico)
+    MONGO_REQUEST_STATS_BYTES: bool = False
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
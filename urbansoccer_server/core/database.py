@@ -0,0 +1,97 @@
+# urbansoccer_server/core/database.py
+"""
+Conexão única com o MongoDB, criada no lifespan da aplicação e compartilhada
+por todos os models. Com DATABASE_ENGINE=memory o client é o engine em memória
+(core/memory_engine.py), com a mesma interface usada pelos models.
+"""
+import logging
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+
+from urbansoccer_server.core import memory_engine, metrics, request_stats
+from urbansoccer_server.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[AsyncIOMotorClient] = None
+
+
+def client_options() -> dict:
+    """Monta as opções do pool de conexões a partir das configurações"""
+    options = {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": settings.MONGO_CONNECT_TIMEOUT_MS,
+    }
+    if settings.MONGO_SOCKET_TIMEOUT_MS is not None:
+        options["socketTimeoutMS"] = settings.MONGO_SOCKET_TIMEOUT_MS
+    if settings.MONGO_MAX_IDLE_TIME_MS is not None:
+        options["maxIdleTimeMS"] = settings.MONGO_MAX_IDLE_TIME_MS
+    if settings.MONGO_WAIT_QUEUE_TIMEOUT_MS is not None:
+        options["waitQueueTimeoutMS"] = settings.MONGO_WAIT_QUEUE_TIMEOUT_MS
+    if settings.MONGO_COMPRESSORS:
+        options["compressors"] = settings.MONGO_COMPRESSORS
+    listeners = []
+    if settings.METRICS_ENABLED:
+        listeners.extend(metrics.mongo_listeners())
+    if settings.MONGO_REQUEST_STATS:
+        listeners.extend(request_stats.mongo_listeners())
+    if listeners:
+        options["event_listeners"] = listeners
+    return options
+
+
+def connect(**extra_options) -> AsyncIOMotorClient:
+    """Cria o client do MongoDB (uma vez por processo)"""
+    global _client
+    if _client is None and settings.DATABASE_ENGINE == "memory":
+        _client = memory_engine.MemoryClient()
+        logger.info("🧪 Usando o engine de armazenamento em memória")
+    if _client is None:
+        options = client_options()
+        # Listeners extras (ex: scripts/index_audit.py) somam-se aos de métricas
+        extra_listeners = extra_options.pop("event_listeners", [])
+        options["event_listeners"] = options.get("event_listeners", []) + list(extra_listeners)
+        _client = AsyncIOMotorClient(settings.MONGO_URI, **options, **extra_options)
+        logger.info(f"🔌 Client MongoDB criado (pool {settings.MONGO_MIN_POOL_SIZE}-{settings.MONGO_MAX_POOL_SIZE})")
+    return _client
+
+
+def close() -> None:
+    """Fecha o client do MongoDB"""
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
+def get_client() -> AsyncIOMotorClient:
+    """Retorna o client ativo"""
+    if _client is None:
+        raise RuntimeError("Banco de dados não conectado: chame database.connect() no startup")
+    return _client
+
+
+def get_database() -> AsyncIOMotorDatabase:
+    """Retorna o banco configurado em MONGO_DB"""
+    return get_client()[settings.MONGO_DB]
+
+
+class LazyCollection:
+    """Referência a uma collection resolvida no momento do uso, após o connect()"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_database()[self.name], attr)
+
+    def __repr__(self) -> str:
+        return f"LazyCollection({self.name!r})"
+
+
+def get_collection(name: str) -> LazyCollection:
+    """Retorna uma referência preguiçosa para a collection informada"""
+    return LazyCollection(name)
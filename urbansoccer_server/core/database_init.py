@@ -4,13 +4,27 @@ Inicialização automática do banco de dados com players e campanhas padrão
 """
 import asyncio
 import os
-from datetime import datetime
-from motor.motor_asyncio import AsyncIOMotorClient
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from urbansoccer_server.core import database
 from urbansoccer_server.core.config import settings
+from urbansoccer_server.core.indexes import ensure_indexes, index_fingerprint
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Incrementar ao alterar os dados padrão (os índices são versionados pelo hash da especificação)
+SCHEMA_VERSION = 1
+
+# Marcador de versão e lock de inicialização
+META_COLLECTION = "schema_meta"
+SCHEMA_MARKER_ID = "schema"
+INIT_LOCK_ID = "init_lock"
+
 # Players padrão
 DEFAULT_PLAYERS = [
     {
@@ -146,87 +160,171 @@ DEFAULT_CAMPAIGNS = [
     }
 ]
 
+def _schema_marker() -> dict:
+    """Conteúdo do marcador que indica um banco já inicializado"""
+    return {"version": SCHEMA_VERSION, "indexes": index_fingerprint()}
+
+
+async def _is_initialized(meta_collection, started_at: Optional[datetime] = None) -> bool:
+    """
+    Verifica o marcador da versão atual. Com índices únicos pendentes (ignorados
+    por duplicatas) cada inicialização tenta de novo, exceto quando o marcador foi
+    gravado depois de started_at (o líder desta inicialização já tentou).
+    """
+    marker = await meta_collection.find_one({"_id": SCHEMA_MARKER_ID})
+    expected = _schema_marker()
+    if marker is None:
+        return False
+    if marker.get("skippedIndexes") and (started_at is None or marker["initializedAt"] < started_at):
+        return False
+    return all(marker.get(key) == value for key, value in expected.items())
+
+
+async def _acquire_lock(meta_collection, owner: str) -> bool:
+    """Tenta obter o lock de inicialização (livre, expirado ou já nosso)"""
+    now = datetime.utcnow()
+    try:
+        await meta_collection.update_one(
+            {"_id": INIT_LOCK_ID, "$or": [{"expiresAt": {"$lt": now}}, {"owner": owner}]},
+            {"$set": {
+                "owner": owner,
+                "expiresAt": now + timedelta(seconds=settings.DATABASE_INIT_LOCK_TTL_SECONDS),
+            }},
+            upsert=True,
+        )
+        return True
+    except DuplicateKeyError:
+        # O documento existe com outro dono e ainda não expirou
+        return False
+
+
+async def _renew_lock(meta_collection, owner: str) -> None:
+    """Mantém o lock enquanto o líder trabalha"""
+    interval = settings.DATABASE_INIT_LOCK_TTL_SECONDS / 3
+    while True:
+        await asyncio.sleep(interval)
+        await meta_collection.update_one(
+            {"_id": INIT_LOCK_ID, "owner": owner},
+            {"$set": {"expiresAt": datetime.utcnow() + timedelta(seconds=settings.DATABASE_INIT_LOCK_TTL_SECONDS)}},
+        )
+
+
+async def _seed(db) -> None:
+    """Insere players, admin e campanhas padrão nas collections vazias"""
+    player_collection = db["players"]
+    user_collection = db["users"]
+    campaign_collection = db["campaigns"]
+
+    now = datetime.utcnow()
+    existing_players = await player_collection.find({}, {"_id": 1}).to_list(length=len(DEFAULT_PLAYERS))
+    if existing_players:
+        player_ids = [player["_id"] for player in existing_players]
+    else:
+        result = await player_collection.insert_many(
+            [{**player_data, "createdAt": now} for player_data in DEFAULT_PLAYERS]
+        )
+        player_ids = result.inserted_ids
+
+    # Upsert: cria o admin só se ainda não existir, em um único comando
+    admin_user = await user_collection.find_one_and_update(
+        {"email": DEFAULT_ADMIN_USER["email"]},
+        {"$setOnInsert": {**DEFAULT_ADMIN_USER, "createdAt": now}},
+        projection={"_id": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+
+    if await campaign_collection.find_one({}, {"_id": 1}) is None:
+        # Associa cada campanha a um player diferente
+        campaigns = [
+            {
+                **campaign_data,
+                "userId": str(admin_user["_id"]),
+                "playerId": str(player_id),
+                "startDate": now,
+                "lastPlayedDate": now,
+            }
+            for campaign_data, player_id in zip(DEFAULT_CAMPAIGNS, player_ids)
+        ]
+        if campaigns:
+            await campaign_collection.insert_many(campaigns)
+
+
+async def _run_initialization(db, meta_collection) -> None:
+    """Trabalho do líder: índices, dados padrão e marcador de versão"""
+    (created_indexes, skipped_indexes), _ = await asyncio.gather(ensure_indexes(db), _seed(db))
+    await meta_collection.update_one(
+        {"_id": SCHEMA_MARKER_ID},
+        {"$set": {**_schema_marker(), "skippedIndexes": skipped_indexes, "initializedAt": datetime.utcnow()}},
+        upsert=True,
+    )
+
+    counts = await asyncio.gather(*(
+        db[name].estimated_document_count()
+        for name in ("players", "users", "campaigns", "user_characters")
+    ))
+    logger.info(
+        f"📊 Resumo do banco: {counts[0]} players, {counts[1]} usuários, {counts[2]} campanhas, "
+        f"{counts[3]} personagens ({created_indexes} índice(s) criado(s))"
+    )
+    if skipped_indexes:
+        logger.error(f"❌ Índices únicos pendentes por dados duplicados: {', '.join(skipped_indexes)}")
+
+
 async def initialize_database():
-    """Inicializa o banco de dados com dados padrão"""
+    """
+    Inicializa o banco de dados com índices e dados padrão (usa o client compartilhado).
+
+    Bancos já inicializados na versão atual só leem o marcador. Caso contrário
+    um único worker (líder, via documento de lock) faz o trabalho e os demais
+    aguardam o marcador ficar pronto.
+    """
     try:
+        db = database.get_database()
+        meta_collection = db[META_COLLECTION]
+        started_at = datetime.utcnow()
 
-        client = AsyncIOMotorClient(settings.MONGO_URI)
-        db = client[settings.MONGO_DB]
-        
-        # Collections
-        player_collection = db["players"]
-        user_collection = db["users"] 
-        campaign_collection = db["campaigns"]
-        user_character_collection = db["user_characters"]
+        if await _is_initialized(meta_collection):
+            logger.info("✅ Banco já inicializado na versão atual")
+            return True
 
+        owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.DATABASE_INIT_WAIT_SECONDS
+        while True:
+            if await _acquire_lock(meta_collection, owner):
+                break
+            if loop.time() >= deadline:
+                logger.error("❌ Tempo esgotado aguardando a inicialização do banco por outro worker")
+                return False
+            await asyncio.sleep(settings.DATABASE_INIT_POLL_SECONDS)
+            if await _is_initialized(meta_collection, started_at):
+                logger.info("✅ Banco inicializado por outro worker")
+                return True
+
+        renewer = asyncio.create_task(_renew_lock(meta_collection, owner))
         try:
-            # Índices existentes
-            await user_collection.create_index("email", unique=True)
-            await campaign_collection.create_index([("userId", 1)])
-            await campaign_collection.create_index([("playerId", 1)])
-            await player_collection.create_index([("rarity", 1)])
-            await player_collection.create_index([("isAvailable", 1)])
-            
-            # Novos índices para user_characters
-            await user_character_collection.create_index([("userId", 1)])
-            await user_character_collection.create_index([("playerId", 1)])
-            await user_character_collection.create_index([("userId", 1), ("characterName", 1)], unique=True)
-            await user_character_collection.create_index([("createdAt", 1)])
-        except Exception as e:
-            logger.info(f"⚠️ Índices já existem ou erro: {e}")
-        
-        # Verificar e criar players
-        player_count = await player_collection.count_documents({})
-        created_players = []
-        
-        if player_count == 0:
-            for player_data in DEFAULT_PLAYERS:
-                player_data["createdAt"] = datetime.utcnow()
-                result = await player_collection.insert_one(player_data.copy())
-                created_players.append(result.inserted_id)
-        else:
-            existing_players = await player_collection.find({}, {"_id": 1}).to_list(length=5)
-            created_players = [player["_id"] for player in existing_players]
-        
-        admin_user = await user_collection.find_one({"email": DEFAULT_ADMIN_USER["email"]})
-        
-        if not admin_user:
-            DEFAULT_ADMIN_USER["createdAt"] = datetime.utcnow()
-            result = await user_collection.insert_one(DEFAULT_ADMIN_USER.copy())
-            admin_user_id = result.inserted_id
-        else:
-            admin_user_id = admin_user["_id"]
-        
-        # Verificar e criar campanhas
-        campaign_count = await campaign_collection.count_documents({})
-        
-        if campaign_count == 0:
-            
-            for i, campaign_data in enumerate(DEFAULT_CAMPAIGNS):
-                # Associa cada campanha a um player diferente
-                if i < len(created_players):
-                    campaign_data["userId"] = str(admin_user_id)
-                    campaign_data["playerId"] = str(created_players[i])
-                    campaign_data["startDate"] = datetime.utcnow()
-                    campaign_data["lastPlayedDate"] = datetime.utcnow()
-                    
-                    result = await campaign_collection.insert_one(campaign_data.copy())
-
-        # Mostrar resumo final
-        final_players = await player_collection.count_documents({})
-        final_users = await user_collection.count_documents({})
-        final_campaigns = await campaign_collection.count_documents({})
-        final_characters = await user_character_collection.count_documents({})
-        
-        logger.info(f"📊 Resumo do banco: {final_players} players, {final_users} usuários, {final_campaigns} campanhas, {final_characters} personagens")
-        
-        await client.close()
+            # Outro líder pode ter concluído entre a primeira leitura e o lock
+            if not await _is_initialized(meta_collection, started_at):
+                await _run_initialization(db, meta_collection)
+        finally:
+            renewer.cancel()
+            await meta_collection.delete_one({"_id": INIT_LOCK_ID, "owner": owner})
+
         return True
-        
+
     except Exception as e:
         logger.error(f"❌ Erro durante a inicialização do banco: {e}")
         return False
 
+async def _initialize_with_own_connection():
+    """Conecta, inicializa e desconecta (uso fora da aplicação)"""
+    database.connect()
+    try:
+        return await initialize_database()
+    finally:
+        database.close()
+
 def run_database_initialization():
     """Executa a inicialização do banco de forma síncrona"""
     try:
@@ -236,11 +334,11 @@ def run_database_initialization():
             # Se existe um loop rodando, cria uma task
             import concurrent.futures
             with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(asyncio.run, initialize_database())
+                future = executor.submit(asyncio.run, _initialize_with_own_connection())
                 return future.result()
         except RuntimeError:
             # Não há loop rodando, pode executar normalmente
-            return asyncio.run(initialize_database())
+            return asyncio.run(_initialize_with_own_connection())
     except Exception as e:
         logger.error(f"Erro ao executar inicialização: {e}")
         return False
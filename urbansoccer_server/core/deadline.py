@@ -0,0 +1,94 @@
+# urbansoccer_server/core/deadline.py
+"""
+Prazo (deadline) das requisições.
+
+O middleware define o prazo de cada requisição HTTP: REQUEST_TIMEOUT_MS (ou
+EXPORT_TIMEOUT_MS nas exportações em streaming), reduzido pelo header
+X-Request-Timeout-Ms quando o cliente desiste antes. O prazo fica em uma
+ContextVar e em pymongo.timeout(), que o Motor propaga para as threads do
+driver. Assim toda chamada dos models usa o tempo restante como maxTimeMS e
+como timeout de seleção de servidor, de checkout e de socket. Quando o prazo
+acaba, o servidor aborta a operação em vez de continuar ocupando uma conexão.
+
+Fora de requisições (tarefas de background, scripts) não há prazo e valem os
+timeouts do client (core/database.py).
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import pymongo
+
+from urbansoccer_server.core.config import settings
+
+CLIENT_TIMEOUT_HEADER = b"x-request-timeout-ms"
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_deadline", default=None)
+
+
+def remaining() -> Optional[float]:
+    """Segundos restantes até o prazo da operação atual (None sem prazo)"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+@contextmanager
+def budget(seconds: Optional[float]) -> Iterator[None]:
+    """Aplica um prazo ao bloco; prazos aninhados só podem encurtar o atual"""
+    if seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + max(0.0, seconds)
+    current = _deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    token = _deadline.set(deadline)
+    try:
+        with pymongo.timeout(max(0.0, deadline - time.monotonic())):
+            yield
+    finally:
+        _deadline.reset(token)
+
+
+def default_budget() -> Optional[float]:
+    """Prazo padrão em segundos (REQUEST_TIMEOUT_MS), usado também por mensagem no WebSocket"""
+    if settings.REQUEST_TIMEOUT_MS is None:
+        return None
+    return settings.REQUEST_TIMEOUT_MS / 1000
+
+
+def request_budget(scope: dict) -> Optional[float]:
+    """Prazo da requisição em segundos, pelo tipo de rota e pelo header do cliente"""
+    timeout_ms = settings.REQUEST_TIMEOUT_MS
+    if scope["path"].rstrip("/").endswith("/export"):
+        timeout_ms = settings.EXPORT_TIMEOUT_MS
+
+    for name, value in scope.get("headers", []):
+        if name == CLIENT_TIMEOUT_HEADER:
+            try:
+                client_ms = int(value)
+            except ValueError:
+                break
+            if client_ms > 0:
+                timeout_ms = client_ms if timeout_ms is None else min(timeout_ms, client_ms)
+            break
+
+    return timeout_ms / 1000 if timeout_ms is not None else None
+
+
+class DeadlineMiddleware:
+    """Middleware ASGI que estabelece o prazo de cada requisição HTTP"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with budget(request_budget(scope)):
+            await self.app(scope, receive, send)
@@ -0,0 +1,45 @@
+# urbansoccer_server/core/etag.py
+"""
+ETags e GETs condicionais (If-None-Match -> 304).
+
+As rotas calculam o ETag a partir de um marcador barato (versão do catálogo ou
+resumo das alterações do usuário) antes de executar a consulta completa; se o
+cliente já tem a mesma versão, a resposta é um 304 sem corpo.
+"""
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts) -> str:
+    """Gera um ETag forte a partir das partes que identificam a representação"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """Retorna um 304 se o If-None-Match da requisição casar com o ETag"""
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return None
+
+
+def with_etag(response: Response, etag: str) -> Response:
+    """Anexa o ETag à resposta"""
+    response.headers["ETag"] = etag
+    return response
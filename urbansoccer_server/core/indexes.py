@@ -0,0 +1,197 @@
+# urbansoccer_server/core/indexes.py
+"""
+Especificação declarativa dos índices do banco.
+
+Cada índice corresponde a um formato de consulta usado em models/. Ao criar uma
+consulta nova, adicione aqui o índice que a atende e rode
+scripts/index_audit.py para confirmar que nenhuma consulta faz COLLSCAN.
+
+ensure_indexes compara a especificação com os índices existentes e só cria os
+que faltam ou mudaram (divergência), com as collections processadas em paralelo.
+Índices únicos só são criados quando os dados existentes não têm duplicatas:
+caso contrário o índice é ignorado com um erro no log (com exemplos das chaves
+duplicadas) e os demais índices e collections seguem normalmente.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+
+INDEX_SPECS: Dict[str, List[IndexModel]] = {
+    "users": [
+        # get_user_by_email / unicidade no cadastro
+        IndexModel([("email", ASCENDING)], unique=True),
+    ],
+    "players": [
+        IndexModel([("rarity", ASCENDING)]),
+        IndexModel([("isAvailable", ASCENDING)]),
+    ],
+    "campaigns": [
+        # get_campaigns_by_user / get_active_campaigns_by_user (paginadas por lastPlayedDate)
+        IndexModel([("userId", ASCENDING), ("lastPlayedDate", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("userId", ASCENDING), ("status", ASCENDING), ("lastPlayedDate", DESCENDING), ("_id", DESCENDING)]),
+        # check_user_has_active_campaign_with_player
+        IndexModel([("userId", ASCENDING), ("playerId", ASCENDING), ("status", ASCENDING)]),
+        # No máximo uma campanha ativa por (usuário, personagem)
+        IndexModel(
+            [("userId", ASCENDING), ("playerId", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"status": "active"},
+        ),
+        # get_campaigns_by_player (ordenada por _id)
+        IndexModel([("playerId", ASCENDING), ("_id", ASCENDING)]),
+        # export_campaigns_by_player_cursor (campanhas do usuário por personagem, ordenadas por _id)
+        IndexModel([("userId", ASCENDING), ("playerId", ASCENDING), ("_id", ASCENDING)]),
+    ],
+    "user_characters": [
+        # get_user_characters e unicidade do nome por usuário
+        IndexModel([("userId", ASCENDING), ("characterName", ASCENDING)], unique=True),
+        # Listagem paginada dos personagens do usuário
+        IndexModel([("userId", ASCENDING), ("_id", ASCENDING)]),
+        # Marcador de alterações usado no ETag de /characters/
+        IndexModel([("userId", ASCENDING), ("updatedAt", DESCENDING)]),
+        IndexModel([("playerId", ASCENDING)]),
+        IndexModel([("createdAt", ASCENDING)]),
+    ],
+}
+
+
+def _index_options(document: dict) -> dict:
+    """Partes do índice que definem seu comportamento (para detectar divergência)"""
+    return {
+        "key": [[field, direction] for field, direction in document["key"].items()],
+        "unique": bool(document.get("unique")),
+        "partialFilterExpression": document.get("partialFilterExpression"),
+    }
+
+
+def index_fingerprint() -> str:
+    """Hash da especificação: muda sempre que um índice é adicionado ou alterado"""
+    spec = {
+        collection_name: sorted(
+            (index.document["name"], _index_options(index.document)) for index in indexes
+        )
+        for collection_name, indexes in INDEX_SPECS.items()
+    }
+    return hashlib.sha1(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _existing_options(info: dict) -> dict:
+    return {
+        # O servidor pode devolver a direção como float (1.0)
+        "key": [[field, int(direction) if isinstance(direction, float) else direction] for field, direction in info["key"]],
+        "unique": bool(info.get("unique")),
+        "partialFilterExpression": info.get("partialFilterExpression"),
+    }
+
+
+async def _find_duplicates(collection, index: IndexModel, limit: int = 5) -> List[dict]:
+    """Chaves (com a quantidade de documentos) que impedem a criação de um índice único"""
+    document = index.document
+    pipeline = []
+    if document.get("partialFilterExpression"):
+        pipeline.append({"$match": document["partialFilterExpression"]})
+    pipeline += [
+        {"$group": {"_id": {field: f"${field}" for field in document["key"]}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$limit": limit},
+    ]
+    return await collection.aggregate(pipeline, allowDiskUse=True).to_list(length=limit)
+
+
+def _log_duplicates(collection_name: str, name: str, duplicates: List[dict]) -> None:
+    examples = ", ".join(f"{duplicate['_id']} ({duplicate['count']}x)" for duplicate in duplicates)
+    logger.error(
+        f"❌ Índice único {collection_name}.{name} não criado: há documentos duplicados "
+        f"(ex: {examples}). Corrija os dados e reinicie para criá-lo"
+    )
+
+
+async def _create_indexes(collection, collection_name: str, indexes: List[IndexModel]) -> List[str]:
+    """Cria os índices; se uma escrita concorrente gerar duplicata, cria um a um e retorna os ignorados"""
+    try:
+        await collection.create_indexes(indexes)
+        return []
+    except OperationFailure as e:
+        if e.code != DUPLICATE_KEY_ERROR:
+            raise
+
+    skipped = []
+    for index in indexes:
+        try:
+            await collection.create_indexes([index])
+        except OperationFailure as e:
+            if e.code != DUPLICATE_KEY_ERROR:
+                raise
+            name = index.document["name"]
+            _log_duplicates(collection_name, name, await _find_duplicates(collection, index))
+            skipped.append(name)
+    return skipped
+
+
+async def _ensure_collection_indexes(db, collection_name: str, indexes: List[IndexModel]) -> Tuple[int, List[str]]:
+    """
+    Cria os índices ausentes ou divergentes de uma collection.
+
+    Retorna quantos criou e os nomes dos índices únicos ignorados por duplicatas.
+    """
+    collection = db[collection_name]
+    try:
+        existing = await collection.index_information()
+    except Exception:
+        # Collection ainda não existe
+        existing = {}
+
+    missing, skipped = [], []
+    for index in indexes:
+        name = index.document["name"]
+        info: Optional[dict] = existing.get(name)
+        drifted = info is not None and _existing_options(info) != _index_options(index.document)
+        if info is not None and not drifted:
+            continue
+
+        # Verifica as duplicatas antes de remover um índice divergente, que ficaria sem substituto
+        if index.document.get("unique") and existing:
+            duplicates = await _find_duplicates(collection, index)
+            if duplicates:
+                _log_duplicates(collection_name, name, duplicates)
+                skipped.append(name)
+                continue
+
+        if drifted:
+            logger.warning(f"⚠️ Índice {collection_name}.{name} diverge da especificação, recriando")
+            await collection.drop_index(name)
+        missing.append(index)
+
+    if missing:
+        failed = await _create_indexes(collection, collection_name, missing)
+        skipped += failed
+        created = len(missing) - len(failed)
+        logger.info(f"🗂️ {created} índice(s) criado(s) em {collection_name}")
+    else:
+        created = 0
+    return created, [f"{collection_name}.{name}" for name in skipped]
+
+
+async def ensure_indexes(db) -> Tuple[int, List[str]]:
+    """
+    Garante os índices da especificação (idempotente).
+
+    Retorna quantos foram criados e os índices únicos ignorados por dados duplicados
+    ("collection.nome"); uma collection com duplicatas não impede as demais.
+    """
+    results = await asyncio.gather(*(
+        _ensure_collection_indexes(db, collection_name, indexes)
+        for collection_name, indexes in INDEX_SPECS.items()
+    ))
+    created = sum(count for count, _ in results)
+    skipped = [name for _, names in results for name in names]
+    return created, skipped
@@ -0,0 +1,951 @@
+# urbansoccer_server/core/memory_engine.py
+"""
+Engine de armazenamento em memória compatível com a parte da API do Motor
+usada pelos models (DATABASE_ENGINE=memory).
+
+Os models continuam os mesmos: core/database.py entrega estas collections no
+lugar das do MongoDB. São suportados os filtros, operadores de update (inclusive
+updates em pipeline), estágios de aggregate, ordenação, projeções e índices
+únicos/parciais usados em models/ e core/, com a mesma semântica do MongoDB
+(ex: DuplicateKeyError). Operadores fora desse conjunto geram
+NotImplementedError, para que uma consulta nova não passe despercebida.
+
+Os dados vivem no client: cada connect() começa com um banco vazio, o que
+torna testes e micro-benchmarks isolados e sem serviços externos.
+"""
+import copy
+import functools
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure, PyMongoError
+from pymongo.results import (
+    BulkWriteResult,
+    DeleteResult,
+    InsertManyResult,
+    InsertOneResult,
+    UpdateResult,
+)
+
+_MISSING = object()
+
+
+# --- Comparação e ordenação (ordem de tipos do BSON) ---
+
+def _type_rank(value) -> int:
+    if value is None or value is _MISSING:
+        return 1
+    if isinstance(value, bool):
+        return 8
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, str):
+        return 3
+    if isinstance(value, dict):
+        return 4
+    if isinstance(value, (list, tuple)):
+        return 5
+    if isinstance(value, bytes):
+        return 6
+    if isinstance(value, ObjectId):
+        return 7
+    if isinstance(value, datetime):
+        return 9
+    return 10
+
+
+def _compare(a, b) -> int:
+    """Ordem total entre valores BSON (tipo primeiro, depois valor)"""
+    rank_a, rank_b = _type_rank(a), _type_rank(b)
+    if rank_a != rank_b:
+        return -1 if rank_a < rank_b else 1
+    if rank_a == 1:
+        return 0
+    if rank_a == 4:
+        a, b = list(a.items()), list(b.items())
+        for (key_a, value_a), (key_b, value_b) in zip(a, b):
+            if key_a != key_b:
+                return -1 if key_a < key_b else 1
+            result = _compare(value_a, value_b)
+            if result:
+                return result
+        return (len(a) > len(b)) - (len(a) < len(b))
+    if rank_a == 5:
+        for value_a, value_b in zip(a, b):
+            result = _compare(value_a, value_b)
+            if result:
+                return result
+        return (len(a) > len(b)) - (len(a) < len(b))
+    return (a > b) - (a < b)
+
+
+def _equals(a, b) -> bool:
+    if a is _MISSING:
+        a = None
+    if b is _MISSING:
+        b = None
+    return _type_rank(a) == _type_rank(b) and _compare(a, b) == 0
+
+
+def _hashable(value):
+    """Chave hashable equivalente à igualdade do BSON (para índices únicos)"""
+    if value is _MISSING:
+        return (1, None)
+    if isinstance(value, dict):
+        return (4, tuple((key, _hashable(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return (5, tuple(_hashable(item) for item in value))
+    return (_type_rank(value), value)
+
+
+def _bson_value(value):
+    """Valor como volta do BSON: datetimes em UTC sem fuso e com precisão de milissegundos"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+    if isinstance(value, dict):
+        return {key: _bson_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_bson_value(item) for item in value]
+    return value
+
+
+# --- Caminhos com ponto (ex: "progress.score") ---
+
+def _get_path(document, path: str):
+    current = document
+    for part in path.split("."):
+        if isinstance(current, dict):
+            current = current.get(part, _MISSING)
+        elif isinstance(current, list) and part.isdigit():
+            index = int(part)
+            current = current[index] if index < len(current) else _MISSING
+        else:
+            return _MISSING
+        if current is _MISSING:
+            return _MISSING
+    return current
+
+
+def _set_path(document: dict, path: str, value) -> None:
+    parts = path.split(".")
+    current = document
+    for part in parts[:-1]:
+        child = current.get(part)
+        if not isinstance(child, dict):
+            child = current[part] = {}
+        current = child
+    current[parts[-1]] = value
+
+
+def _unset_path(document: dict, path: str) -> None:
+    parts = path.split(".")
+    current = document
+    for part in parts[:-1]:
+        current = current.get(part)
+        if not isinstance(current, dict):
+            return
+    current.pop(parts[-1], None)
+
+
+# --- Filtros ---
+
+def _compare_operator(value, operand, accept) -> bool:
+    candidates = value if isinstance(value, list) else [value]
+    for candidate in candidates:
+        if candidate is _MISSING:
+            continue
+        if _type_rank(candidate) == _type_rank(operand) and accept(_compare(candidate, operand)):
+            return True
+    return False
+
+
+def _match_value(value, condition) -> bool:
+    """Aplica a condição de um campo (valor ou operadores) ao valor do documento"""
+    if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+        return all(_match_operator(value, operator, operand) for operator, operand in condition.items())
+    if _equals(value, condition):
+        return True
+    return isinstance(value, list) and any(_equals(item, condition) for item in value)
+
+
+def _match_operator(value, operator: str, operand) -> bool:
+    if operator == "$eq":
+        return _equals(value, operand) or (isinstance(value, list) and any(_equals(item, operand) for item in value))
+    if operator == "$ne":
+        return not _match_operator(value, "$eq", operand)
+    if operator == "$gt":
+        return _compare_operator(value, operand, lambda result: result > 0)
+    if operator == "$gte":
+        return _compare_operator(value, operand, lambda result: result >= 0)
+    if operator == "$lt":
+        return _compare_operator(value, operand, lambda result: result < 0)
+    if operator == "$lte":
+        return _compare_operator(value, operand, lambda result: result <= 0)
+    if operator == "$in":
+        return any(_match_value(value, item) for item in operand)
+    if operator == "$nin":
+        return not any(_match_value(value, item) for item in operand)
+    if operator == "$exists":
+        return (value is not _MISSING) == bool(operand)
+    if operator == "$not":
+        return not _match_value(value, operand)
+    if operator == "$size":
+        return isinstance(value, list) and len(value) == operand
+    if operator == "$all":
+        return isinstance(value, list) and all(_match_value(value, item) for item in operand)
+    raise NotImplementedError(f"Operador de consulta não suportado pelo engine em memória: {operator}")
+
+
+def matches(document: dict, query: Optional[dict]) -> bool:
+    """Verifica se o documento satisfaz o filtro"""
+    if not query:
+        return True
+    for key, condition in query.items():
+        if key == "$and":
+            if not all(matches(document, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(document, clause) for clause in condition):
+                return False
+        elif key == "$nor":
+            if any(matches(document, clause) for clause in condition):
+                return False
+        elif key.startswith("$"):
+            raise NotImplementedError(f"Operador de consulta não suportado pelo engine em memória: {key}")
+        elif not _match_value(_get_path(document, key), condition):
+            return False
+    return True
+
+
+# --- Projeção e ordenação ---
+
+def project(document: dict, projection) -> dict:
+    """Aplica uma projeção de inclusão ou exclusão"""
+    if not projection:
+        return copy.deepcopy(document)
+    if isinstance(projection, (list, tuple)):
+        projection = {field: 1 for field in projection}
+    include_id = bool(projection.get("_id", 1))
+    fields = {field: value for field, value in projection.items() if field != "_id"}
+    if fields and all(bool(value) for value in fields.values()):
+        result = {}
+        if include_id and "_id" in document:
+            result["_id"] = copy.deepcopy(document["_id"])
+        for field in fields:
+            value = _get_path(document, field)
+            if value is not _MISSING:
+                _set_path(result, field, copy.deepcopy(value))
+        return result
+    result = copy.deepcopy(document)
+    for field in fields:
+        _unset_path(result, field)
+    if not include_id:
+        result.pop("_id", None)
+    return result
+
+
+def _normalize_sort(key_or_list, direction=None) -> List[tuple]:
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction if direction is not None else 1)]
+    if isinstance(key_or_list, dict):
+        return list(key_or_list.items())
+    return [tuple(item) for item in key_or_list]
+
+
+def sort_documents(documents: List[dict], sort: List[tuple]) -> List[dict]:
+    def compare(a, b):
+        for field, direction in sort:
+            result = _compare(_get_path(a, field), _get_path(b, field))
+            if result:
+                return result if direction > 0 else -result
+        return 0
+    return sorted(documents, key=functools.cmp_to_key(compare))
+
+
+# --- Updates ---
+
+def _apply_operators(document: dict, update: dict, is_insert: bool = False) -> None:
+    for operator, fields in update.items():
+        if operator == "$set":
+            for path, value in fields.items():
+                _set_path(document, path, copy.deepcopy(value))
+        elif operator == "$setOnInsert":
+            if is_insert:
+                for path, value in fields.items():
+                    _set_path(document, path, copy.deepcopy(value))
+        elif operator == "$unset":
+            for path in fields:
+                _unset_path(document, path)
+        elif operator == "$inc":
+            for path, amount in fields.items():
+                current = _get_path(document, path)
+                _set_path(document, path, (0 if current is _MISSING or current is None else current) + amount)
+        elif operator in ("$min", "$max"):
+            for path, value in fields.items():
+                current = _get_path(document, path)
+                result = _compare(value, current) if current is not _MISSING else None
+                if result is None or (operator == "$min" and result < 0) or (operator == "$max" and result > 0):
+                    _set_path(document, path, copy.deepcopy(value))
+        elif operator in ("$addToSet", "$push"):
+            for path, value in fields.items():
+                items = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+                current = _get_path(document, path)
+                array = list(current) if isinstance(current, list) else []
+                for item in items:
+                    if operator == "$push" or not any(_equals(existing, item) for existing in array):
+                        array.append(copy.deepcopy(item))
+                _set_path(document, path, array)
+        elif operator == "$pull":
+            for path, condition in fields.items():
+                current = _get_path(document, path)
+                if isinstance(current, list):
+                    _set_path(document, path, [item for item in current if not _match_value(item, condition)])
+        else:
+            raise NotImplementedError(f"Operador de update não suportado pelo engine em memória: {operator}")
+
+
+def apply_update(document: dict, update, is_insert: bool = False) -> dict:
+    """Retorna uma cópia do documento com o update (operadores ou pipeline) aplicado"""
+    result = copy.deepcopy(document)
+    if isinstance(update, list):
+        for stage in update:
+            result = _run_stage(result, stage)
+    else:
+        if update and not any(key.startswith("$") for key in update):
+            # Documento de substituição
+            replacement = copy.deepcopy(update)
+            if "_id" in result:
+                replacement["_id"] = result["_id"]
+            return replacement
+        _apply_operators(result, update, is_insert)
+    if "_id" in document:
+        result["_id"] = document["_id"]
+    return result
+
+
+def _run_stage(document: dict, stage: dict) -> dict:
+    """Estágio de um update em pipeline ($set/$addFields/$unset/$project)"""
+    (name, spec), = stage.items()
+    if name in ("$set", "$addFields"):
+        result = copy.deepcopy(document)
+        for path, expression in spec.items():
+            _set_path(result, path, evaluate(expression, document))
+        return result
+    if name == "$unset":
+        result = copy.deepcopy(document)
+        for path in ([spec] if isinstance(spec, str) else spec):
+            _unset_path(result, path)
+        return result
+    if name == "$project":
+        return _project_stage(document, spec)
+    raise NotImplementedError(f"Estágio de update não suportado pelo engine em memória: {name}")
+
+
+# --- Expressões de agregação ---
+
+def evaluate(expression, document: dict, variables: Optional[dict] = None):
+    """Avalia uma expressão de agregação sobre o documento"""
+    variables = variables or {}
+    if isinstance(expression, str):
+        if expression.startswith("$$"):
+            name, _, path = expression[2:].partition(".")
+            if name == "ROOT":
+                value = document
+            else:
+                value = variables.get(name, _MISSING)
+            if path and value is not _MISSING:
+                value = _get_path(value, path)
+            return None if value is _MISSING else value
+        if expression.startswith("$"):
+            value = _get_path(document, expression[1:])
+            return None if value is _MISSING else value
+        return expression
+    if isinstance(expression, list):
+        return [evaluate(item, document, variables) for item in expression]
+    if not isinstance(expression, dict):
+        return expression
+    if len(expression) == 1:
+        (operator, argument), = expression.items()
+        if operator.startswith("$"):
+            return _evaluate_operator(operator, argument, document, variables)
+    return {key: evaluate(value, document, variables) for key, value in expression.items()}
+
+
+def _evaluate_operator(operator: str, argument, document: dict, variables: dict):
+    def arg(value):
+        return evaluate(value, document, variables)
+
+    if operator == "$literal":
+        return copy.deepcopy(argument)
+    if operator == "$add":
+        values = [arg(value) for value in argument]
+        if any(value is None for value in values):
+            return None
+        return sum(values)
+    if operator == "$ifNull":
+        for value in argument[:-1]:
+            result = arg(value)
+            if result is not None:
+                return result
+        return arg(argument[-1])
+    if operator == "$concatArrays":
+        result = []
+        for value in argument:
+            array = arg(value)
+            if array is None:
+                return None
+            result.extend(array)
+        return result
+    if operator == "$filter":
+        items = arg(argument["input"])
+        if items is None:
+            return None
+        name = argument.get("as", "this")
+        return [
+            item for item in items
+            if _truthy(evaluate(argument["cond"], document, {**variables, name: item}))
+        ]
+    if operator == "$in":
+        value, array = arg(argument[0]), arg(argument[1])
+        return any(_equals(value, item) for item in array)
+    if operator == "$not":
+        return not _truthy(arg(argument[0] if isinstance(argument, list) else argument))
+    if operator == "$and":
+        return all(_truthy(arg(value)) for value in argument)
+    if operator == "$or":
+        return any(_truthy(arg(value)) for value in argument)
+    if operator in ("$eq", "$ne", "$gt", "$gte", "$lt", "$lte"):
+        result = _compare(arg(argument[0]), arg(argument[1]))
+        return {
+            "$eq": result == 0, "$ne": result != 0, "$gt": result > 0,
+            "$gte": result >= 0, "$lt": result < 0, "$lte": result <= 0,
+        }[operator]
+    if operator == "$arrayElemAt":
+        array, index = arg(argument[0]), arg(argument[1])
+        if not isinstance(array, list) or not -len(array) <= index < len(array):
+            return _MISSING
+        return array[index]
+    if operator == "$size":
+        return len(arg(argument))
+    if operator == "$cond":
+        if isinstance(argument, dict):
+            condition, then, otherwise = argument["if"], argument["then"], argument["else"]
+        else:
+            condition, then, otherwise = argument
+        return arg(then) if _truthy(arg(condition)) else arg(otherwise)
+    raise NotImplementedError(f"Operador de expressão não suportado pelo engine em memória: {operator}")
+
+
+def _truthy(value) -> bool:
+    return value not in (None, False, 0, _MISSING)
+
+
+# --- Pipelines de aggregate ---
+
+def _project_stage(document: dict, spec: dict) -> dict:
+    include_id = bool(spec.get("_id", 1)) if not isinstance(spec.get("_id"), (dict, str)) else True
+    exclusion = all(value in (0, False) for key, value in spec.items() if key != "_id")
+    if exclusion and any(key != "_id" for key in spec):
+        return project(document, spec)
+    result = {}
+    if include_id and "_id" in document and not isinstance(spec.get("_id"), (dict, str)):
+        result["_id"] = copy.deepcopy(document["_id"])
+    for field, value in spec.items():
+        if field == "_id" and not isinstance(value, (dict, str)):
+            continue
+        if value in (1, True):
+            found = _get_path(document, field)
+            if found is not _MISSING:
+                _set_path(result, field, copy.deepcopy(found))
+        else:
+            evaluated = evaluate(value, document)
+            if evaluated is not _MISSING:
+                _set_path(result, field, copy.deepcopy(evaluated))
+    return result
+
+
+def _group(documents: List[dict], spec: dict) -> List[dict]:
+    groups: Dict[Any, dict] = {}
+    order = []
+    for document in documents:
+        key_value = evaluate(spec["_id"], document)
+        key = _hashable(key_value)
+        if key not in groups:
+            groups[key] = {"_id": key_value, "_values": {field: [] for field in spec if field != "_id"}}
+            order.append(key)
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            (_operator, expression), = accumulator.items()
+            groups[key]["_values"][field].append(evaluate(expression, document))
+
+    results = []
+    for key in order:
+        group = groups[key]
+        result = {"_id": group["_id"]}
+        for field, values in group["_values"].items():
+            operator = next(iter(spec[field]))
+            present = [value for value in values if value is not None and value is not _MISSING]
+            if operator == "$sum":
+                result[field] = sum(value for value in present if isinstance(value, (int, float)))
+            elif operator == "$avg":
+                numbers = [value for value in present if isinstance(value, (int, float))]
+                result[field] = sum(numbers) / len(numbers) if numbers else None
+            elif operator in ("$max", "$min"):
+                if not present:
+                    result[field] = None
+                else:
+                    key_function = functools.cmp_to_key(_compare)
+                    result[field] = (max if operator == "$max" else min)(present, key=key_function)
+            elif operator == "$first":
+                result[field] = values[0] if values else None
+            elif operator == "$last":
+                result[field] = values[-1] if values else None
+            elif operator == "$push":
+                result[field] = values
+            elif operator == "$addToSet":
+                unique = []
+                for value in values:
+                    if not any(_equals(value, existing) for existing in unique):
+                        unique.append(value)
+                result[field] = unique
+            else:
+                raise NotImplementedError(f"Acumulador não suportado pelo engine em memória: {operator}")
+        results.append(result)
+    return results
+
+
+def run_pipeline(documents: List[dict], pipeline: List[dict], database: "MemoryDatabase") -> List[dict]:
+    """Executa um pipeline de aggregate sobre cópias dos documentos"""
+    results = [copy.deepcopy(document) for document in documents]
+    for stage in pipeline:
+        (name, spec), = stage.items()
+        if name == "$match":
+            results = [document for document in results if matches(document, spec)]
+        elif name == "$group":
+            results = _group(results, spec)
+        elif name == "$sort":
+            results = sort_documents(results, _normalize_sort(spec))
+        elif name == "$limit":
+            results = results[:spec]
+        elif name == "$skip":
+            results = results[spec:]
+        elif name == "$project":
+            results = [_project_stage(document, spec) for document in results]
+        elif name in ("$set", "$addFields", "$unset"):
+            results = [_run_stage(document, stage) for document in results]
+        elif name == "$count":
+            results = [{spec: len(results)}] if results else []
+        elif name == "$lookup":
+            foreign = database[spec["from"]]._documents.values()
+            for document in results:
+                local_value = _get_path(document, spec["localField"])
+                document[spec["as"]] = [
+                    copy.deepcopy(candidate) for candidate in foreign
+                    if _match_value(_get_path(candidate, spec["foreignField"]), local_value)
+                ]
+        elif name == "$unwind":
+            path = spec if isinstance(spec, str) else spec["path"]
+            unwound = []
+            for document in results:
+                array = _get_path(document, path[1:])
+                for item in array if isinstance(array, list) else []:
+                    copy_document = copy.deepcopy(document)
+                    _set_path(copy_document, path[1:], item)
+                    unwound.append(copy_document)
+            results = unwound
+        else:
+            raise NotImplementedError(f"Estágio de aggregate não suportado pelo engine em memória: {name}")
+    return results
+
+
+# --- Cursores ---
+
+class MemoryCursor:
+    """Cursor de find(): sort/skip/limit encadeáveis, to_list e iteração assíncrona"""
+
+    def __init__(self, collection: "MemoryCollection", query: Optional[dict], projection=None):
+        self._collection = collection
+        self._query = query or {}
+        self._projection = projection
+        self._sort: List[tuple] = []
+        self._skip = 0
+        self._limit = 0
+        self._results: Optional[List[dict]] = None
+
+    def sort(self, key_or_list, direction=None) -> "MemoryCursor":
+        self._sort = _normalize_sort(key_or_list, direction)
+        return self
+
+    def skip(self, count: int) -> "MemoryCursor":
+        self._skip = count
+        return self
+
+    def limit(self, count: int) -> "MemoryCursor":
+        self._limit = count
+        return self
+
+    def batch_size(self, _size: int) -> "MemoryCursor":
+        return self
+
+    def _evaluate(self) -> List[dict]:
+        if self._results is None:
+            documents = self._collection._select(self._query)
+            if self._sort:
+                documents = sort_documents(documents, self._sort)
+            documents = documents[self._skip:]
+            if self._limit:
+                documents = documents[:self._limit]
+            self._results = [project(document, self._projection) for document in documents]
+        return self._results
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        results = self._evaluate()
+        taken = results if length is None else results[:length]
+        self._results = results[len(taken):]
+        return taken
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> dict:
+        results = self._evaluate()
+        if not results:
+            raise StopAsyncIteration
+        return results.pop(0)
+
+
+class MemoryAggregateCursor(MemoryCursor):
+    """Cursor com o resultado já calculado de um aggregate"""
+
+    def __init__(self, results: List[dict]):
+        self._results = results
+
+    def _evaluate(self) -> List[dict]:
+        return self._results
+
+
+# --- Collection, banco e client ---
+
+class MemoryCollection:
+    """Collection em memória com a mesma interface assíncrona do Motor"""
+
+    def __init__(self, database: "MemoryDatabase", name: str):
+        self.database = database
+        self.name = name
+        self._documents: Dict[Any, dict] = {}
+        # nome -> especificação; e para os índices únicos, chave -> _id
+        self._indexes: Dict[str, dict] = {"_id_": {"key": [("_id", 1)], "unique": True}}
+        self._unique_entries: Dict[str, Dict[Any, Any]] = {}
+
+    # Seleção e índices
+
+    def _select(self, query: Optional[dict]) -> List[dict]:
+        query = _bson_value(query or {})
+        document_id = query.get("_id", _MISSING)
+        if document_id is not _MISSING and not isinstance(document_id, dict):
+            document = self._documents.get(_hashable(document_id))
+            return [document] if document is not None and matches(document, query) else []
+        return [document for document in self._documents.values() if matches(document, query)]
+
+    def _index_key(self, spec: dict, document: dict):
+        partial = spec.get("partialFilterExpression")
+        if partial and not matches(document, partial):
+            return None
+        return tuple(_hashable(_get_path(document, field)) for field, _direction in spec["key"])
+
+    def _check_unique(self, document: dict, previous: Optional[dict] = None) -> None:
+        for name, entries in self._unique_entries.items():
+            key = self._index_key(self._indexes[name], document)
+            if key is None:
+                continue
+            owner = entries.get(key, _MISSING)
+            if owner is not _MISSING and (previous is None or owner != _hashable(previous["_id"])):
+                # Campos ausentes aparecem como null, como no MongoDB
+                key_value = {}
+                for field, _direction in self._indexes[name]["key"]:
+                    value = _get_path(document, field)
+                    key_value[field] = None if value is _MISSING else value
+                raise DuplicateKeyError(
+                    f"E11000 duplicate key error collection: {self.database.name}.{self.name} index: {name}",
+                    11000,
+                    {"index": name, "keyValue": key_value},
+                )
+
+    def _store(self, document: dict, previous: Optional[dict] = None) -> None:
+        """Grava o documento (já validado) atualizando os índices únicos"""
+        document_key = _hashable(document["_id"])
+        for name, entries in self._unique_entries.items():
+            spec = self._indexes[name]
+            if previous is not None:
+                old_key = self._index_key(spec, previous)
+                if old_key is not None and entries.get(old_key) == document_key:
+                    del entries[old_key]
+            new_key = self._index_key(spec, document)
+            if new_key is not None:
+                entries[new_key] = document_key
+        self._documents[document_key] = document
+
+    def _remove(self, document: dict) -> None:
+        document_key = _hashable(document["_id"])
+        for name, entries in self._unique_entries.items():
+            key = self._index_key(self._indexes[name], document)
+            if key is not None and entries.get(key) == document_key:
+                del entries[key]
+        del self._documents[document_key]
+
+    def _insert(self, document: dict) -> Any:
+        document = _bson_value(copy.deepcopy(document))
+        if "_id" not in document:
+            document["_id"] = ObjectId()
+        if _hashable(document["_id"]) in self._documents:
+            raise DuplicateKeyError(
+                f"E11000 duplicate key error collection: {self.database.name}.{self.name} index: _id_",
+                11000, {"index": "_id_", "keyValue": {"_id": document["_id"]}},
+            )
+        self._check_unique(document)
+        self._store(document)
+        return document["_id"]
+
+    def _update(self, query: dict, update, upsert: bool, multi: bool) -> tuple:
+        """Aplica o update; retorna (encontrados, modificados, id do upsert, antes, depois)"""
+        targets = self._select(query)
+        if not multi:
+            targets = targets[:1]
+        if not targets:
+            if not upsert:
+                return 0, 0, None, None, None
+            base = {
+                key: value for key, value in query.items()
+                if not key.startswith("$") and not isinstance(value, dict)
+            }
+            document = apply_update(base, update, is_insert=True)
+            inserted_id = self._insert(document)
+            return 0, 0, inserted_id, None, self._documents[_hashable(inserted_id)]
+        modified = 0
+        before = after = None
+        for target in targets:
+            updated = _bson_value(apply_update(target, update))
+            self._check_unique(updated, previous=target)
+            if updated != target:
+                modified += 1
+            self._store(updated, previous=target)
+            before, after = target, updated
+        return len(targets), modified, None, before, after
+
+    # API do Motor
+
+    async def insert_one(self, document: dict) -> InsertOneResult:
+        inserted_id = self._insert(document)
+        document.setdefault("_id", inserted_id)
+        return InsertOneResult(inserted_id, True)
+
+    async def insert_many(self, documents: Iterable[dict], ordered: bool = True) -> InsertManyResult:
+        inserted_ids, errors = [], []
+        for index, document in enumerate(documents):
+            try:
+                inserted_id = self._insert(document)
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": 11000, "errmsg": str(e), "keyValue": e.details.get("keyValue")})
+                if ordered:
+                    break
+                continue
+            document.setdefault("_id", inserted_id)
+            inserted_ids.append(inserted_id)
+        if errors:
+            raise BulkWriteError({
+                "writeErrors": errors, "writeConcernErrors": [], "nInserted": len(inserted_ids),
+                "nUpserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": [],
+            })
+        return InsertManyResult(inserted_ids, True)
+
+    async def find_one(self, filter: Optional[dict] = None, projection=None, **_kwargs) -> Optional[dict]:
+        documents = self._select(filter)
+        return project(documents[0], projection) if documents else None
+
+    def find(self, filter: Optional[dict] = None, projection=None, **_kwargs) -> MemoryCursor:
+        return MemoryCursor(self, filter, projection)
+
+    async def count_documents(self, filter: Optional[dict] = None, **_kwargs) -> int:
+        return len(self._select(filter))
+
+    async def update_one(self, filter: dict, update, upsert: bool = False, **_kwargs) -> UpdateResult:
+        matched, modified, upserted_id, _before, _after = self._update(filter, update, upsert, multi=False)
+        raw = {"n": matched or (1 if upserted_id is not None else 0), "nModified": modified}
+        if upserted_id is not None:
+            raw["upserted"] = upserted_id
+        return UpdateResult(raw, True)
+
+    async def update_many(self, filter: dict, update, upsert: bool = False, **_kwargs) -> UpdateResult:
+        matched, modified, upserted_id, _before, _after = self._update(filter, update, upsert, multi=True)
+        raw = {"n": matched or (1 if upserted_id is not None else 0), "nModified": modified}
+        if upserted_id is not None:
+            raw["upserted"] = upserted_id
+        return UpdateResult(raw, True)
+
+    async def find_one_and_update(
+        self, filter: dict, update, projection=None, upsert: bool = False,
+        return_document: bool = False, **_kwargs
+    ) -> Optional[dict]:
+        _matched, _modified, _upserted_id, before, after = self._update(filter, update, upsert, multi=False)
+        document = after if return_document else before
+        return project(document, projection) if document is not None else None
+
+    async def delete_one(self, filter: dict, **_kwargs) -> DeleteResult:
+        documents = self._select(filter)[:1]
+        for document in documents:
+            self._remove(document)
+        return DeleteResult({"n": len(documents)}, True)
+
+    async def delete_many(self, filter: dict, **_kwargs) -> DeleteResult:
+        documents = self._select(filter)
+        for document in documents:
+            self._remove(document)
+        return DeleteResult({"n": len(documents)}, True)
+
+    async def bulk_write(self, requests: List[Any], ordered: bool = True, **_kwargs) -> BulkWriteResult:
+        counts = {"nInserted": 0, "nMatched": 0, "nModified": 0, "nUpserted": 0, "nRemoved": 0}
+        upserted, errors = [], []
+        for index, request in enumerate(requests):
+            try:
+                if isinstance(request, InsertOne):
+                    self._insert(request._doc)
+                    counts["nInserted"] += 1
+                elif isinstance(request, (UpdateOne, UpdateMany, ReplaceOne)):
+                    matched, modified, upserted_id, _before, _after = self._update(
+                        request._filter, request._doc, bool(request._upsert),
+                        multi=isinstance(request, UpdateMany)
+                    )
+                    counts["nMatched"] += matched
+                    counts["nModified"] += modified
+                    if upserted_id is not None:
+                        counts["nUpserted"] += 1
+                        upserted.append({"index": index, "_id": upserted_id})
+                elif isinstance(request, (DeleteOne, DeleteMany)):
+                    documents = self._select(request._filter)
+                    if isinstance(request, DeleteOne):
+                        documents = documents[:1]
+                    for document in documents:
+                        self._remove(document)
+                    counts["nRemoved"] += len(documents)
+                else:
+                    raise NotImplementedError(f"Operação de bulk_write não suportada: {type(request).__name__}")
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": 11000, "errmsg": str(e)})
+                if ordered:
+                    break
+        result = {**counts, "upserted": upserted, "writeErrors": errors, "writeConcernErrors": []}
+        if errors:
+            raise BulkWriteError(result)
+        return BulkWriteResult(result, True)
+
+    def aggregate(self, pipeline: List[dict], **_kwargs) -> MemoryAggregateCursor:
+        return MemoryAggregateCursor(run_pipeline(list(self._documents.values()), pipeline, self.database))
+
+    async def create_indexes(self, indexes: List[Any], **_kwargs) -> List[str]:
+        names = []
+        for index in indexes:
+            document = index.document
+            name = document["name"]
+            spec = {
+                "key": list(document["key"].items()),
+                "unique": bool(document.get("unique")),
+                "partialFilterExpression": document.get("partialFilterExpression"),
+            }
+            existing = self._indexes.get(name)
+            if existing is not None and existing != spec:
+                raise OperationFailure(f"Índice {name} já existe com outras opções", 85)
+            if spec["unique"] and name not in self._unique_entries:
+                entries = {}
+                for stored in self._documents.values():
+                    key = self._index_key(spec, stored)
+                    if key is None:
+                        continue
+                    if key in entries:
+                        raise DuplicateKeyError(
+                            f"E11000 duplicate key error collection: {self.database.name}.{self.name} index: {name}", 11000
+                        )
+                    entries[key] = _hashable(stored["_id"])
+                self._unique_entries[name] = entries
+            self._indexes[name] = spec
+            names.append(name)
+        return names
+
+    async def estimated_document_count(self, **_kwargs) -> int:
+        return len(self._documents)
+
+    async def index_information(self) -> dict:
+        information = {}
+        for name, spec in self._indexes.items():
+            info = {"key": list(spec["key"])}
+            if spec.get("unique"):
+                info["unique"] = True
+            if spec.get("partialFilterExpression"):
+                info["partialFilterExpression"] = spec["partialFilterExpression"]
+            information[name] = info
+        return information
+
+    async def drop_index(self, name: str) -> None:
+        self._indexes.pop(name, None)
+        self._unique_entries.pop(name, None)
+
+    def watch(self, *_args, **_kwargs):
+        raise PyMongoError("Change streams não são suportados pelo engine em memória")
+
+
+class MemoryDatabase:
+    """Banco em memória: collections criadas sob demanda"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._collections: Dict[str, MemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = MemoryCollection(self, name)
+        return collection
+
+    def __getattr__(self, name: str) -> MemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    async def list_collection_names(self, **_kwargs) -> List[str]:
+        return [name for name, collection in self._collections.items() if collection._documents]
+
+    async def drop_collection(self, name: str) -> None:
+        self._collections.pop(name, None)
+
+    async def command(self, command, **_kwargs) -> dict:
+        name = command if isinstance(command, str) else next(iter(command))
+        if name == "ping":
+            return {"ok": 1.0}
+        raise OperationFailure(f"Comando não suportado pelo engine em memória: {name}", 59)
+
+
+class MemoryClient:
+    """Client em memória; os dados existem enquanto o client existir"""
+
+    def __init__(self):
+        self._databases: Dict[str, MemoryDatabase] = {}
+
+    def __getitem__(self, name: str) -> MemoryDatabase:
+        database = self._databases.get(name)
+        if database is None:
+            database = self._databases[name] = MemoryDatabase(name)
+        return database
+
+    def get_database(self, name: str) -> MemoryDatabase:
+        return self[name]
+
+    async def drop_database(self, name_or_database) -> None:
+        name = name_or_database if isinstance(name_or_database, str) else name_or_database.name
+        self._databases.pop(name, None)
+
+    def close(self) -> None:
+        self._databases.clear()
@@ -0,0 +1,323 @@
+# urbansoccer_server/core/metrics.py
+"""
+Métricas no formato de exposição de texto do Prometheus.
+
+- MetricsMiddleware: latência (histograma) e contagem de status por rota
+- MongoCommandMetrics: duração de cada comando por collection (CommandListener)
+- MongoPoolMetrics: conexões abertas/em uso, fila e espera de checkout
+  (ConnectionPoolListener)
+
+Os listeners do pymongo são chamados a partir das threads do Motor, por isso
+as séries usam um lock. O endpoint /metrics (main.py) chama render().
+"""
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from pymongo import monitoring
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = self._header()
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *labels, value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = HTTP_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # labels -> [contagem por bucket (não cumulativa), soma, total]
+        self._series: Dict[tuple, list] = {}
+
+    def observe(self, *labels, value: float) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, [list(s[0]), s[1], s[2]]) for labels, s in self._series.items())
+        lines = self._header()
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+# Coletores de valores instantâneos (caches, buffers, pools) registrados pela aplicação:
+# cada um retorna tuplas (nome, tipo, descrição, valor)
+Collector = Callable[[], Iterable[Tuple[str, str, str, float]]]
+
+
+class MetricsRegistry:
+    """Conjunto de métricas expostas em /metrics"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Collector] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, kind, documentation, value in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "Requisições HTTP por rota, método e status", ("method", "route", "status")
+))
+http_request_duration_seconds = registry.register(Histogram(
+    "http_request_duration_seconds", "Latência das requisições HTTP por rota", ("method", "route")
+))
+http_requests_in_progress = registry.register(Gauge(
+    "http_requests_in_progress", "Requisições HTTP em andamento"
+))
+mongo_command_duration_seconds = registry.register(Histogram(
+    "mongo_command_duration_seconds", "Duração dos comandos MongoDB por comando e collection",
+    ("command", "collection"), buckets=MONGO_BUCKETS
+))
+mongo_command_failures_total = registry.register(Counter(
+    "mongo_command_failures_total", "Comandos MongoDB com falha", ("command", "collection")
+))
+mongo_pool_connections = registry.register(Gauge(
+    "mongo_pool_connections", "Conexões abertas no pool por servidor", ("address",)
+))
+mongo_pool_checked_out = registry.register(Gauge(
+    "mongo_pool_checked_out", "Conexões em uso (retiradas do pool) por servidor", ("address",)
+))
+mongo_pool_wait_queue = registry.register(Gauge(
+    "mongo_pool_wait_queue", "Operações aguardando uma conexão do pool por servidor", ("address",)
+))
+mongo_pool_checkout_seconds = registry.register(Histogram(
+    "mongo_pool_checkout_seconds", "Tempo de espera para obter uma conexão do pool", ("address",),
+    buckets=MONGO_BUCKETS
+))
+mongo_pool_checkout_failures_total = registry.register(Counter(
+    "mongo_pool_checkout_failures_total", "Falhas ao obter conexão do pool", ("address", "reason")
+))
+
+
+def route_template(scope: dict):
+    """Template da rota atendida, com o prefixo do router (ex: /campaigns/{campaign_id})"""
+    # FastAPI recente guarda em scope["route"] só o caminho relativo ao router incluído
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    path = getattr(context, "path", None)
+    if path:
+        return path
+    route = scope.get("route")
+    if isinstance(route, str):
+        return route or None
+    return getattr(route, "path", None)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que mede latência e status por rota (template, ex: /campaigns/{campaign_id})"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        http_requests_in_progress.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_progress.dec()
+            # Rotas não encontradas ficam agrupadas para não explodir a cardinalidade
+            route = route_template(scope) or "unmatched"
+            method = scope["method"]
+            http_request_duration_seconds.observe(method, route, value=elapsed)
+            http_requests_total.inc(method, route, str(status_code))
+
+
+def _command_collection(event) -> str:
+    target = event.command.get(event.command_name)
+    return target if isinstance(target, str) else ""
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Registra a duração de cada comando enviado ao MongoDB"""
+
+    def __init__(self):
+        self._collections: Dict[tuple, str] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        with self._lock:
+            self._collections[(event.connection_id, event.request_id)] = _command_collection(event)
+
+    def _finish(self, event) -> str:
+        with self._lock:
+            return self._collections.pop((event.connection_id, event.request_id), "")
+
+    def succeeded(self, event):
+        collection = self._finish(event)
+        mongo_command_duration_seconds.observe(
+            event.command_name, collection, value=event.duration_micros / 1_000_000
+        )
+
+    def failed(self, event):
+        collection = self._finish(event)
+        mongo_command_duration_seconds.observe(
+            event.command_name, collection, value=event.duration_micros / 1_000_000
+        )
+        mongo_command_failures_total.inc(event.command_name, collection)
+
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """Acompanha a ocupação do pool de conexões e o tempo de espera por conexão"""
+
+    def pool_created(self, event):
+        mongo_pool_connections.set(_address(event), value=0)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        address = _address(event)
+        mongo_pool_connections.set(address, value=0)
+        mongo_pool_checked_out.set(address, value=0)
+        mongo_pool_wait_queue.set(address, value=0)
+
+    def connection_created(self, event):
+        mongo_pool_connections.inc(_address(event))
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        mongo_pool_connections.dec(_address(event))
+
+    def connection_check_out_started(self, event):
+        mongo_pool_wait_queue.inc(_address(event))
+
+    def connection_check_out_failed(self, event):
+        address = _address(event)
+        mongo_pool_wait_queue.dec(address)
+        mongo_pool_checkout_seconds.observe(address, value=event.duration)
+        mongo_pool_checkout_failures_total.inc(address, str(event.reason))
+
+    def connection_checked_out(self, event):
+        address = _address(event)
+        mongo_pool_wait_queue.dec(address)
+        mongo_pool_checked_out.inc(address)
+        mongo_pool_checkout_seconds.observe(address, value=event.duration)
+
+    def connection_checked_in(self, event):
+        mongo_pool_checked_out.dec(_address(event))
+
+
+def _address(event) -> str:
+    host, port = event.address
+    return f"{host}:{port}"
+
+
+def mongo_listeners() -> list:
+    """Listeners do pymongo a registrar no client"""
+    return [MongoCommandMetrics(), MongoPoolMetrics()]
@@ -0,0 +1,142 @@
+# urbansoccer_server/core/pagination.py
+"""
+Paginação por keyset (cursor) e projeção de campos para as listagens.
+
+O cursor é um token opaco com os valores da chave de ordenação do último item
+da página; a próxima página é buscada com um filtro "depois deste item", sem
+skip, de modo que o custo de cada página depende só do seu tamanho.
+
+Os valores do cursor vêm do cliente: cada um precisa ter o tipo do campo de
+ordenação correspondente, senão um documento como {"$gt": ""} viraria operador
+no filtro.
+"""
+import base64
+import binascii
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from bson import ObjectId, json_util
+from bson.errors import InvalidId
+from fastapi.encoders import jsonable_encoder
+
+from urbansoccer_server.core.config import settings
+from urbansoccer_server.core.serialization import FastJSONResponse, fast_response
+
+
+# Tipo esperado no cursor para cada campo de ordenação das listagens (os demais são str)
+SORT_FIELD_TYPES = {
+    "_id": ObjectId,
+    "lastPlayedDate": datetime,
+}
+
+
+class InvalidCursorError(ValueError):
+    """Token de continuação malformado ou de outra listagem"""
+
+
+class InvalidFieldsError(ValueError):
+    """Campo desconhecido no parâmetro fields"""
+
+
+def page_size(limit: Optional[int]) -> int:
+    """Aplica o tamanho padrão e o limite máximo de página"""
+    if limit is None:
+        return settings.DEFAULT_PAGE_SIZE
+    return max(1, min(limit, settings.MAX_PAGE_SIZE))
+
+
+def encode_cursor(document: dict, sort: Sequence[Tuple[str, int]]) -> str:
+    """Gera o token de continuação a partir do último documento da página"""
+    values = [document.get(field) for field, _direction in sort]
+    raw = json_util.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, sort: Sequence[Tuple[str, int]]) -> list:
+    """Lê o token de continuação, validando o formato"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json_util.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, TypeError, InvalidId):
+        raise InvalidCursorError("Cursor inválido")
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise InvalidCursorError("Cursor inválido")
+    for value, (field, _direction) in zip(values, sort):
+        if not isinstance(value, SORT_FIELD_TYPES.get(field, str)):
+            raise InvalidCursorError("Cursor inválido")
+    return values
+
+
+def keyset_filter(sort: Sequence[Tuple[str, int]], values: list) -> dict:
+    """Monta o filtro que seleciona os documentos posteriores ao cursor"""
+    clauses = []
+    for index, (field, direction) in enumerate(sort):
+        operator = "$gt" if direction > 0 else "$lt"
+        clause = {sort[i][0]: values[i] for i in range(index)}
+        clause[field] = {operator: values[index]}
+        clauses.append(clause)
+    return {"$or": clauses}
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[List[str]]:
+    """Converte o parâmetro fields ("a,b,c") em lista validada de campos"""
+    if not fields:
+        return None
+    allowed = set(allowed)
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in allowed]
+    if unknown:
+        raise InvalidFieldsError(f"Campos inválidos: {', '.join(unknown)}")
+    return requested
+
+
+async def fetch_page(
+    collection,
+    query: dict,
+    sort: Sequence[Tuple[str, int]],
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    base_projection: Optional[dict] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Busca uma página de documentos ordenados por `sort` (que deve terminar em
+    _id para ser única). Retorna os documentos e o cursor da próxima página,
+    ou None quando não há mais itens.
+    """
+    size = page_size(limit)
+    if cursor:
+        query = {"$and": [query, keyset_filter(sort, decode_cursor(cursor, sort))]}
+
+    projection = dict(base_projection or {})
+    if fields is not None:
+        # Inclui sempre as chaves de ordenação, necessárias para o cursor
+        projection = {field: 1 for field in fields}
+        projection.update({field: 1 for field, _direction in sort})
+
+    # Busca um item a mais para saber se existe próxima página
+    documents = await collection.find(query, projection or None).sort(list(sort)).limit(size + 1).to_list(length=size + 1)
+    next_cursor = None
+    if len(documents) > size:
+        documents = documents[:size]
+        next_cursor = encode_cursor(documents[-1], sort)
+
+    if fields is not None:
+        keep = set(fields) | {"_id"}
+        documents = [{k: v for k, v in document.items() if k in keep} for document in documents]
+    return documents, next_cursor
+
+
+def paginated_response(
+    model,
+    key: str,
+    items: List[dict],
+    next_cursor: Optional[str],
+    fields: Optional[List[str]]
+) -> FastJSONResponse:
+    """Monta a resposta da listagem paginada"""
+    body = {key: items, "nextCursor": next_cursor}
+    if fields is None:
+        return fast_response(model, body)
+    # Com projeção parcial o schema completo (que exige todos os campos) não se aplica
+    return FastJSONResponse(jsonable_encoder(body))
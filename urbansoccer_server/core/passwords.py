@@ -0,0 +1,84 @@
+# urbansoccer_server/core/passwords.py
+"""
+Hash e verificação de senhas (bcrypt) executados fora do event loop,
+em um pool de workers com limite de concorrência e de fila
+"""
+import asyncio
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from passlib.context import CryptContext
+
+from urbansoccer_server.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Configuração para hash de senha
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+_executor: Optional[Executor] = None
+_pending = 0
+
+
+class PasswordQueueFullError(Exception):
+    """Levantada quando a fila de trabalhos de senha atingiu o limite configurado"""
+
+
+def hash_password(password: str) -> str:
+    """Gera hash da senha (bloqueante)"""
+    return pwd_context.hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verifica se a senha está correta (bloqueante)"""
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        max_workers = settings.PASSWORD_HASH_MAX_WORKERS
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password")
+        logger.info(f"🔐 Pool de senhas iniciado ({settings.PASSWORD_HASH_EXECUTOR}, {max_workers} workers)")
+    return _executor
+
+
+async def _run(func, *args):
+    """Executa a função no pool, recusando trabalho quando a fila está cheia"""
+    global _pending
+    if _pending >= settings.PASSWORD_HASH_MAX_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE:
+        raise PasswordQueueFullError("Fila de processamento de senhas cheia")
+
+    _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), func, *args)
+    finally:
+        _pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    """Gera hash da senha sem bloquear o event loop"""
+    return await _run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verifica a senha sem bloquear o event loop"""
+    return await _run(verify_password, plain_password, hashed_password)
+
+
+def pending_jobs() -> int:
+    """Quantidade de trabalhos de senha em execução ou aguardando"""
+    return _pending
+
+
+def shutdown_executor() -> None:
+    """Encerra o pool de senhas (chamado no shutdown da aplicação)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
@@ -0,0 +1,99 @@
+# urbansoccer_server/core/principal_cache.py
+"""
+Cache em memória dos usuários autenticados (principals), com TTL e descarte LRU
+"""
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from urbansoccer_server.core.config import settings
+
+
+class PrincipalCache:
+    """Cache limitado de usuários indexado pelo subject do token (email)"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+        self._subjects_by_user_id: dict = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, subject: str) -> Optional[dict]:
+        """Retorna uma cópia do usuário em cache ou None se ausente/expirado"""
+        entry = self._entries.get(subject)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            self._remove(subject)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(subject)
+        self.hits += 1
+        return dict(user)
+
+    def set(self, subject: str, user: dict) -> None:
+        """Armazena o usuário (sem senha) para o subject informado"""
+        if self.max_size <= 0 or self.ttl_seconds <= 0:
+            return
+
+        user = {k: v for k, v in user.items() if k != "password"}
+        if subject in self._entries:
+            self._remove(subject)
+
+        self._entries[subject] = (time.monotonic() + self.ttl_seconds, user)
+        if "_id" in user:
+            self._subjects_by_user_id[str(user["_id"])] = subject
+
+        while len(self._entries) > self.max_size:
+            oldest_subject = next(iter(self._entries))
+            self._remove(oldest_subject)
+            self.evictions += 1
+
+    def invalidate(self, subject: str) -> None:
+        """Remove o usuário do cache pelo subject (email)"""
+        self._remove(subject)
+
+    def invalidate_user_id(self, user_id: str) -> None:
+        """Remove o usuário do cache pelo ID"""
+        subject = self._subjects_by_user_id.get(str(user_id))
+        if subject is not None:
+            self._remove(subject)
+
+    def clear(self) -> None:
+        """Esvazia o cache"""
+        self._entries.clear()
+        self._subjects_by_user_id.clear()
+
+    def stats(self) -> dict:
+        """Retorna contadores de acerto/erro do cache"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxSize": self.max_size,
+            "ttlSeconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRatio": (self.hits / lookups) if lookups else 0.0,
+        }
+
+    def _remove(self, subject: str) -> None:
+        entry = self._entries.pop(subject, None)
+        if entry is None:
+            return
+        user_id = entry[1].get("_id")
+        if user_id is not None and self._subjects_by_user_id.get(str(user_id)) == subject:
+            del self._subjects_by_user_id[str(user_id)]
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
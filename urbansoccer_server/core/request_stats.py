@@ -0,0 +1,184 @@
+# urbansoccer_server/core/request_stats.py
+"""
+Contabilidade de comandos MongoDB por requisição e log de consultas lentas.
+
+O middleware cria um RequestMongoStats por requisição HTTP e o guarda em uma
+ContextVar. O Motor executa o pymongo em threads copiando o contexto, então o
+CommandListener enxerga o objeto da requisição que originou cada comando e
+acumula comandos, round trips e tempo no banco (e os bytes retornados, com
+MONGO_REQUEST_STATS_BYTES).
+
+Ao final da requisição, ela é registrada no log se passar de SLOW_REQUEST_MS
+ou de REQUEST_MAX_MONGO_COMMANDS (padrão N+1). Comandos que passam de
+SLOW_QUERY_MS são registrados com o formato da consulta (valores omitidos) e a
+rota de origem. O formato só é calculado para os comandos lentos: o listener
+roda na thread do driver em todo comando.
+"""
+import contextvars
+import json
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+import bson
+from pymongo import monitoring
+
+from urbansoccer_server.core.config import settings
+from urbansoccer_server.core.metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+# Campos de controle do driver que não descrevem a consulta
+_IGNORED_COMMAND_FIELDS = {
+    "lsid", "$db", "$clusterTime", "$readPreference", "txnNumber", "signature",
+    "documents", "apiVersion", "apiStrict", "apiDeprecationErrors",
+}
+# Comandos que continuam uma operação (mais um round trip do mesmo cursor)
+_CONTINUATION_COMMANDS = {"getMore", "killCursors"}
+_MAX_SHAPE_LENGTH = 500
+
+
+class RequestMongoStats:
+    """Acumulador dos comandos MongoDB de uma requisição"""
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.commands = 0
+        self.round_trips = 0
+        self.bytes_returned = 0
+        self.mongo_seconds = 0.0
+        self.commands_by_name: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def route(self) -> str:
+        return route_template(self.scope) or self.scope.get("path", "-")
+
+    def record(self, command_name: str, collection: str, seconds: float, reply_bytes: int) -> None:
+        with self._lock:
+            self.round_trips += 1
+            self.mongo_seconds += seconds
+            self.bytes_returned += reply_bytes
+            if command_name not in _CONTINUATION_COMMANDS:
+                self.commands += 1
+                key = f"{command_name}:{collection}" if collection else command_name
+                self.commands_by_name[key] = self.commands_by_name.get(key, 0) + 1
+
+
+_current_stats: contextvars.ContextVar[Optional[RequestMongoStats]] = contextvars.ContextVar(
+    "request_mongo_stats", default=None
+)
+
+
+def current_stats() -> Optional[RequestMongoStats]:
+    """Estatísticas da requisição em andamento (None fora de requisições)"""
+    return _current_stats.get()
+
+
+def _shape(value):
+    """Substitui os valores por '?' mantendo campos e operadores"""
+    if isinstance(value, dict):
+        return {key: _shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and isinstance(value[0], dict):
+            return [_shape(item) for item in value]
+        return ["?"] if value else []
+    return "?"
+
+
+def command_shape(command: dict) -> str:
+    """Formato do comando para log, sem valores (nem dados pessoais)"""
+    shape = {}
+    for key, value in command.items():
+        if key in _IGNORED_COMMAND_FIELDS:
+            continue
+        # Nome do comando e collection são mantidos; parâmetros numéricos também
+        if not shape or isinstance(value, (int, float, bool)):
+            shape[key] = value
+        else:
+            shape[key] = _shape(value)
+    text = json.dumps(shape, default=str, ensure_ascii=False)
+    if len(text) > _MAX_SHAPE_LENGTH:
+        text = text[:_MAX_SHAPE_LENGTH] + "..."
+    return text
+
+
+class RequestStatsListener(monitoring.CommandListener):
+    """Acumula os comandos na requisição atual e registra os lentos"""
+
+    def __init__(self):
+        self._started: Dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else ""
+        # Guarda só a referência; o formato é calculado no fim, se o comando for lento
+        command = event.command if settings.SLOW_QUERY_MS is not None else None
+        with self._lock:
+            self._started[(event.connection_id, event.request_id)] = (collection, command)
+
+    def _finish(self, event, reply_bytes: int) -> None:
+        with self._lock:
+            collection, command = self._started.pop((event.connection_id, event.request_id), ("", None))
+        seconds = event.duration_micros / 1_000_000
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(event.command_name, collection, seconds, reply_bytes)
+        if settings.SLOW_QUERY_MS is not None and seconds * 1000 >= settings.SLOW_QUERY_MS:
+            route = stats.route if stats is not None else "-"
+            shape = command_shape(command) if command is not None else event.command_name
+            logger.warning(f"🐢 Comando lento ({seconds * 1000:.1f} ms) em {route}: {shape}")
+
+    def succeeded(self, event):
+        reply_bytes = 0
+        if settings.MONGO_REQUEST_STATS_BYTES and _current_stats.get() is not None:
+            reply_bytes = len(bson.encode(event.reply))
+        self._finish(event, reply_bytes)
+
+    def failed(self, event):
+        self._finish(event, 0)
+
+
+class RequestStatsMiddleware:
+    """Middleware ASGI que abre o contexto de contabilidade de cada requisição HTTP"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestMongoStats(scope)
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_stats.reset(token)
+            _log_request(scope, stats, time.perf_counter() - start)
+
+
+def _log_request(scope: dict, stats: RequestMongoStats, elapsed: float) -> None:
+    slow = settings.SLOW_REQUEST_MS is not None and elapsed * 1000 >= settings.SLOW_REQUEST_MS
+    chatty = (
+        settings.REQUEST_MAX_MONGO_COMMANDS is not None
+        and stats.commands > settings.REQUEST_MAX_MONGO_COMMANDS
+    )
+    if not (slow or chatty):
+        return
+    reason = "lenta" if slow else "com muitos comandos"
+    returned = f"{stats.bytes_returned} bytes, " if settings.MONGO_REQUEST_STATS_BYTES else ""
+    logger.warning(
+        f"🐢 Requisição {reason}: {scope['method']} {stats.route} em {elapsed * 1000:.1f} ms | "
+        f"mongo: {stats.commands} comandos, {stats.round_trips} round trips, "
+        f"{returned}{stats.mongo_seconds * 1000:.1f} ms | {stats.commands_by_name}"
+    )
+
+
+def mongo_listeners() -> list:
+    """Listener a registrar no client"""
+    return [RequestStatsListener()]
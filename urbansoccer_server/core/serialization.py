@@ -0,0 +1,49 @@
+# urbansoccer_server/core/serialization.py
+"""
+Serialização rápida das respostas.
+
+Por padrão o FastAPI valida o retorno contra o response_model, converte o
+resultado com jsonable_encoder e gera o JSON com o encoder da stdlib. Para os
+documentos que vêm do nosso próprio banco, as rotas podem usar fast_response:
+a validação e a geração dos bytes são feitas de uma vez pelo pydantic-core com
+TypeAdapters pré-compilados (mesmos aliases, ordem de campos e formatos do
+response_model), e a resposta é entregue já em bytes.
+"""
+from functools import lru_cache
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson é opcional
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse que aceita bytes já serializados e usa orjson quando disponível"""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return bytes(content)
+        if orjson is not None:
+            return orjson.dumps(content)
+        return super().render(content)
+
+
+@lru_cache(maxsize=None)
+def get_adapter(model) -> TypeAdapter:
+    """TypeAdapter compilado uma única vez por schema"""
+    return TypeAdapter(model)
+
+
+def serialize(model, data: Any) -> bytes:
+    """Valida `data` contra o schema e gera o JSON (by_alias, como o response_model)"""
+    adapter = get_adapter(model)
+    return adapter.dump_json(adapter.validate_python(data), by_alias=True)
+
+
+def fast_response(model, data: Any, status_code: int = 200) -> FastJSONResponse:
+    """Resposta JSON serializada pelo pydantic-core, equivalente à do response_model"""
+    return FastJSONResponse(serialize(model, data), status_code=status_code)
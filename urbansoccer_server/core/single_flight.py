@@ -0,0 +1,111 @@
+# urbansoccer_server/core/single_flight.py
+"""
+Coalescência de leituras concorrentes (single-flight).
+
+Chamadas simultâneas de uma função de leitura com os mesmos argumentos
+aguardam uma única execução em andamento e compartilham o resultado: em picos
+(ex: início de torneio) o banco recebe uma consulta por chave, não uma por
+requisição. Não há cache: terminada a execução, a próxima chamada consulta de novo.
+
+A consulta roda em uma task própria, em um contexto limpo: o cancelamento de
+quem a iniciou não afeta os demais, e o prazo dessa requisição (ContextVar e
+pymongo.timeout, que podem vir do header X-Request-Timeout-Ms) não vale para a
+consulta compartilhada, que usa os timeouts do client. Cada chamador continua
+limitado pelo próprio prazo enquanto aguarda o resultado. Quando o resultado é compartilhado, cada chamador recebe uma
+cópia, já que as rotas alteram os dicts retornados. As métricas são por função
+(os argumentos não viram labels, para limitar a cardinalidade).
+"""
+import asyncio
+import contextvars
+import copy
+import functools
+import logging
+from typing import Any, Dict, Hashable
+
+from pymongo.errors import ExecutionTimeout
+
+from urbansoccer_server.core import deadline, metrics
+from urbansoccer_server.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+single_flight_calls_total = metrics.registry.register(metrics.Counter(
+    "single_flight_calls_total",
+    "Chamadas de leituras coalescidas por função (leader executa, shared reaproveita)",
+    ("function", "result"),
+))
+
+
+class _Flight:
+    __slots__ = ("task", "shared")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.shared = 0
+
+
+_in_flight: Dict[Hashable, _Flight] = {}
+
+
+def _freeze(value) -> Hashable:
+    """Converte os argumentos em uma chave hashable"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_freeze(item) for item in value))
+    hash(value)
+    return value
+
+
+def in_flight() -> int:
+    """Quantidade de execuções em andamento"""
+    return len(_in_flight)
+
+
+async def _wait(task: asyncio.Task) -> Any:
+    """Aguarda a execução compartilhada respeitando o prazo de quem espera"""
+    timeout = asyncio.timeout(deadline.remaining())
+    try:
+        async with timeout:
+            return await asyncio.shield(task)
+    except TimeoutError:
+        if not timeout.expired():
+            raise
+        # Mesmo tratamento (504) de um prazo esgotado no banco
+        raise ExecutionTimeout("Prazo da requisição esgotado aguardando leitura coalescida")
+
+
+def single_flight(func):
+    """Decorator para funções de leitura (async, sem efeitos colaterais) dos models"""
+    name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs) -> Any:
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return await func(*args, **kwargs)
+        try:
+            key = (name, _freeze(args), _freeze(kwargs))
+        except TypeError:
+            # Argumento não hashable: executa sem coalescer
+            return await func(*args, **kwargs)
+
+        flight = _in_flight.get(key)
+        if flight is not None:
+            flight.shared += 1
+            single_flight_calls_total.inc(name, "shared")
+            return copy.deepcopy(await _wait(flight.task))
+
+        single_flight_calls_total.inc(name, "leader")
+        # Contexto vazio: a execução compartilhada não herda o prazo de quem a iniciou
+        task = asyncio.get_running_loop().create_task(func(*args, **kwargs), context=contextvars.Context())
+        flight = _Flight(task)
+        _in_flight[key] = flight
+        # Registrado antes do shield: a chave sai do mapa antes de qualquer chamador retomar
+        flight.task.add_done_callback(lambda _task: _in_flight.pop(key, None))
+        result = await _wait(flight.task)
+        # Sem outros chamadores, o resultado é só de quem iniciou e dispensa a cópia
+        return copy.deepcopy(result) if flight.shared else result
+
+    return wrapper
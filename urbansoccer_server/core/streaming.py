@@ -0,0 +1,60 @@
+# urbansoccer_server/core/streaming.py
+"""
+Respostas em streaming NDJSON (um documento JSON por linha) para exportações.
+
+Os documentos são lidos do cursor do MongoDB em lotes e escritos conforme
+chegam, então a memória por requisição não depende do tamanho da collection.
+"""
+import json
+from datetime import datetime
+from typing import AsyncIterator, Callable, Optional
+
+from bson import ObjectId
+from fastapi.responses import StreamingResponse
+
+from urbansoccer_server.core.config import settings
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _json_default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+async def iter_ndjson(
+    cursor,
+    transform: Optional[Callable[[dict], Optional[dict]]] = None
+) -> AsyncIterator[bytes]:
+    """Converte um cursor em blocos de linhas NDJSON"""
+    chunk = []
+    async for document in cursor:
+        if transform is not None:
+            document = transform(document)
+            if document is None:
+                continue
+        chunk.append(json.dumps(document, default=_json_default, ensure_ascii=False))
+        if len(chunk) >= settings.EXPORT_CHUNK_DOCUMENTS:
+            yield ("\n".join(chunk) + "\n").encode()
+            chunk = []
+    if chunk:
+        yield ("\n".join(chunk) + "\n").encode()
+
+
+def ndjson_response(
+    cursor,
+    transform: Optional[Callable[[dict], Optional[dict]]] = None,
+    filename: Optional[str] = None
+) -> StreamingResponse:
+    """Cria a StreamingResponse NDJSON para o cursor informado"""
+    headers = {}
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return StreamingResponse(
+        iter_ndjson(cursor.batch_size(settings.EXPORT_BATCH_SIZE), transform),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers=headers,
+    )
@@ -1,15 +1,58 @@
 # urbansoccer_server/main.py
-from fastapi import FastAPI
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from urbansoccer_server.api import users, players, campaigns, user_character
+from fastapi.responses import JSONResponse, Response
+from pymongo.errors import ExecutionTimeout, NetworkTimeout, PyMongoError, ServerSelectionTimeoutError
+from urbansoccer_server.api import users, players, campaigns, user_character, bootstrap
 from urbansoccer_server.core.database_init import initialize_database
+from urbansoccer_server.core import admission, database, deadline, metrics, passwords, request_stats, single_flight
+from urbansoccer_server.core.config import settings
+from urbansoccer_server.core.principal_cache import principal_cache
+from urbansoccer_server.core.pagination import InvalidCursorError, InvalidFieldsError
+from urbansoccer_server.models.loaders import PlayerLoaderMiddleware
+from urbansoccer_server.models.player_catalog import player_catalog
+from urbansoccer_server.models.progress_buffer import progress_buffer
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Cria o client do banco no startup e libera os recursos no shutdown"""
+    database.connect()
+    await initialize_database()
+    try:
+        await player_catalog.refresh()
+    except Exception as e:
+        logger.error(f"❌ Erro ao carregar catálogo de players: {e}")
+    player_catalog.start_watching()
+    progress_buffer.start()
+    try:
+        yield
+    finally:
+        # Grava o progresso pendente antes de fechar a conexão
+        await progress_buffer.stop()
+        await player_catalog.stop_watching()
+        passwords.shutdown_executor()
+        database.close()
 
 app = FastAPI(
     title="Urban Soccer Server",
     description="Backend para o jogo Urban Soccer RPG com autenticação de usuários, personagens e campanhas.",
-    version="0.2.0"
+    version="0.2.0",
+    lifespan=lifespan
 )
 
+# Escopo dos loaders por requisição (o mais interno: só envolve as rotas)
+app.add_middleware(PlayerLoaderMiddleware)
+
+# Controle de admissão dentro do CORS, para que as respostas 503 tenham os headers CORS
+if settings.ADMISSION_CONTROL_ENABLED:
+    app.add_middleware(admission.AdmissionMiddleware)
+# Prazo da requisição por fora da admissão: o tempo na fila consome o mesmo prazo
+app.add_middleware(deadline.DeadlineMiddleware)
+
 # Configuração do CORS
 app.add_middleware(
     CORSMiddleware,
@@ -19,17 +62,71 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Evento de inicialização
-@app.on_event("startup")
-async def startup_event():
-    """Executa a inicialização do banco quando a aplicação inicia"""
-    await initialize_database()
+if settings.MONGO_REQUEST_STATS:
+    app.add_middleware(request_stats.RequestStatsMiddleware)
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+def _runtime_metrics():
+    """Estado dos caches, buffers e pools internos para o /metrics"""
+    cache_stats = principal_cache.stats()
+    buffer_stats = progress_buffer.stats()
+    return [
+        ("principal_cache_size", "gauge", "Usuários no cache de autenticação", cache_stats["size"]),
+        ("principal_cache_hits_total", "counter", "Acertos do cache de autenticação", cache_stats["hits"]),
+        ("principal_cache_misses_total", "counter", "Falhas do cache de autenticação", cache_stats["misses"]),
+        ("principal_cache_evictions_total", "counter", "Remoções por limite de tamanho", cache_stats["evictions"]),
+        ("password_jobs_pending", "gauge", "Hashes/verificações de senha em execução ou na fila", passwords.pending_jobs()),
+        ("progress_buffer_pending", "gauge", "Campanhas com progresso pendente no write-behind", buffer_stats["pending"]),
+        ("progress_buffer_submitted_total", "counter", "Atualizações de progresso recebidas pelo buffer", buffer_stats["submitted"]),
+        ("progress_buffer_flushed_total", "counter", "Campanhas gravadas pelo buffer", buffer_stats["flushed"]),
+        ("progress_buffer_flush_errors_total", "counter", "Falhas de gravação do buffer", buffer_stats["flushErrors"]),
+        ("player_catalog_version", "gauge", "Versão local do catálogo de players", player_catalog.version),
+        ("single_flight_in_flight", "gauge", "Leituras coalescidas em execução", single_flight.in_flight()),
+    ]
+
+metrics.registry.register_collector(_runtime_metrics)
+
+@app.exception_handler(passwords.PasswordQueueFullError)
+async def password_queue_full_handler(request: Request, exc: passwords.PasswordQueueFullError):
+    """Recusa rapidamente logins/cadastros quando o pool de senhas está saturado"""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Servidor ocupado, tente novamente em instantes"},
+        headers={"Retry-After": "1"},
+    )
+
+@app.exception_handler(ExecutionTimeout)
+@app.exception_handler(NetworkTimeout)
+@app.exception_handler(ServerSelectionTimeoutError)
+async def mongo_timeout_handler(request: Request, exc: PyMongoError):
+    """Prazo da requisição esgotado no banco (504) ou banco inacessível (503)"""
+    if isinstance(exc, ServerSelectionTimeoutError) and deadline.remaining() != 0:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"detail": "Banco de dados indisponível, tente novamente em instantes"},
+            headers={"Retry-After": "1"},
+        )
+    return JSONResponse(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        content={"detail": "Tempo limite da requisição excedido"},
+    )
+
+@app.exception_handler(InvalidCursorError)
+@app.exception_handler(InvalidFieldsError)
+async def invalid_listing_params_handler(request: Request, exc: ValueError):
+    """Cursor ou fields inválidos nas listagens paginadas"""
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"detail": str(exc)},
+    )
 
 # Inclui os roteadores na aplicação principal
 app.include_router(users.router, prefix="/users")
 app.include_router(players.router)
 app.include_router(campaigns.router)
 app.include_router(user_character.router, prefix="/characters")
+app.include_router(bootstrap.router)
 
 @app.get("/")
 def read_root():
@@ -37,4 +134,11 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "service": "urban-soccer-server"}
\ No newline at end of file
+    return {"status": "healthy", "service": "urban-soccer-server"}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    """Métricas no formato de exposição de texto do Prometheus"""
+    if not settings.METRICS_ENABLED:
+        return Response(status_code=status.HTTP_404_NOT_FOUND)
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
@@ -1,22 +1,66 @@
 # urbansoccer_server/models/campaign_model.py
-from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
-from urbansoccer_server.core.config import settings
+from urbansoccer_server.core import database
+from urbansoccer_server.core.pagination import fetch_page
+from urbansoccer_server.models.progress_buffer import progress_buffer
 
-# Conexão com o banco
-client = AsyncIOMotorClient(settings.MONGO_URI)
-db = client[settings.MONGO_DB]
-campaign_collection = db["campaigns"]
+# Collection resolvida sobre o client compartilhado (core/database.py)
+campaign_collection = database.get_collection("campaigns")
 
-async def create_campaign(user_id: str, campaign_data: dict) -> dict:
-    """Cria uma nova campanha para o usuário"""
+# Campos que podem ser pedidos via fields= e ordenação das listagens
+CAMPAIGN_FIELDS = (
+    "userId", "playerId", "campaignName", "status", "progress",
+    "startDate", "lastPlayedDate", "version"
+)
+CAMPAIGN_SORT = [("lastPlayedDate", -1), ("_id", -1)]
+
+# Transições de status permitidas: status de destino -> status de origem aceitos
+CAMPAIGN_TRANSITIONS = {
+    "abandoned": ("active",),
+    "completed": ("active",),
+}
+
+class CampaignTransitionError(Exception):
+    """A campanha não está em um status que permite a transição pedida"""
+
+    def __init__(self, current_status: str, target_status: str):
+        super().__init__(f"Transição inválida: {current_status} -> {target_status}")
+        self.current_status = current_status
+        self.target_status = target_status
+
+class CampaignVersionConflict(Exception):
+    """A campanha foi alterada por outra requisição (versão diferente da esperada)"""
+
+    def __init__(self, expected_version: int, current_version: int):
+        super().__init__(f"Versão esperada {expected_version}, atual {current_version}")
+        self.expected_version = expected_version
+        self.current_version = current_version
+
+class CampaignNotActiveError(ValueError):
+    """Progresso enviado para uma campanha que não está ativa"""
+
+    def __init__(self, current_status: str):
+        super().__init__("Apenas campanhas ativas podem receber progresso")
+        self.current_status = current_status
+
+def _version_filter(expected_version: int) -> dict:
+    # Campanhas antigas não têm o campo version e equivalem à versão 0
+    if expected_version == 0:
+        return {"version": {"$in": [0, None]}}
+    return {"version": expected_version}
+
+async def create_campaign(user_id: str, campaign_data: dict) -> Optional[dict]:
+    """Cria uma nova campanha para o usuário (None se já houver uma ativa com o personagem)"""
     campaign_data["userId"] = user_id
     campaign_data["startDate"] = datetime.utcnow()
     campaign_data["lastPlayedDate"] = datetime.utcnow()
     campaign_data["status"] = "active"
+    campaign_data["version"] = 0
     
     # Define progresso inicial se não fornecido
     if "progress" not in campaign_data:
@@ -27,11 +71,13 @@ async def create_campaign(user_id: str, campaign_data: dict) -> dict:
             "inventory": []
         }
     
-    result = await campaign_collection.insert_one(campaign_data)
-    new_campaign = await campaign_collection.find_one({"_id": result.inserted_id})
-    if new_campaign and "_id" in new_campaign:
-        new_campaign["_id"] = str(new_campaign["_id"])
-    return new_campaign
+    # O índice único parcial (userId, playerId, status ativo) impede uma segunda
+    # campanha ativa com o mesmo personagem
+    try:
+        result = await campaign_collection.insert_one(campaign_data)
+    except DuplicateKeyError:
+        return None
+    return {**campaign_data, "_id": str(result.inserted_id)}
 
 async def get_campaigns_by_user(user_id: str) -> List[dict]:
     """Retorna todas as campanhas de um usuário"""
@@ -39,6 +85,7 @@ async def get_campaigns_by_user(user_id: str) -> List[dict]:
     for campaign in campaigns:
         if "_id" in campaign:
             campaign["_id"] = str(campaign["_id"])
+            progress_buffer.overlay(campaign)
     return campaigns
 
 async def get_active_campaigns_by_user(user_id: str) -> List[dict]:
@@ -50,8 +97,61 @@ async def get_active_campaigns_by_user(user_id: str) -> List[dict]:
     for campaign in campaigns:
         if "_id" in campaign:
             campaign["_id"] = str(campaign["_id"])
+            progress_buffer.overlay(campaign)
     return campaigns
 
+async def get_campaigns_page(
+    user_id: str,
+    active_only: bool = False,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """Retorna uma página das campanhas do usuário (mais recentes primeiro) e o cursor da próxima"""
+    query = {"userId": user_id}
+    if active_only:
+        query["status"] = "active"
+    campaigns, next_cursor = await fetch_page(
+        campaign_collection, query, CAMPAIGN_SORT, limit, cursor, fields
+    )
+    for campaign in campaigns:
+        campaign["_id"] = str(campaign["_id"])
+        if fields is None or "progress" in fields:
+            progress_buffer.overlay(campaign)
+    return campaigns, next_cursor
+
+async def get_campaigns_change_marker(user_id: str, active_only: bool = False) -> str:
+    """
+    Resumo barato das campanhas do usuário, usado nos ETags: quantidade, maior
+    _id, maior lastPlayedDate e soma dos contadores version. Toda escrita em
+    campanha incrementa version, então a soma muda mesmo quando lastPlayedDate
+    não muda (duas escritas no mesmo milissegundo, relógios diferentes entre
+    workers). A consulta usa o índice (userId, status, lastPlayedDate).
+    """
+    query = {"userId": user_id}
+    if active_only:
+        query["status"] = "active"
+    pipeline = [
+        {"$match": query},
+        {"$group": {
+            "_id": None,
+            "count": {"$sum": 1},
+            "lastId": {"$max": "$_id"},
+            "last": {"$max": "$lastPlayedDate"},
+            "versions": {"$sum": {"$ifNull": ["$version", 0]}},
+        }}
+    ]
+    summary = await campaign_collection.aggregate(pipeline).to_list(length=1)
+    if not summary:
+        marker = "0:"
+    else:
+        last = summary[0]["last"]
+        marker = (
+            f"{summary[0]['count']}:{summary[0]['lastId']}:"
+            f"{last.isoformat() if last else ''}:{summary[0]['versions']}"
+        )
+    return f"{marker}:{progress_buffer.pending_marker(user_id)}"
+
 async def get_campaign_by_id(campaign_id: str) -> Optional[dict]:
     """Busca campanha por ID"""
     if not ObjectId.is_valid(campaign_id):
@@ -59,7 +159,7 @@ async def get_campaign_by_id(campaign_id: str) -> Optional[dict]:
     campaign = await campaign_collection.find_one({"_id": ObjectId(campaign_id)})
     if campaign and "_id" in campaign:
         campaign["_id"] = str(campaign["_id"])
-    return campaign
+    return progress_buffer.overlay(campaign)
 
 async def get_campaign_by_user_and_id(user_id: str, campaign_id: str) -> Optional[dict]:
     """Busca campanha por ID e verifica se pertence ao usuário"""
@@ -69,6 +169,28 @@ async def get_campaign_by_user_and_id(user_id: str, campaign_id: str) -> Optiona
         "_id": ObjectId(campaign_id),
         "userId": user_id
     })
+    if campaign and "_id" in campaign:
+        campaign["_id"] = str(campaign["_id"])
+    return progress_buffer.overlay(campaign)
+
+async def _update_campaign_document(
+    campaign_id: str,
+    update,
+    user_id: Optional[str] = None
+) -> Optional[dict]:
+    """Aplica a atualização e retorna o documento resultante em uma única operação"""
+    # Progresso pendente no buffer precisa chegar ao banco antes desta escrita
+    await progress_buffer.flush_campaign(campaign_id)
+    if isinstance(update, dict):
+        update.setdefault("$inc", {})["version"] = 1
+    query = {"_id": ObjectId(campaign_id)}
+    if user_id is not None:
+        query["userId"] = user_id
+    campaign = await campaign_collection.find_one_and_update(
+        query,
+        update,
+        return_document=ReturnDocument.AFTER
+    )
     if campaign and "_id" in campaign:
         campaign["_id"] = str(campaign["_id"])
     return campaign
@@ -81,14 +203,14 @@ async def update_campaign(campaign_id: str, data_to_update: dict) -> Optional[di
     # Atualiza a data da última jogada automaticamente
     data_to_update["lastPlayedDate"] = datetime.utcnow()
     
-    await campaign_collection.update_one(
-        {"_id": ObjectId(campaign_id)},
-        {"$set": data_to_update}
-    )
-    return await get_campaign_by_id(campaign_id)
+    return await _update_campaign_document(campaign_id, {"$set": data_to_update})
 
-async def update_campaign_progress(campaign_id: str, progress_data: dict) -> Optional[dict]:
-    """Atualiza especificamente o progresso da campanha"""
+async def update_campaign_progress(
+    campaign_id: str,
+    progress_data: dict,
+    user_id: Optional[str] = None
+) -> Optional[dict]:
+    """Atualiza especificamente o progresso da campanha (opcionalmente restrito ao dono)"""
     if not ObjectId.is_valid(campaign_id):
         return None
     
@@ -97,27 +219,168 @@ async def update_campaign_progress(campaign_id: str, progress_data: dict) -> Opt
         "lastPlayedDate": datetime.utcnow()
     }
     
-    await campaign_collection.update_one(
-        {"_id": ObjectId(campaign_id)},
-        {"$set": update_data}
-    )
-    return await get_campaign_by_id(campaign_id)
+    return await _update_campaign_document(campaign_id, {"$set": update_data}, user_id=user_id)
+
+async def buffer_campaign_progress(user_id: str, campaign_id: str, progress_data: dict) -> Optional[dict]:
+    """
+    Registra o progresso no buffer write-behind. A posse da campanha só é
+    verificada no banco na primeira atualização de cada janela de flush.
+    Retorna a campanha como ficará após o flush, None se não existir, ou levanta
+    CampaignNotActiveError se ela não estiver ativa (o flush não a gravaria).
+    """
+    campaign = progress_buffer.update_pending(campaign_id, user_id, progress_data)
+    if campaign is not None:
+        return campaign
+    
+    campaign = await get_campaign_by_user_and_id(user_id, campaign_id)
+    if not campaign:
+        return None
+    if not progress_buffer.accepts(campaign):
+        raise CampaignNotActiveError(campaign.get("status"))
+    return progress_buffer.submit(campaign, progress_data)
+
+def _build_progress_delta_update(delta: dict):
+    """
+    Converte um delta de progresso em uma única operação de update.
+
+    Usa $inc/$set/$addToSet/$pull; quando o delta adiciona e remove itens do
+    inventário ao mesmo tempo (o que geraria conflito de path no MongoDB), usa
+    um update em pipeline com o mesmo efeito.
+    """
+    now = datetime.utcnow()
+    inventory_add = list(dict.fromkeys(delta.get("inventoryAdd") or []))
+    inventory_remove = list(dict.fromkeys(delta.get("inventoryRemove") or []))
+
+    if inventory_add and inventory_remove:
+        current_inventory = {"$ifNull": ["$progress.inventory", []]}
+        kept_inventory = {
+            "$filter": {
+                "input": current_inventory,
+                "as": "item",
+                "cond": {"$not": [{"$in": ["$$item", inventory_remove]}]}
+            }
+        }
+        stage = {
+            "progress.inventory": {
+                "$concatArrays": [
+                    kept_inventory,
+                    {
+                        "$filter": {
+                            "input": {"$literal": inventory_add},
+                            "as": "newItem",
+                            "cond": {"$not": [{"$in": ["$$newItem", kept_inventory]}]}
+                        }
+                    }
+                ]
+            },
+            "lastPlayedDate": {"$literal": now},
+            "version": {"$add": [{"$ifNull": ["$version", 0]}, 1]}
+        }
+        if delta.get("scoreIncrement"):
+            stage["progress.score"] = {"$add": [{"$ifNull": ["$progress.score", 0]}, delta["scoreIncrement"]]}
+        if delta.get("level") is not None:
+            stage["progress.level"] = {"$literal": delta["level"]}
+        elif delta.get("levelIncrement"):
+            stage["progress.level"] = {"$add": [{"$ifNull": ["$progress.level", 1]}, delta["levelIncrement"]]}
+        if delta.get("currentMission") is not None:
+            stage["progress.currentMission"] = {"$literal": delta["currentMission"]}
+        return [{"$set": stage}]
+
+    update: dict = {"$set": {"lastPlayedDate": now}, "$inc": {}}
+    if delta.get("scoreIncrement"):
+        update["$inc"]["progress.score"] = delta["scoreIncrement"]
+    if delta.get("level") is not None:
+        update["$set"]["progress.level"] = delta["level"]
+    elif delta.get("levelIncrement"):
+        update["$inc"]["progress.level"] = delta["levelIncrement"]
+    if delta.get("currentMission") is not None:
+        update["$set"]["progress.currentMission"] = delta["currentMission"]
+    if inventory_add:
+        update["$addToSet"] = {"progress.inventory": {"$each": inventory_add}}
+    if inventory_remove:
+        update["$pull"] = {"progress.inventory": {"$in": inventory_remove}}
+    return update
+
+async def apply_campaign_progress_delta(user_id: str, campaign_id: str, delta: dict) -> Optional[dict]:
+    """
+    Aplica um delta de progresso (incrementos, nível, missão e itens do
+    inventário) em uma única escrita, sem reenviar o progresso inteiro.
+    Retorna None se a campanha não existir para o usuário.
+    """
+    if not ObjectId.is_valid(campaign_id):
+        return None
+    
+    update = _build_progress_delta_update(delta)
+    return await _update_campaign_document(campaign_id, update, user_id=user_id)
 
 async def delete_campaign(campaign_id: str) -> bool:
     """Deleta uma campanha"""
     if not ObjectId.is_valid(campaign_id):
         return False
     
+    progress_buffer.discard(campaign_id)
     result = await campaign_collection.delete_one({"_id": ObjectId(campaign_id)})
     return result.deleted_count > 0
 
-async def abandon_campaign(campaign_id: str) -> Optional[dict]:
-    """Marca uma campanha como abandonada"""
-    return await update_campaign(campaign_id, {"status": "abandoned"})
+async def transition_campaign_status(
+    user_id: str,
+    campaign_id: str,
+    target_status: str,
+    expected_version: Optional[int] = None
+) -> Optional[dict]:
+    """
+    Muda o status da campanha com um único find_one_and_update condicional.
+
+    O filtro exige o dono, um status de origem válido e, se informada, a versão
+    esperada; a versão é incrementada a cada transição. Retorna a campanha
+    atualizada, None se ela não existir para o usuário, ou levanta
+    CampaignTransitionError / CampaignVersionConflict (este só quando
+    expected_version foi informada).
+    """
+    if not ObjectId.is_valid(campaign_id):
+        return None
+
+    query = {
+        "_id": ObjectId(campaign_id),
+        "userId": user_id,
+        "status": {"$in": list(CAMPAIGN_TRANSITIONS[target_status])}
+    }
+    if expected_version is not None:
+        query.update(_version_filter(expected_version))
+    
+    await progress_buffer.flush_campaign(campaign_id)
+
+    campaign = await campaign_collection.find_one_and_update(
+        query,
+        {
+            "$set": {"status": target_status, "lastPlayedDate": datetime.utcnow()},
+            "$inc": {"version": 1}
+        },
+        return_document=ReturnDocument.AFTER
+    )
+    if campaign:
+        campaign["_id"] = str(campaign["_id"])
+        return campaign
+
+    # Caminho de falha: descobre o motivo para devolver o erro correto
+    current = await get_campaign_by_user_and_id(user_id, campaign_id)
+    if current is None:
+        return None
+    if current["status"] not in CAMPAIGN_TRANSITIONS[target_status]:
+        raise CampaignTransitionError(current["status"], target_status)
+    if expected_version is not None:
+        raise CampaignVersionConflict(expected_version, current.get("version", 0))
+    # Sem versão esperada não há conflito a informar: a campanha mudou entre a
+    # escrita e a releitura, e a requisição é tratada como campanha não encontrada
+    return None
 
-async def complete_campaign(campaign_id: str) -> Optional[dict]:
-    """Marca uma campanha como completada"""
-    return await update_campaign(campaign_id, {"status": "completed"})
+async def abandon_campaign(user_id: str, campaign_id: str, expected_version: Optional[int] = None) -> Optional[dict]:
+    """Marca uma campanha ativa como abandonada"""
+    return await transition_campaign_status(user_id, campaign_id, "abandoned", expected_version)
+
+async def complete_campaign(user_id: str, campaign_id: str, expected_version: Optional[int] = None) -> Optional[dict]:
+    """Marca uma campanha ativa como completada"""
+    return await transition_campaign_status(user_id, campaign_id, "completed", expected_version)
 
 async def get_campaigns_by_player(player_id: str) -> List[dict]:
     """Retorna todas as campanhas que usam um personagem específico"""
@@ -125,8 +388,18 @@ async def get_campaigns_by_player(player_id: str) -> List[dict]:
     for campaign in campaigns:
         if "_id" in campaign:
             campaign["_id"] = str(campaign["_id"])
+            progress_buffer.overlay(campaign)
     return campaigns
 
+def export_campaigns_by_player_cursor(user_id: str, player_id: str):
+    """Cursor das campanhas do usuário que usam o personagem, para exportação em streaming"""
+    return campaign_collection.find({"userId": user_id, "playerId": player_id}).sort("_id", 1)
+
+def prepare_exported_campaign(campaign: dict) -> dict:
+    """Ajusta cada campanha exportada (ID em string e progresso pendente)"""
+    campaign["_id"] = str(campaign["_id"])
+    return progress_buffer.overlay(campaign)
+
 async def check_user_has_active_campaign_with_player(user_id: str, player_id: str) -> bool:
     """Verifica se o usuário já tem uma campanha ativa com este personagem"""
     campaign = await campaign_collection.find_one({
@@ -182,6 +455,7 @@ async def get_campaign_with_details(campaign_id: str) -> Optional[dict]:
         campaign = campaign[0]
         if "_id" in campaign:
             campaign["_id"] = str(campaign["_id"])
+            progress_buffer.overlay(campaign)
         # Remove senha do usuário se existir
         if campaign.get("user") and "password" in campaign["user"]:
             del campaign["user"]["password"]
@@ -0,0 +1,108 @@
+# urbansoccer_server/models/loaders.py
+"""
+Loaders com escopo de requisição que agrupam buscas por ID.
+
+Chamadas a PlayerLoader.load() feitas na mesma volta do event loop são
+agrupadas em uma única chamada a player_model.get_players_by_ids, e cada ID é
+buscado no máximo uma vez por requisição.
+
+O escopo é aberto pelo PlayerLoaderMiddleware em cada requisição HTTP e
+descartado ao final. Fora de um escopo (WebSocket, tarefas de background,
+scripts) cada chamada recebe um loader novo, que agrupa só o próprio lote:
+nada fica em cache por toda a vida de uma conexão ou tarefa.
+"""
+import asyncio
+import contextvars
+import copy
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Optional, Set
+
+from urbansoccer_server.models import player_model
+
+
+class PlayerLoader:
+    """Agrupa buscas de players por ID dentro de uma requisição"""
+
+    def __init__(self):
+        self._futures: dict = {}
+        self._queue: List[str] = []
+        self._dispatch_scheduled = False
+        # Referências às tasks de busca em andamento (o event loop guarda só referências fracas)
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def load(self, player_id: str) -> Optional[dict]:
+        """Retorna o player do ID informado (ou None), agrupando com outras buscas"""
+        future = self._futures.get(player_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._futures[player_id] = future
+            self._queue.append(player_id)
+            if not self._dispatch_scheduled:
+                self._dispatch_scheduled = True
+                loop.call_soon(self._start_dispatch)
+
+        # Shield: o cancelamento de um chamador não cancela o resultado compartilhado
+        player = await asyncio.shield(future)
+        return copy.deepcopy(player) if player is not None else None
+
+    async def load_many(self, player_ids: Iterable[str]) -> List[Optional[dict]]:
+        """Busca vários players em um único lote"""
+        return list(await asyncio.gather(*(self.load(player_id) for player_id in player_ids)))
+
+    def _start_dispatch(self) -> None:
+        task = asyncio.ensure_future(self._dispatch())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self) -> None:
+        player_ids, self._queue = self._queue, []
+        self._dispatch_scheduled = False
+        try:
+            players = await player_model.get_players_by_ids(player_ids)
+        except Exception as e:
+            for player_id in player_ids:
+                future = self._futures.pop(player_id)
+                future.set_exception(e)
+                # Marca a exceção como lida: os chamadores podem já ter sido cancelados
+                future.exception()
+            return
+
+        for player_id in player_ids:
+            self._futures[player_id].set_result(players.get(player_id))
+
+
+_player_loader: contextvars.ContextVar[Optional[PlayerLoader]] = contextvars.ContextVar(
+    "player_loader", default=None
+)
+
+
+def get_player_loader() -> PlayerLoader:
+    """Retorna o loader do escopo atual ou, fora de um escopo, um loader avulso"""
+    loader = _player_loader.get()
+    return loader if loader is not None else PlayerLoader()
+
+
+@contextmanager
+def player_loader_scope() -> Iterator[PlayerLoader]:
+    """Abre um escopo com um loader novo, descartado ao sair"""
+    token = _player_loader.set(PlayerLoader())
+    try:
+        yield _player_loader.get()
+    finally:
+        _player_loader.reset(token)
+
+
+class PlayerLoaderMiddleware:
+    """Middleware ASGI que abre um escopo de loaders por requisição HTTP"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with player_loader_scope():
+            await self.app(scope, receive, send)
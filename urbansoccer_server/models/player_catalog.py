@@ -0,0 +1,161 @@
+# urbansoccer_server/models/player_catalog.py
+"""
+Catálogo de personagens (players) mantido em memória.
+
+A collection de players é pequena e quase só muda pelas rotas de admin, então
+o catálogo é carregado no startup e atualizado pelas escritas do player_model.
+Em deploys com vários workers, as escritas feitas por outro processo chegam via
+change stream (PLAYER_CATALOG_CHANGE_STREAM) ou por recarga periódica
+(PLAYER_CATALOG_REFRESH_SECONDS).
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+from typing import Any, List, Optional, Tuple
+
+from pymongo.errors import PyMongoError
+
+from urbansoccer_server.core import database
+from urbansoccer_server.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+player_collection = database.get_collection("players")
+
+
+class PlayerCatalog:
+    """Snapshot imutável dos players indexado por id, disponibilidade e raridade"""
+
+    def __init__(self):
+        self.loaded = False
+        self.version = 0
+        self.etag = ""
+        self._players: List[dict] = []
+        self._by_id: dict = {}
+        self._available: List[dict] = []
+        self._available_by_rarity: dict = {}
+        self._refresh_lock = asyncio.Lock()
+        # Escritas aplicadas durante uma recarga, reaplicadas sobre o snapshot lido
+        self._pending_changes: Optional[List[Tuple[str, Any]]] = None
+        self._watch_task: Optional[asyncio.Task] = None
+
+    def _rebuild(self, players: List[dict]) -> None:
+        """Reconstrói os índices e incrementa a versão do catálogo"""
+        by_id = {player["_id"]: player for player in players}
+        available = [player for player in players if player.get("isAvailable")]
+        by_rarity: dict = {}
+        for player in available:
+            by_rarity.setdefault(player.get("rarity"), []).append(player)
+
+        self._players = players
+        self._by_id = by_id
+        self._available = available
+        self._available_by_rarity = by_rarity
+        self.loaded = True
+        self.version += 1
+        # Hash do conteúdo: igual em todos os workers que têm o mesmo catálogo
+        content = json.dumps(players, default=str, sort_keys=True)
+        self.etag = hashlib.sha1(content.encode()).hexdigest()
+
+    async def refresh(self) -> None:
+        """Recarrega o catálogo inteiro a partir do banco"""
+        async with self._refresh_lock:
+            self._pending_changes = []
+            try:
+                players = await player_collection.find().to_list(length=None)
+            finally:
+                changes, self._pending_changes = self._pending_changes, None
+            for player in players:
+                player["_id"] = str(player["_id"])
+            # A leitura pode ter começado antes de escritas já aplicadas no catálogo
+            by_id = {player["_id"]: player for player in players}
+            for action, value in changes:
+                if action == "upsert":
+                    by_id[value["_id"]] = value
+                else:
+                    by_id.pop(value, None)
+            players = list(by_id.values())
+            self._rebuild(players)
+        logger.info(f"📚 Catálogo de players carregado: {len(players)} players (versão {self.version})")
+
+    async def ensure_loaded(self) -> None:
+        """Carrega o catálogo na primeira leitura, caso o warm-up não tenha ocorrido"""
+        if not self.loaded:
+            await self.refresh()
+
+    def upsert(self, player: dict) -> None:
+        """Aplica no catálogo um player criado ou alterado"""
+        player = copy.deepcopy(player)
+        if self._pending_changes is not None:
+            self._pending_changes.append(("upsert", player))
+        if not self.loaded:
+            return
+        if player["_id"] in self._by_id:
+            players = [player if p["_id"] == player["_id"] else p for p in self._players]
+        else:
+            players = self._players + [player]
+        self._rebuild(players)
+
+    def remove(self, player_id: str) -> None:
+        """Remove um player do catálogo"""
+        if self._pending_changes is not None:
+            self._pending_changes.append(("remove", player_id))
+        if not self.loaded or player_id not in self._by_id:
+            return
+        self._rebuild([p for p in self._players if p["_id"] != player_id])
+
+    def all(self) -> List[dict]:
+        return copy.deepcopy(self._players)
+
+    def available(self) -> List[dict]:
+        return copy.deepcopy(self._available)
+
+    def available_by_rarity(self, rarity: str) -> List[dict]:
+        return copy.deepcopy(self._available_by_rarity.get(rarity, []))
+
+    def get(self, player_id: str) -> Optional[dict]:
+        player = self._by_id.get(player_id)
+        return copy.deepcopy(player) if player is not None else None
+
+    def start_watching(self) -> None:
+        """Inicia a sincronização em background (change stream ou recarga periódica)"""
+        if self._watch_task is not None:
+            return
+        if settings.PLAYER_CATALOG_CHANGE_STREAM:
+            self._watch_task = asyncio.create_task(self._watch_changes())
+        elif settings.PLAYER_CATALOG_REFRESH_SECONDS:
+            self._watch_task = asyncio.create_task(self._poll())
+
+    async def stop_watching(self) -> None:
+        """Encerra a sincronização em background"""
+        if self._watch_task is None:
+            return
+        self._watch_task.cancel()
+        try:
+            await self._watch_task
+        except asyncio.CancelledError:
+            pass
+        self._watch_task = None
+
+    async def _watch_changes(self) -> None:
+        try:
+            async with player_collection.watch() as stream:
+                async for _change in stream:
+                    await self.refresh()
+        except PyMongoError as e:
+            logger.warning(f"⚠️ Change stream de players indisponível ({e}), usando recarga periódica")
+            if settings.PLAYER_CATALOG_REFRESH_SECONDS:
+                await self._poll()
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(settings.PLAYER_CATALOG_REFRESH_SECONDS)
+            try:
+                await self.refresh()
+            except PyMongoError as e:
+                logger.warning(f"⚠️ Falha ao recarregar catálogo de players: {e}")
+
+
+player_catalog = PlayerCatalog()
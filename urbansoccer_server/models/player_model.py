@@ -1,48 +1,81 @@
 # urbansoccer_server/models/player_model.py
-from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
+from pymongo import ReturnDocument
 
-from urbansoccer_server.core.config import settings
+from urbansoccer_server.core import database
+from urbansoccer_server.models.player_catalog import player_catalog
 
-# Conexão com o banco
-client = AsyncIOMotorClient(settings.MONGO_URI)
-db = client[settings.MONGO_DB]
-player_collection = db["players"]
+# Collection resolvida sobre o client compartilhado (core/database.py)
+player_collection = database.get_collection("players")
 
 async def create_player(player_data: dict) -> dict:
     """Cria um novo personagem (usado pelo admin para criar personagens padrão)"""
     player_data["createdAt"] = datetime.utcnow()
     result = await player_collection.insert_one(player_data)
-    new_player = await player_collection.find_one({"_id": result.inserted_id})
-    if new_player and "_id" in new_player:
-        new_player["_id"] = str(new_player["_id"])
+    new_player = {**player_data, "_id": str(result.inserted_id)}
+    player_catalog.upsert(new_player)
     return new_player
 
+async def get_catalog_etag() -> str:
+    """Versão (hash do conteúdo) do catálogo de personagens, usada nos ETags"""
+    await player_catalog.ensure_loaded()
+    return player_catalog.etag
+
 async def get_all_players() -> List[dict]:
-    """Retorna todos os personagens"""
-    players = await player_collection.find().to_list(length=None)
-    for player in players:
-        if "_id" in player:
-            player["_id"] = str(player["_id"])
-    return players
+    """Retorna todos os personagens (servido pelo catálogo em memória)"""
+    await player_catalog.ensure_loaded()
+    return player_catalog.all()
 
 async def get_available_players() -> List[dict]:
     """Retorna apenas personagens disponíveis para escolha"""
-    players = await player_collection.find({"isAvailable": True}).to_list(length=None)
-    for player in players:
-        if "_id" in player:
-            player["_id"] = str(player["_id"])
-    return players
+    await player_catalog.ensure_loaded()
+    return player_catalog.available()
 
 async def get_player_by_id(player_id: str) -> Optional[dict]:
     """Busca personagem por ID"""
     if not ObjectId.is_valid(player_id):
         return None
-    player = await player_collection.find_one({"_id": ObjectId(player_id)})
+    await player_catalog.ensure_loaded()
+    return player_catalog.get(player_id)
+
+async def get_players_by_ids(player_ids: List[str]) -> Dict[str, dict]:
+    """Busca vários personagens de uma vez, retornando um dict indexado por ID.
+
+    IDs ausentes do catálogo (ex: criados por outro worker) são buscados em uma
+    única consulta com $in.
+    """
+    await player_catalog.ensure_loaded()
+    players = {}
+    missing_ids = []
+    for player_id in set(player_ids):
+        if not ObjectId.is_valid(player_id):
+            continue
+        player = player_catalog.get(player_id)
+        if player is not None:
+            players[player_id] = player
+        else:
+            missing_ids.append(ObjectId(player_id))
+
+    if missing_ids:
+        cursor = player_collection.find({"_id": {"$in": missing_ids}})
+        async for player in cursor:
+            player["_id"] = str(player["_id"])
+            player_catalog.upsert(player)
+            players[player["_id"]] = player
+    return players
+
+async def _update_player_document(player_id: str, update: dict) -> Optional[dict]:
+    """Aplica a atualização e retorna o documento resultante em uma única operação"""
+    player = await player_collection.find_one_and_update(
+        {"_id": ObjectId(player_id)},
+        update,
+        return_document=ReturnDocument.AFTER
+    )
     if player and "_id" in player:
         player["_id"] = str(player["_id"])
+        player_catalog.upsert(player)
     return player
 
 async def update_player(player_id: str, data_to_update: dict) -> Optional[dict]:
@@ -50,11 +83,7 @@ async def update_player(player_id: str, data_to_update: dict) -> Optional[dict]:
     if not ObjectId.is_valid(player_id):
         return None
     
-    await player_collection.update_one(
-        {"_id": ObjectId(player_id)},
-        {"$set": data_to_update}
-    )
-    return await get_player_by_id(player_id)
+    return await _update_player_document(player_id, {"$set": data_to_update})
 
 async def delete_player(player_id: str) -> bool:
     """Deleta um personagem (usado pelo admin)"""
@@ -62,23 +91,17 @@ async def delete_player(player_id: str) -> bool:
         return False
     
     result = await player_collection.delete_one({"_id": ObjectId(player_id)})
+    player_catalog.remove(player_id)
     return result.deleted_count > 0
 
 async def get_players_by_rarity(rarity: str) -> List[dict]:
     """Retorna personagens por raridade (default ou unique)"""
-    players = await player_collection.find({"rarity": rarity, "isAvailable": True}).to_list(length=None)
-    for player in players:
-        if "_id" in player:
-            player["_id"] = str(player["_id"])
-    return players
+    await player_catalog.ensure_loaded()
+    return player_catalog.available_by_rarity(rarity)
 
 async def toggle_player_availability(player_id: str, is_available: bool) -> Optional[dict]:
     """Alterna disponibilidade do personagem"""
     if not ObjectId.is_valid(player_id):
         return None
     
-    await player_collection.update_one(
-        {"_id": ObjectId(player_id)},
-        {"$set": {"isAvailable": is_available}}
-    )
-    return await get_player_by_id(player_id)
\ No newline at end of file
+    return await _update_player_document(player_id, {"$set": {"isAvailable": is_available}})
\ No newline at end of file
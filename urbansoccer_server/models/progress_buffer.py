@@ -0,0 +1,267 @@
+# urbansoccer_server/models/progress_buffer.py
+"""
+Buffer write-behind para o progresso das campanhas (opt-in via
+PROGRESS_WRITE_BEHIND).
+
+Durante o jogo o cliente envia o progresso várias vezes por segundo. Com o
+buffer ativo, apenas o último progresso de cada campanha fica em memória e é
+gravado periodicamente com um único bulk_write não ordenado, de modo que as
+escritas no MongoDB acompanham o número de campanhas ativas e não a taxa de
+envio dos clientes.
+
+Só campanhas ativas entram no buffer, e o flush só grava em campanhas que
+continuam ativas e cujo lastPlayedDate é anterior ao do progresso pendente:
+uma gravação atrasada nunca reabre uma campanha nem sobrescreve um progresso
+mais novo. Além do intervalo de flush, nenhum progresso fica pendente por
+mais de PROGRESS_MAX_STALENESS_MS.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+from urbansoccer_server.core import database
+from urbansoccer_server.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+campaign_collection = database.get_collection("campaigns")
+
+# Status em que a campanha aceita progresso pelo buffer (verificado no envio e no flush)
+BUFFERED_STATUS = "active"
+
+
+def _played_at(base: dict) -> datetime:
+    """
+    Momento do progresso com a precisão do BSON (ms), sempre depois do
+    lastPlayedDate lido: o filtro $lt do flush não recusa um envio feito no
+    mesmo milissegundo da escrita anterior.
+    """
+    now = datetime.utcnow()
+    now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+    previous = base.get("lastPlayedDate")
+    if previous is not None and now <= previous:
+        now = previous + timedelta(milliseconds=1)
+    return now
+
+
+class _PendingProgress:
+    __slots__ = ("base", "progress", "last_played", "buffered_at")
+
+    def __init__(self, base: dict, progress: dict, buffered_at: float):
+        self.base = base
+        self.progress = progress
+        self.last_played = _played_at(base)
+        self.buffered_at = buffered_at
+
+
+class ProgressWriteBuffer:
+    """Mantém o último progresso de cada campanha até o próximo flush"""
+
+    def __init__(self):
+        self._pending: dict = {}
+        self._flush_requested: Optional[asyncio.Event] = None
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.submitted = 0
+        self.flushed = 0
+        self.flush_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.PROGRESS_WRITE_BEHIND
+
+    @staticmethod
+    def accepts(campaign: dict) -> bool:
+        """Se a campanha pode receber progresso pelo buffer"""
+        return campaign.get("status") == BUFFERED_STATUS
+
+    def update_pending(self, campaign_id: str, user_id: str, progress: dict) -> Optional[dict]:
+        """
+        Substitui o progresso de uma campanha que já está no buffer, sem ler o
+        banco. Retorna None se a campanha não estiver pendente para o usuário.
+        """
+        entry = self._pending.get(campaign_id)
+        if entry is None or entry.base.get("userId") != user_id:
+            return None
+        return self.submit(entry.base, progress)
+
+    def submit(self, campaign: dict, progress: dict) -> dict:
+        """Guarda o progresso mais recente e retorna a campanha como ficará após o flush"""
+        campaign_id = campaign["_id"]
+        entry = self._pending.get(campaign_id)
+        now = time.monotonic()
+        if entry is None:
+            entry = _PendingProgress(campaign, progress, now)
+            self._pending[campaign_id] = entry
+        else:
+            entry.progress = progress
+            entry.last_played = _played_at(entry.base)
+        self.submitted += 1
+
+        # Limites de atraso e de tamanho do buffer antecipam o flush
+        max_staleness = settings.PROGRESS_MAX_STALENESS_MS / 1000
+        if (now - entry.buffered_at >= max_staleness
+                or len(self._pending) >= settings.PROGRESS_BUFFER_MAX_CAMPAIGNS):
+            self._request_flush()
+        return self._merge(entry)
+
+    def overlay(self, campaign: Optional[dict]) -> Optional[dict]:
+        """Aplica o progresso pendente (se houver) sobre uma campanha lida do banco"""
+        if not campaign:
+            return campaign
+        entry = self._pending.get(campaign["_id"])
+        if entry is not None:
+            campaign["progress"] = entry.progress
+            campaign["lastPlayedDate"] = entry.last_played
+        return campaign
+
+    def pending_marker(self, user_id: str) -> str:
+        """Resumo do progresso pendente do usuário (entra no ETag das campanhas)"""
+        if not self._pending:
+            return ""
+        latest = max(
+            (entry.last_played for entry in self._pending.values() if entry.base.get("userId") == user_id),
+            default=None
+        )
+        return latest.isoformat() if latest else ""
+
+    def discard(self, campaign_id: str) -> None:
+        """Descarta o progresso pendente (ex: campanha deletada)"""
+        self._pending.pop(campaign_id, None)
+
+    async def flush_campaign(self, campaign_id: str) -> None:
+        """
+        Grava imediatamente o progresso pendente de uma campanha. Aguarda antes um
+        flush em lote em andamento, para que ele não chegue ao banco depois da
+        escrita que vem a seguir.
+        """
+        async with self._flush_lock:
+            entry = self._pending.pop(campaign_id, None)
+            if entry is None:
+                return
+            try:
+                await campaign_collection.update_one(*self._update_args(campaign_id, entry))
+                self.flushed += 1
+            except PyMongoError:
+                self._pending.setdefault(campaign_id, entry)
+                self.flush_errors += 1
+                raise
+
+    async def flush(self) -> int:
+        """Grava todo o progresso pendente com um único bulk_write"""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            operations = [
+                UpdateOne(*self._update_args(campaign_id, entry))
+                for campaign_id, entry in batch.items()
+            ]
+            try:
+                await campaign_collection.bulk_write(operations, ordered=False)
+            except PyMongoError as e:
+                # Devolve ao buffer o que não foi substituído por um envio mais novo
+                for campaign_id, entry in batch.items():
+                    self._pending.setdefault(campaign_id, entry)
+                self.flush_errors += 1
+                logger.error(f"❌ Erro ao gravar progresso em lote ({len(operations)} campanhas): {e}")
+                return 0
+            self.flushed += len(operations)
+            return len(operations)
+
+    def start(self) -> None:
+        """Inicia o flush periódico em background"""
+        if self._task is None and self.enabled:
+            self._flush_requested = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Para o flush periódico e grava o que estiver pendente"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        flushed = await self.flush()
+        if self._pending:
+            logger.error(f"❌ {len(self._pending)} progressos não puderam ser gravados no shutdown")
+        elif flushed:
+            logger.info(f"💾 {flushed} progressos gravados no shutdown")
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "submitted": self.submitted,
+            "flushed": self.flushed,
+            "flushErrors": self.flush_errors,
+        }
+
+    def _request_flush(self) -> None:
+        if self._flush_requested is not None:
+            self._flush_requested.set()
+
+    def _oldest_buffered_at(self) -> Optional[float]:
+        return min((entry.buffered_at for entry in self._pending.values()), default=None)
+
+    async def _run(self) -> None:
+        interval = settings.PROGRESS_FLUSH_INTERVAL_MS / 1000
+        max_staleness = settings.PROGRESS_MAX_STALENESS_MS / 1000
+        next_flush = time.monotonic() + interval
+        while True:
+            # Acorda no flush periódico ou quando o progresso mais antigo atinge o atraso
+            # máximo; entradas novas vencem depois da mais antiga (ou de now + max_staleness)
+            now = time.monotonic()
+            oldest = self._oldest_buffered_at()
+            stale_at = (oldest if oldest is not None else now) + max_staleness
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=max(0.0, min(next_flush, stale_at) - now))
+            except asyncio.TimeoutError:
+                pass
+
+            now = time.monotonic()
+            oldest = self._oldest_buffered_at()
+            stale = oldest is not None and now - oldest >= max_staleness
+            if not (self._flush_requested.is_set() or stale or now >= next_flush):
+                continue
+            self._flush_requested.clear()
+            next_flush = now + interval
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"❌ Erro inesperado no flush de progresso: {e}")
+
+    @staticmethod
+    def _merge(entry: _PendingProgress) -> dict:
+        return {
+            **entry.base,
+            "progress": entry.progress,
+            "lastPlayedDate": entry.last_played,
+            "version": entry.base.get("version", 0) + 1,
+        }
+
+    @staticmethod
+    def _update_args(campaign_id: str, entry: _PendingProgress) -> tuple:
+        # Só campanhas ativas e sem escrita mais recente: progresso pendente não reabre
+        # uma campanha encerrada nem sobrescreve um progresso mais novo
+        return (
+            {
+                "_id": ObjectId(campaign_id),
+                "status": BUFFERED_STATUS,
+                "lastPlayedDate": {"$lt": entry.last_played},
+            },
+            {
+                "$set": {"progress": entry.progress, "lastPlayedDate": entry.last_played},
+                "$inc": {"version": 1}
+            },
+        )
+
+
+progress_buffer = ProgressWriteBuffer()
@@ -1,45 +1,42 @@
 # urbansoccer_server/models/user_character_model.py
-from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
-from urbansoccer_server.core.config import settings
-from urbansoccer_server.models.player_model import get_player_by_id
+from urbansoccer_server.core import database
+from urbansoccer_server.core.pagination import fetch_page
+from urbansoccer_server.models.loaders import get_player_loader
 
-# Conexão com o banco
-client = AsyncIOMotorClient(settings.MONGO_URI)
-db = client[settings.MONGO_DB]
-user_character_collection = db["user_characters"]
+# Collection resolvida sobre o client compartilhado (core/database.py)
+user_character_collection = database.get_collection("user_characters")
+
+# Campos que podem ser pedidos via fields= e ordenação da listagem
+CHARACTER_FIELDS = ("characterName", "playerId", "userId", "createdAt", "player")
+CHARACTER_SORT = [("_id", 1)]
 
 async def create_user_character(user_id: str, character_data: dict) -> Optional[dict]:
 
     try:
-        # Verifica se o usuário já tem um personagem com esse nome
-        existing_character = await user_character_collection.find_one({
-            "userId": user_id,
-            "characterName": character_data["characterName"]
-        })
-        
-        if existing_character:
-            return None  # Nome já em uso pelo mesmo usuário
-        
         # Cria o personagem
+        now = datetime.utcnow()
         new_character = {
             "characterName": character_data["characterName"],
             "playerId": character_data["playerId"],
             "userId": user_id,
-            "createdAt": datetime.utcnow()
+            "createdAt": now,
+            "updatedAt": now
         }
         
+        # O índice único (userId, characterName) impede nomes repetidos
         result = await user_character_collection.insert_one(new_character)
-        created_character = await user_character_collection.find_one({"_id": result.inserted_id})
-        
-        if created_character and "_id" in created_character:
-            created_character["_id"] = str(created_character["_id"])
+        new_character["_id"] = str(result.inserted_id)
         
-        return created_character
+        return new_character
         
+    except DuplicateKeyError:
+        return None  # Nome já em uso pelo mesmo usuário
     except Exception as e:
         return None
 
@@ -65,6 +62,21 @@ async def get_user_characters(user_id: str) -> List[dict]:
     except Exception as e:
         return []
 
+async def get_characters_change_marker(user_id: str) -> str:
+    """
+    Resumo barato dos personagens do usuário (quantidade e maior updatedAt),
+    usado nos ETags; atendido pelo índice (userId, updatedAt)
+    """
+    pipeline = [
+        {"$match": {"userId": user_id}},
+        {"$group": {"_id": None, "count": {"$sum": 1}, "last": {"$max": "$updatedAt"}}}
+    ]
+    summary = await user_character_collection.aggregate(pipeline).to_list(length=1)
+    if not summary:
+        return "0:"
+    last = summary[0]["last"]
+    return f"{summary[0]['count']}:{last.isoformat() if last else ''}"
+
 async def get_user_character_by_id(character_id: str, user_id: str = None) -> Optional[dict]:
     """
     Retorna um personagem específico
@@ -111,64 +123,29 @@ async def update_user_character(character_id: str, user_id: str, update_data: di
         except Exception as e:
             return None
         
-        # Verifica se o personagem existe antes de tentar atualizar
-        existing_character = await user_character_collection.find_one({
-            "_id": ObjectId(character_id), 
-            "userId": user_id
-        })
-        
-        if not existing_character:
-            return None
-        
-        
         # Remove campos que não devem ser atualizados diretamente
-        forbidden_fields = ["_id", "userId", "playerId", "createdAt"]
+        forbidden_fields = ["_id", "userId", "playerId", "createdAt", "updatedAt"]
         update_data = {k: v for k, v in update_data.items() if k not in forbidden_fields}
         
         if not update_data:
             return None
+        update_data["updatedAt"] = datetime.utcnow()
         
-        # Verifica se está tentando alterar o nome para um já existente
-        if "characterName" in update_data:
-            duplicate_check = await user_character_collection.find_one({
-                "userId": user_id,
-                "characterName": update_data["characterName"],
-                "_id": {"$ne": ObjectId(character_id)}
-            })
-            if duplicate_check:
-                return None
-        
-        
-        result = await user_character_collection.update_one(
+        # Uma única operação: o filtro garante a posse e o índice único
+        # (userId, characterName) recusa nomes já existentes
+        updated_character = await user_character_collection.find_one_and_update(
             {"_id": ObjectId(character_id), "userId": user_id},
-            {"$set": update_data}
+            {"$set": update_data},
+            return_document=ReturnDocument.AFTER
         )
         
-        if result.modified_count > 0:
-            # Busca o documento atualizado diretamente
-            updated_character = await user_character_collection.find_one({
-                "_id": ObjectId(character_id), 
-                "userId": user_id
-            })
-            
-            if updated_character and "_id" in updated_character:
-                updated_character["_id"] = str(updated_character["_id"])
-            
-            return updated_character
-        elif result.matched_count > 0:
-            # Retorna o documento mesmo se não foi modificado
-            current_character = await user_character_collection.find_one({
-                "_id": ObjectId(character_id), 
-                "userId": user_id
-            })
-            
-            if current_character and "_id" in current_character:
-                current_character["_id"] = str(current_character["_id"])
-            
-            return current_character
-        else:
-            return None
+        if updated_character and "_id" in updated_character:
+            updated_character["_id"] = str(updated_character["_id"])
+        
+        return updated_character
         
+    except DuplicateKeyError:
+        return None
     except Exception as e:
         return None
 
@@ -207,15 +184,17 @@ async def get_user_characters_with_players(user_id: str) -> List[dict]:
     try:
         characters = await user_character_collection.find({"userId": user_id}).to_list(length=None)
         
+        # Busca todos os players em um único lote, independente do tamanho do elenco
+        players = await get_player_loader().load_many(
+            [character["playerId"] for character in characters]
+        )
+        
         characters_with_players = []
         
-        for character in characters:
+        for character, player in zip(characters, players):
             if "_id" in character:
                 character["_id"] = str(character["_id"])
             
-            # Busca as informações do player
-            player = await get_player_by_id(character["playerId"])
-            
             if player:
                 character_with_player = {
                     **character,
@@ -228,6 +207,55 @@ async def get_user_characters_with_players(user_id: str) -> List[dict]:
     except Exception as e:
         return []
 
+async def get_user_characters_with_players_page(
+    user_id: str,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Retorna uma página dos personagens do usuário com os dados dos players
+    
+    Args:
+        user_id: ID do usuário
+        limit: Tamanho da página (limitado por MAX_PAGE_SIZE)
+        cursor: Token de continuação retornado pela página anterior
+        fields: Campos a retornar (None retorna todos)
+    
+    Returns:
+        Tuple[List[dict], Optional[str]]: Personagens e cursor da próxima página
+    """
+    include_player = fields is None or "player" in fields
+    query_fields = None
+    if fields is not None:
+        # "player" não é campo do documento: é montado a partir do playerId
+        query_fields = [field for field in fields if field != "player"]
+        if include_player:
+            query_fields.append("playerId")
+    
+    characters, next_cursor = await fetch_page(
+        user_character_collection, {"userId": user_id}, CHARACTER_SORT,
+        limit, cursor, query_fields
+    )
+    for character in characters:
+        character["_id"] = str(character["_id"])
+    
+    if not include_player:
+        return characters, next_cursor
+    
+    players = await get_player_loader().load_many(
+        [character["playerId"] for character in characters]
+    )
+    characters_with_players = []
+    for character, player in zip(characters, players):
+        if player:
+            character["player"] = player
+            if fields is not None and "playerId" not in fields:
+                del character["playerId"]
+            characters_with_players.append(character)
+    
+    return characters_with_players, next_cursor
+
 async def get_user_character_with_player(character_id: str, user_id: str = None) -> Optional[dict]:
     """
     Retorna um personagem específico com informações do player
@@ -245,7 +273,7 @@ async def get_user_character_with_player(character_id: str, user_id: str = None)
             return None
         
         # Busca as informações do player
-        player = await get_player_by_id(character["playerId"])
+        player = await get_player_loader().load(character["playerId"])
         if not player:
             return None
         
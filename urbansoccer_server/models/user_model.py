@@ -1,37 +1,36 @@
 # urbansoccer_server/models/user_model.py
-from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
-from typing import List, Optional
-from passlib.context import CryptContext
+from typing import List, Optional, Tuple
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
-from urbansoccer_server.core.config import settings
+from urbansoccer_server.core import database
+from urbansoccer_server.core.pagination import fetch_page
+from urbansoccer_server.core.principal_cache import principal_cache
+from urbansoccer_server.core.passwords import (
+    hash_password,
+    verify_password,
+    hash_password_async,
+    verify_password_async
+)
 
-# Configuração para hash de senha
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Collection resolvida sobre o client compartilhado (core/database.py)
+user_collection = database.get_collection("users")
 
-# Conexão com o banco
-client = AsyncIOMotorClient(settings.MONGO_URI)
-db = client[settings.MONGO_DB]
-user_collection = db["users"]
+# Campos públicos que podem ser pedidos via fields= e ordenação da listagem
+USER_FIELDS = ("name", "email")
+USER_SORT = [("_id", 1)]
 
-def hash_password(password: str) -> str:
-    """Gera hash da senha"""
-    return pwd_context.hash(password)
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verifica se a senha está correta"""
-    return pwd_context.verify(plain_password, hashed_password)
-
-async def create_user(user_data: dict) -> dict:
-    """Cria um novo usuário com senha hasheada"""
-    user_data["password"] = hash_password(user_data["password"])
-    result = await user_collection.insert_one(user_data)
-    new_user = await user_collection.find_one({"_id": result.inserted_id})
-    # Remove a senha do retorno e converte _id para string
-    if new_user and "password" in new_user:
-        del new_user["password"]
-    if new_user and "_id" in new_user:
-        new_user["_id"] = str(new_user["_id"])
+async def create_user(user_data: dict) -> Optional[dict]:
+    """Cria um novo usuário com senha hasheada (None se o email já estiver em uso)"""
+    user_data["password"] = await hash_password_async(user_data["password"])
+    try:
+        result = await user_collection.insert_one(user_data)
+    except DuplicateKeyError:
+        return None
+    # Retorna o documento montado localmente, sem a senha e com _id como string
+    new_user = {k: v for k, v in user_data.items() if k != "password"}
+    new_user["_id"] = str(result.inserted_id)
     return new_user
 
 async def get_all_users() -> List[dict]:
@@ -43,6 +42,24 @@ async def get_all_users() -> List[dict]:
             user["_id"] = str(user["_id"])
     return users
 
+async def get_users_page(
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """Retorna uma página de usuários (sem senhas) e o cursor da próxima"""
+    users, next_cursor = await fetch_page(
+        user_collection, {}, USER_SORT, limit, cursor, fields,
+        base_projection={"password": 0}
+    )
+    for user in users:
+        user["_id"] = str(user["_id"])
+    return users, next_cursor
+
+def export_users_cursor():
+    """Cursor de todos os usuários (sem senhas) para exportação em streaming"""
+    return user_collection.find({}, {"password": 0}).sort(USER_SORT)
+
 async def get_user_by_id(user_id: str) -> Optional[dict]:
     """Busca usuário por ID sem retornar a senha"""
     if not ObjectId.is_valid(user_id):
@@ -64,7 +81,7 @@ async def authenticate_user(email: str, password: str) -> Optional[dict]:
     user = await get_user_by_email(email)
     if not user:
         return None
-    if not verify_password(password, user["password"]):
+    if not await verify_password_async(password, user["password"]):
         return None
     # Remove a senha do retorno
     del user["password"]
@@ -77,13 +94,18 @@ async def update_user(user_id: str, data_to_update: dict) -> Optional[dict]:
     
     # Se a senha está sendo atualizada, fazer o hash
     if "password" in data_to_update:
-        data_to_update["password"] = hash_password(data_to_update["password"])
+        data_to_update["password"] = await hash_password_async(data_to_update["password"])
     
-    await user_collection.update_one(
+    user = await user_collection.find_one_and_update(
         {"_id": ObjectId(user_id)},
-        {"$set": data_to_update}
+        {"$set": data_to_update},
+        projection={"password": 0},
+        return_document=ReturnDocument.AFTER
     )
-    return await get_user_by_id(user_id)
+    principal_cache.invalidate_user_id(user_id)
+    if user and "_id" in user:
+        user["_id"] = str(user["_id"])
+    return user
 
 async def delete_user(user_id: str) -> bool:
     """Deleta um usuário"""
@@ -91,4 +113,5 @@ async def delete_user(user_id: str) -> bool:
         return False
     
     result = await user_collection.delete_one({"_id": ObjectId(user_id)})
+    principal_cache.invalidate_user_id(user_id)
     return result.deleted_count > 0
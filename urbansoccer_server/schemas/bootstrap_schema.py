@@ -0,0 +1,17 @@
+# urbansoccer_server/schemas/bootstrap_schema.py
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from urbansoccer_server.schemas.campaign_schema import CampaignPublic
+from urbansoccer_server.schemas.player_schema import PlayerPublic
+from urbansoccer_server.schemas.user_character_schema import UserCharacterWithPlayer
+from urbansoccer_server.schemas.user_schema import UserPublic
+
+class Bootstrap(BaseModel):
+    """Dados iniciais do cliente do jogo em uma única resposta"""
+    user: UserPublic
+    characters: List[UserCharacterWithPlayer]
+    charactersNextCursor: Optional[str] = Field(None, description="Cursor para continuar em GET /characters/")
+    activeCampaigns: List[CampaignPublic]
+    activeCampaignsNextCursor: Optional[str] = Field(None, description="Cursor para continuar em GET /campaigns/active")
+    availablePlayers: List[PlayerPublic]
@@ -9,6 +9,15 @@ class CampaignProgress(BaseModel):
     currentMission: str = Field(default="Primeira Missão")
     inventory: List[str] = Field(default_factory=list)
 
+class CampaignProgressDelta(BaseModel):
+    """Alterações incrementais no progresso da campanha"""
+    scoreIncrement: int = Field(default=0, ge=0, description="Pontos a somar ao score")
+    levelIncrement: int = Field(default=0, ge=0, description="Níveis a subir")
+    level: Optional[int] = Field(None, ge=1, description="Define o nível diretamente (ignora levelIncrement)")
+    currentMission: Optional[str] = None
+    inventoryAdd: List[str] = Field(default_factory=list, description="Itens a adicionar ao inventário")
+    inventoryRemove: List[str] = Field(default_factory=list, description="Itens a remover do inventário")
+
 class CampaignBase(BaseModel):
     userId: str = Field(..., description="ID do usuário proprietário da campanha")
     playerId: str = Field(..., description="ID do personagem escolhido")
@@ -21,14 +30,18 @@ class CampaignCreate(BaseModel):
     campaignName: Optional[str] = Field(None, max_length=100)
 
 class CampaignUpdate(BaseModel):
+    """Dados editáveis da campanha; o status só muda por /complete e /abandon"""
     campaignName: Optional[str] = None
-    status: Optional[str] = None
     progress: Optional[CampaignProgress] = None
 
+    # Campos desconhecidos (ex: status) são rejeitados em vez de ignorados
+    model_config = ConfigDict(extra="forbid")
+
 class CampaignPublic(CampaignBase):
     id: str = Field(..., alias="_id")
     startDate: datetime
     lastPlayedDate: datetime
+    version: int = Field(default=0, description="Contador de alterações (controle de concorrência otimista)")
 
     model_config = ConfigDict(
         populate_by_name=True,
@@ -50,3 +63,4 @@ class CampaignWithDetails(CampaignPublic):
 
 class CampaignList(BaseModel):
     campaigns: List[CampaignPublic]
+    nextCursor: Optional[str] = None
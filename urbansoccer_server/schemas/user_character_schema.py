@@ -60,3 +60,4 @@ class UserCharacterWithPlayer(BaseModel):
 class UserCharacterWithPlayerList(BaseModel):
     """Lista de personagens com informações dos players"""
     characters: List[UserCharacterWithPlayer]
+    nextCursor: Optional[str] = Field(None, description="Token para buscar a próxima página")
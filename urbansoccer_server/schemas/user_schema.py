@@ -32,6 +32,7 @@ class UserPublic(UserBase):
 
 class UserList(BaseModel):
     users: List[UserPublic]
+    nextCursor: Optional[str] = None
 
 class UserLogin(BaseModel):
     email: EmailStr
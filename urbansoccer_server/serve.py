@@ -0,0 +1,143 @@
+# urbansoccer_server/serve.py
+"""
+Ponto de entrada de produção: N workers uvicorn, cada um com seu próprio
+processo e seu próprio client do banco (criado no lifespan, depois do fork).
+
+- Workers padrão: um por CPU disponível, respeitando a afinidade e a cota de CPU do
+  cgroup (containers com --cpus / limits.cpu), ou SERVER_WORKERS
+- Os limites de pool (MONGO_MAX_POOL_SIZE), de admissão e do pool de senhas valem
+  por worker: o total é o valor configurado vezes o número de workers
+- Com vários workers o catálogo de players precisa de sincronização entre processos
+  (PLAYER_CATALOG_CHANGE_STREAM ou PLAYER_CATALOG_REFRESH_SECONDS) e o write-behind
+  do progresso (PROGRESS_WRITE_BEHIND), que vive em cada processo, não é permitido
+- uvloop e httptools são usados quando instalados (fastapi[standard] já os inclui)
+- SIGTERM: o supervisor repassa o sinal aos workers, que param de aceitar
+  conexões, concluem as requisições em andamento (até SERVER_GRACEFUL_TIMEOUT_SECONDS)
+  e executam o shutdown do lifespan (flush do progresso, fechamento do client)
+
+Uso:
+    python -m urbansoccer_server.serve
+    python -m urbansoccer_server.serve --workers 4 --port 8000
+"""
+import argparse
+import importlib.util
+import logging
+import math
+import os
+from typing import List, Optional
+
+import uvicorn
+
+from urbansoccer_server.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+APP = "urbansoccer_server.main:app"
+
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path, encoding="ascii") as file:
+            return file.read().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit(root: str = CGROUP_ROOT) -> Optional[int]:
+    """CPUs da cota do cgroup (v2 cpu.max ou v1 cfs_quota_us), arredondadas para cima; None sem cota"""
+    cpu_max = _read(os.path.join(root, "cpu.max"))
+    if cpu_max is not None:
+        quota, _, period = cpu_max.partition(" ")
+    else:
+        quota = _read(os.path.join(root, "cpu", "cpu.cfs_quota_us"))
+        period = _read(os.path.join(root, "cpu", "cpu.cfs_period_us"))
+    try:
+        quota_us, period_us = int(quota), int(period)
+    except (TypeError, ValueError):
+        # "max" (v2) ou arquivos ausentes: sem cota
+        return None
+    if quota_us <= 0 or period_us <= 0:
+        return None
+    return max(1, math.ceil(quota_us / period_us))
+
+
+def default_workers() -> int:
+    """Workers configurados ou um por CPU disponível (afinidade e cota do cgroup)"""
+    if settings.SERVER_WORKERS:
+        return settings.SERVER_WORKERS
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    return min(cpus, limit) if limit is not None else cpus
+
+
+def multi_worker_errors(workers: int) -> List[str]:
+    """Configurações que só são seguras com um único processo"""
+    if workers <= 1:
+        return []
+    errors = []
+    if not settings.PLAYER_CATALOG_CHANGE_STREAM and not settings.PLAYER_CATALOG_REFRESH_SECONDS:
+        errors.append(
+            "o catálogo de players de cada worker só enxergaria as próprias escritas: "
+            "defina PLAYER_CATALOG_CHANGE_STREAM=true ou PLAYER_CATALOG_REFRESH_SECONDS"
+        )
+    if settings.PROGRESS_WRITE_BEHIND:
+        errors.append(
+            "PROGRESS_WRITE_BEHIND mantém um buffer por processo e os flushes de workers "
+            "diferentes podem gravar progresso antigo sobre o novo: desative-o ou use --workers 1"
+        )
+    return errors
+
+
+def event_loop() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_protocol() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=default_workers(), help="Processos (padrão: um por CPU)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    errors = multi_worker_errors(args.workers)
+    if errors:
+        parser.error(f"configuração inválida para {args.workers} workers: " + "; ".join(errors))
+    if settings.DATABASE_ENGINE == "memory" and args.workers > 1:
+        logger.warning("⚠️ Engine em memória com vários workers: cada processo terá seus próprios dados")
+
+    loop, http = event_loop(), http_protocol()
+    logger.info(f"🚀 Iniciando {args.workers} worker(s) em {args.host}:{args.port} (loop {loop}, http {http})")
+    if settings.DATABASE_ENGINE == "mongo":
+        logger.info(
+            f"🔌 Até {settings.MONGO_MAX_POOL_SIZE * args.workers} conexões com o MongoDB no total "
+            f"({settings.MONGO_MAX_POOL_SIZE} por worker)"
+        )
+    uvicorn.run(
+        APP,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=loop,
+        http=http,
+        lifespan="on",
+        proxy_headers=True,
+        forwarded_allow_ips=settings.SERVER_FORWARDED_ALLOW_IPS,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_SECONDS,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+        access_log=settings.SERVER_ACCESS_LOG,
+    )
+
+
+if __name__ == "__main__":
+    main()